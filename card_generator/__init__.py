@@ -5,29 +5,118 @@ table-top naval strategy game.
 
 import os
 
-import numpy
-from PIL import ImageDraw
-from blend_modes.blending_functions import screen
+from PIL import ImageDraw, Image
 
 from card_generator.models.assets import *
 from card_generator.models.alliance import Alliance
 from card_generator.models.nation import Nation
 from card_generator.models.unit import Unit, UnitType
-from card_generator.utils.image import center_image
-from card_generator.utils.image.ImageTextWrap import ImageTextWrap
-from card_generator.utils.text import y_center_text, draw_text_psd_style
+from card_generator.utils.encoding import OutputProfile, EncodeStats, AsyncWriter, DEFAULT_PROFILE
+from card_generator.utils.image import center_image, alpha_composite_region
+from card_generator.utils.profiling import stage
+from card_generator.utils.text import y_center_text, draw_text_psd_style, get_metrics
 
 logger = logging.getLogger(__name__)
 
 
+def _plan_ship_silhouette(size: tuple) -> list:
+    """
+    Plans the resizing of a ship silhouette, scaling by width first and then by height if it is still too tall.
+    :param size: size of the source silhouette.
+    :return: sizes to resize the silhouette through.
+    """
+    w, h = size
+    scale = (Values.SILHOUETTE_BASE_WIDTH + Values.DROP_SHADOW_GROWTH) / w
+    sizes = [(int(w * scale), int(h * scale))]
+    w, h = sizes[-1]
+    if h >= Values.SILHOUETTE_SECTION_HEIGHT + Values.SILHOUETTE_HEIGHT_SHIP_OFFSET:
+        scale = (Values.SILHOUETTE_SECTION_HEIGHT + Values.SILHOUETTE_HEIGHT_SHIP_OFFSET) / h
+        sizes.append((int(w * scale), int(h * scale)))
+    return sizes
+
+
+def _plan_plane_silhouette(size: tuple) -> list:
+    """
+    Plans the resizing of an aircraft silhouette, scaling it to the maximum height.
+    :param size: size of the source silhouette.
+    :return: sizes to resize the silhouette through.
+    """
+    w, h = size
+    scale = Values.AIRCRAFT_SILHOUETTE_MAX_HEIGHT / h
+    return [(int(w * scale), int(h * scale))]
+
+
+def _plan_back_blueprint(size: tuple) -> list:
+    """
+    Plans the resizing of the blueprint on the back of a card, only shrinking it if it is too wide.
+    :param size: size of the source blueprint.
+    :return: sizes to resize the blueprint through.
+    """
+    w, h = size
+    if w > Values.BLUEPRINT_MAX_WIDTH_BACK:
+        scale = Values.BLUEPRINT_MAX_WIDTH_BACK / w
+        return [(int(w * scale), int(h * scale))]
+    return []
+
+
 class Generator:
     """
     Card generator for a single unit.
     """
 
-    def __init__(self, nation: Nation, unit: Unit) -> None:
+    def __init__(self, nation: Nation, unit: Unit, profile: OutputProfile = DEFAULT_PROFILE,
+                 writer: AsyncWriter = None) -> None:
+        """
+        :param nation: nation the unit belongs to.
+        :param unit: unit to generate the card for.
+        :keyword profile: output profile the cards are written with, defaults to PNG at Pillow's default settings.
+        :keyword writer: writer to hand the cards to, so that they are encoded and written in the background. Defaults
+                         to writing the cards before returning.
+        """
         self.nation = nation
         self.unit = unit
+        self.profile = profile
+        self.writer = writer
+        self.encode_stats = EncodeStats()
+        self._writes = list()
+
+    def get_card_path(self, output_folder: str = None, back: bool = False) -> str:
+        """
+        Gets the path a card is written to.
+        :param output_folder: folder the cards are dumped to, defaults to the current directory.
+        :param back: whether to get the path of the back of the card rather than the front.
+        :return: path of the card image.
+        """
+        if output_folder is not None:
+            card_folder = os.path.join(output_folder, "cards", self.nation.name)
+        else:
+            card_folder = os.path.join(os.getcwd(), "cards", self.nation.name)
+        if back:
+            return "{}/{}-back{}".format(card_folder, self.unit.name, self.profile.extension).replace("\"", ";")
+        return "{}/{}{}".format(card_folder, self.unit.name, self.profile.extension).replace("\"", ";")
+
+    def _write(self, card: Image.Image, card_path: str, display: bool = False) -> None:
+        """
+        Writes out a rendered card with the generator's output profile.
+        :param card: the rendered card.
+        :param card_path: path to write the card to, its folder is created if it does not exist.
+        :param display: if set to true, will also display the card. Defaults to false.
+        """
+        if display:
+            card.show()
+        if self.writer is not None:
+            self._writes.append(self.writer.submit(self.profile, card, card_path, self.encode_stats))
+            return
+        self.profile.save(card, card_path, self.encode_stats)
+        logger.debug("saved to {}".format(card_path))
+
+    def wait_for_writes(self) -> None:
+        """
+        Waits for the cards handed to the writer to be written, raising the first error that occurred writing them.
+        """
+        writes, self._writes = self._writes, list()
+        for write in writes:
+            write.result()
 
     def generate_front(self, display: bool = False, output_folder: str = None) -> None:
         """
@@ -35,14 +124,34 @@ class Generator:
         :param display: if set to true, will display the card instead of writing it out as an image. Defaults to false.
         :param output_folder: folder to dump the cards to, defaults to the current directory.
         """
+        self._write(self.render_front(), self.get_card_path(output_folder), display)
+
+    def generate_back(self, display: bool = False, output_folder: str = None) -> None:
+        """
+        Generates the back of the card.
+        :param display: if set to true, will display the card instead of writing it out as an image. Defaults to false.
+        :param output_folder: folder to dump the cards to, defaults to the current directory.
+        """
+        self._write(self.render_back(), self.get_card_path(output_folder, back=True), display)
+
+    def render_front(self) -> Image.Image:
+        """
+        Renders the front of the card for the current unit.
+        :return: the rendered card.
+        """
+        # numpy is only imported once a card is rendered, see card_generator.utils.image
+        from card_generator.utils.image.blend import screen_blend
         logger.info("{}/{}".format(self.nation.name, self.unit.name))
-        if self.nation.get_alliance() == Alliance.Allies.value:
-            card_base = Image.open(Background.ALLIES_BASE).convert("RGBA")
-        else:
-            card_base = Image.open(Background.AXIS_BASE).convert("RGBA")
+        with stage("front.template"):
+            if self.nation.get_alliance() == Alliance.Allies.value:
+                card_base = Background.get_front_template(Background.ALLIES_BASE)
+            else:
+                card_base = Background.get_front_template(Background.AXIS_BASE)
         y_offset = Values.ATTACK_RECTANGLE_START_Y
         base_draw_layer = ImageDraw.Draw(card_base, "RGBA")
-        blueprint_layer = Image.new("RGBA", card_base.size, Colors.TRANSPARENT)
+        # the blueprint is screen blended at its position rather than from a card sized layer
+        blueprint = None
+        blueprint_position = (0, 0)
         transparent_overlay = Image.new("RGBA", card_base.size, Colors.TRANSPARENT)
         transparent_overlay_draw = ImageDraw.Draw(transparent_overlay)
         top_overlay = Image.new("RGBA", card_base.size, Colors.TRANSPARENT)
@@ -105,55 +214,51 @@ class Generator:
 
             # silhouette
             if self.unit.ship_class is not None:
-                silhouette = Background.get_silhouette(UnitType.SHIP, self.nation.name, self.unit.ship_class.lower())
-                w, h = silhouette.size
-                # scale by width first
-                scale = (Values.SILHOUETTE_BASE_WIDTH + Values.DROP_SHADOW_GROWTH) / w
-                silhouette = silhouette.resize((int(w * scale), int(h * scale)))
+                silhouette = Background.get_silhouette(UnitType.SHIP, self.nation.name, self.unit.ship_class.lower(),
+                                                       plan=_plan_ship_silhouette)
                 w, h = silhouette.size
-                # now scale by height if needed
-                if h >= Values.SILHOUETTE_SECTION_HEIGHT + Values.SILHOUETTE_HEIGHT_SHIP_OFFSET:
-                    scale = (Values.SILHOUETTE_SECTION_HEIGHT + Values.SILHOUETTE_HEIGHT_SHIP_OFFSET)/h
-                    silhouette = silhouette.resize((int(w * scale), int(h * scale)))
-                    w, h = silhouette.size
                 transparent_overlay.paste(silhouette,
                                           (Values.SILHOUETTE_X_MARGIN - Values.DROP_SHADOW_OFFSET,
                                            Values.SILHOUETTE_SECTION_HEIGHT - h))
             else:
-                silhouette = Background.get_silhouette(UnitType.PLANE, self.nation.name, self.unit.name.lower())
-                w, h = silhouette.size
-                scale = Values.AIRCRAFT_SILHOUETTE_MAX_HEIGHT / h
-                silhouette = silhouette.resize((int(w * scale), int(h * scale)))
+                silhouette = Background.get_silhouette(UnitType.PLANE, self.nation.name, self.unit.name.lower(),
+                                                       plan=_plan_plane_silhouette)
                 height = center_image(0, 0, 0, Values.SILHOUETTE_SECTION_HEIGHT, silhouette)[1]
                 transparent_overlay.paste(silhouette, (Values.SILHOUETTE_X_MARGIN, height))
 
         def populate_attack():
-            nonlocal y_offset
+            nonlocal y_offset, blueprint, blueprint_position
             # blueprint first
+            def plan_blueprint(size: tuple) -> list:
+                w, h = size
+                if self.unit.blue_print_settings.max_width is not None:
+                    scale = self.unit.blue_print_settings.max_width / w
+                else:
+                    scale = 300 / w
+                return [(int(w * scale), int(h * scale))]
+
             if self.unit.ship_class is None:
                 if self.unit.blue_print_settings.file_name is not None:
                     blueprint = Background.get_blueprint(UnitType.PLANE,
                                                          self.nation.name,
-                                                         self.unit.blue_print_settings.file_name)
+                                                         self.unit.blue_print_settings.file_name,
+                                                         plan=plan_blueprint)
                 else:
                     blueprint = Background.get_blueprint(UnitType.PLANE,
                                                          self.nation.name,
-                                                         self.unit.name.lower())
+                                                         self.unit.name.lower(),
+                                                         plan=plan_blueprint)
             else:
                 if self.unit.blue_print_settings.file_name is not None:
                     blueprint = Background.get_blueprint(UnitType.SHIP,
                                                          self.nation.name,
-                                                         self.unit.blue_print_settings.file_name)
+                                                         self.unit.blue_print_settings.file_name,
+                                                         plan=plan_blueprint)
                 else:
                     blueprint = Background.get_blueprint(UnitType.SHIP,
                                                          self.nation.name,
-                                                         self.unit.ship_class.lower())
-            w, h = blueprint.size
-            if self.unit.blue_print_settings.max_width is not None:
-                scale = self.unit.blue_print_settings.max_width / w
-            else:
-                scale = 300 / w
-            blueprint = blueprint.resize((int(w * scale), int(h * scale)))
+                                                         self.unit.ship_class.lower(),
+                                                         plan=plan_blueprint)
             if self.unit.blue_print_settings.x_placement is not None:
                 x = self.unit.blue_print_settings.x_placement
             else:
@@ -164,39 +269,13 @@ class Generator:
                 y = center_image(0, y_offset,
                                  0, y_offset - 10 + (Values.ATTACK_RECTANGLE_WIDTH * self.unit.get_attacks()[0]),
                                  blueprint)[1]
-            blueprint_layer.paste(blueprint, (x, y))
-            draw_text_psd_style(base_draw_layer,
-                                Coordinates.ATTACK_HEADING,
-                                "Attacks",
-                                font=Fonts.ATTACK_ARMOR_STATS_HEADINGS,
-                                tracking=-30, leading=0, center_x=True, fill=Colors.STATS)
-
-            base_draw_layer.text(Coordinates.ATTACK_RANGE_HEADING_0, "0",
-                                 font=Fonts.ATTACK_ARMOR_STATS_HEADINGS,
-                                 fill=Colors.STATS)
-
-            base_draw_layer.text(Coordinates.ATTACK_RANGE_HEADING_1, "1",
-                                 font=Fonts.ATTACK_ARMOR_STATS_HEADINGS,
-                                 fill=Colors.STATS)
-
-            base_draw_layer.text(Coordinates.ATTACK_RANGE_HEADING_2, "2",
-                                 font=Fonts.ATTACK_ARMOR_STATS_HEADINGS,
-                                 fill=Colors.STATS)
-
-            base_draw_layer.text(Coordinates.ATTACK_RANGE_HEADING_3, "3",
-                                 font=Fonts.ATTACK_ARMOR_STATS_HEADINGS,
-                                 fill=Colors.STATS)
-
-            base_draw_layer.line(Coordinates.ATTACK_HEADING_DIVIDER, Colors.STATS, Values.BORDER_WIDTH)
-            base_draw_layer.line(Coordinates.ATTACK_HEADING_DIVIDER_1, Colors.STATS, 1)
-            base_draw_layer.line(Coordinates.ATTACK_HEADING_DIVIDER_2, Colors.POINT_VALUE, 1)
-            base_draw_layer.line(Coordinates.ATTACK_HEADING_DIVIDER_3, Colors.POINT_VALUE, 1)
+            blueprint_position = (x, y)
 
             number_of_attacks, attacks = self.unit.get_attacks()
             for i in range(number_of_attacks):
                 # attack icon and box
-                icon = Icons.get_attack_icon(attacks[i]["name"])
-                current_attack = attacks[i]["value"]
+                icon = Icons.get_attack_icon(attacks[i].name)
+                current_attack = attacks[i].value
                 transparent_overlay_draw.rectangle(
                     (
                         (Values.LEFT_CARD_BORDER, y_offset + 2),
@@ -243,7 +322,7 @@ class Generator:
                 # render the attacks
                 for attack_range in range(4):
                     # dynamically find the size of the attack value text, so it can be centered
-                    w, h = transparent_overlay_draw.textsize(current_attack[attack_range], font=Fonts.ATTACK_STATS)
+                    w, h = get_metrics(Fonts.ATTACK_STATS).size(current_attack[attack_range])
                     current_x_middle = Values.ATTACK_RECTANGLE_START_X + (Values.DIVIDER_SPACING / 2) \
                                        + (attack_range * Values.DIVIDER_SPACING)
                     current_y_middle = y_offset - 8 + (Values.ATTACK_RECTANGLE_WIDTH / 2)
@@ -330,7 +409,7 @@ class Generator:
             armor_values = self.unit.get_armor()
             for entry in ["ARMOR", "VITAL ARMOR", "HULL POINTS"]:
                 # dynamically find the size of the attack text, so it can be centered
-                w, h = transparent_overlay_draw.textsize(entry, font=Fonts.ATTACK_ARMOR_STATS_HEADINGS)
+                w, h = get_metrics(Fonts.ATTACK_ARMOR_STATS_HEADINGS).size(entry)
                 current_y_middle = y_offset + Values.ARMOR_ROW_TOP_MARGIN + (Values.ARMOR_ROW_HEIGHT / 2) - 5
                 transparent_overlay_draw.text(
                     (
@@ -359,39 +438,11 @@ class Generator:
 
         def populate_abilities():
             nonlocal y_offset
-            abilities_text_font, abilities_title_font, font_size = Fonts.get_abilities_font(self.unit, y_offset)
-            y_offset += Values.ARMOR_ROW_TOP_MARGIN + 45 + Values.SPECIAL_ABILITY_TOP_MARGIN
-            for title, ability in sorted(self.unit.special_abilities.items(), key=ability_sort):
-                if ability is not None:
-                    title = title + " - "
-                transparent_overlay_draw.text((Values.SPECIAL_ABILITY_LEFT_MARGIN, y_offset), title,
-                                              font=abilities_title_font,
-                                              fill=Colors.WHITE)
-                first_line_offset = abilities_title_font.getsize(title)[0]
-                # scale the width of the first line to accommodate the title text.
-                first_line_width = int(
-                    (1.2 - ((Values.SPECIAL_ABILITY_LEFT_MARGIN + first_line_offset) / Values.ATTACK_RECTANGLE_END_X)) *
-                    (Values.SPECIAL_ABILITY_TEXT_WIDTH * (25 / font_size)))
-                text = ability
-                if ability is not None:
-                    if first_line_width > 0:
-                        text = wrap(text, width=first_line_width)
-                        first_line = text[0]
-                        text = " ".join(text[1:])
-                        transparent_overlay_draw.text(
-                            (Values.SPECIAL_ABILITY_LEFT_MARGIN + first_line_offset, y_offset),
-                            first_line,
-                            font=abilities_text_font, fill=Colors.WHITE)
-                        y_offset += abilities_text_font.getsize(first_line)[1]
-                    else:
-                        y_offset += abilities_text_font.getsize(title)[1]
-                    for line in wrap(text, width=int((Values.SPECIAL_ABILITY_TEXT_WIDTH * (25 / font_size)))):
-                        transparent_overlay_draw.text((Values.SPECIAL_ABILITY_LEFT_MARGIN, y_offset), line,
-                                                      font=abilities_text_font, fill=Colors.WHITE)
-                        y_offset += abilities_text_font.getsize(line)[1]
-                else:
-                    y_offset += abilities_title_font.getsize(title)[1]
-                y_offset += Values.SPECIAL_ABILITY_BOTTOM_MARGIN
+            with stage("front.populate_abilities.fit"):
+                abilities = Fonts.fit_abilities(self.unit, y_offset)
+            with stage("front.populate_abilities.draw"):
+                abilities.layout.draw(transparent_overlay_draw, fill=Colors.WHITE)
+            y_offset = abilities.layout.end_y
 
         def populate_set():
             set_offset = Values.LEFT_CARD_BORDER
@@ -403,7 +454,7 @@ class Generator:
             set_offset += Icons.get_set_icon(self.unit.set).size[0]
             base_draw_layer.text((set_offset + 10, Values.SET_Y_OFFSET - 8), self.unit.set_number, font=Fonts.SET_INFO,
                                  fill=Colors.WHITE)
-            set_offset += Fonts.SET_INFO.getsize(self.unit.set_number)[0] + 18
+            set_offset += get_metrics(Fonts.SET_INFO).size(self.unit.set_number)[0] + 18
 
             if Icons.get_rarity_icon(self.unit.rarity) is not None:
                 transparent_overlay.paste(Icons.get_rarity_icon(self.unit.rarity),
@@ -411,44 +462,35 @@ class Generator:
                                           Icons.get_rarity_icon(self.unit.rarity)
                                           )
 
-        populate_header()
-        populate_attack()
-        populate_armor()
+        with stage("front.populate_header"):
+            populate_header()
+        with stage("front.populate_attack"):
+            populate_attack()
+        with stage("front.populate_armor"):
+            populate_armor()
         populate_abilities()
-        populate_set()
-
-        out = Image.alpha_composite(transparent_overlay, top_overlay)
-        base = numpy.array(card_base)
-        base = base.astype(float)
-        blueprint_layer = numpy.array(blueprint_layer)
-        blueprint_layer = blueprint_layer.astype(float)
-        base = screen(base, blueprint_layer, 1.0)
-        base = numpy.uint8(base)
-        base = Image.fromarray(base)
-        out = Image.alpha_composite(base, out)
-        if display:
-            out.show()
-        if output_folder is not None:
-            card_path = (os.path.join(output_folder, "cards", self.nation.name))
-        else:
-            card_path = (os.path.join(os.getcwd(), "cards", self.nation.name))
-        try:
-            out.save("{}/{}.png".format(card_path, self.unit.name).replace("\"", ";"))
-            logger.debug("saved to {}".format(card_path))
-        except FileNotFoundError:
-            os.makedirs(card_path, exist_ok=True)
-            out.save("{}/{}.png".format(card_path, self.unit.name).replace("\"", ";"))
+        with stage("front.populate_set"):
+            populate_set()
 
-    def generate_back(self, display: bool = False, output_folder: str = None) -> None:
+        with stage("front.composite"):
+            out = alpha_composite_region(transparent_overlay, top_overlay)
+        with stage("front.screen_blend"):
+            base = screen_blend(card_base, blueprint, offset=blueprint_position)
+        with stage("front.composite"):
+            return alpha_composite_region(base, out)
+
+    def render_back(self) -> Image.Image:
         """
-        Generates the back of the card.
-        :param display: if set to true, will display the card instead of writing it out as an image. Defaults to false.
-        :param output_folder: folder to dump the cards to, defaults to the current directory.
+        Renders the back of the card for the current unit.
+        :return: the rendered card.
         """
-        if self.nation.get_alliance() == Alliance.Allies.value:
-            card_back = Image.open(Background.ALLIES_BACK).convert("RGBA")
-        else:
-            card_back = Image.open(Background.AXIS_BACK).convert("RGBA")
+        from card_generator.utils.image.blend import screen_blend
+        from card_generator.utils.image.ImageTextWrap import ImageTextWrap
+        with stage("back.template"):
+            if self.nation.get_alliance() == Alliance.Allies.value:
+                card_back = Background.get_template(Background.ALLIES_BACK)
+            else:
+                card_back = Background.get_template(Background.AXIS_BACK)
 
         # configure the various layers needed to draw the back
         base_draw_layer = ImageDraw.Draw(card_back, "RGBA")
@@ -492,25 +534,15 @@ class Generator:
 
             # silhouette
             if self.unit.ship_class is not None:
-                silhouette = Background.get_silhouette(UnitType.SHIP, self.nation.name, self.unit.ship_class.lower())
-                w, h = silhouette.size
-                # scale by width first
-                scale = (Values.SILHOUETTE_BASE_WIDTH + Values.DROP_SHADOW_GROWTH) / w
-                silhouette = silhouette.resize((int(w * scale), int(h * scale)))
+                silhouette = Background.get_silhouette(UnitType.SHIP, self.nation.name, self.unit.ship_class.lower(),
+                                                       plan=_plan_ship_silhouette)
                 w, h = silhouette.size
-                # scale height if needed
-                if h >= Values.SILHOUETTE_SECTION_HEIGHT + Values.SILHOUETTE_HEIGHT_SHIP_OFFSET:
-                    scale = (Values.SILHOUETTE_SECTION_HEIGHT + Values.SILHOUETTE_HEIGHT_SHIP_OFFSET) / h
-                    silhouette = silhouette.resize((int(w * scale), int(h * scale)))
-                    w, h = silhouette.size
                 transparent_overlay.paste(silhouette,
                                           (Values.SILHOUETTE_X_MARGIN - Values.DROP_SHADOW_OFFSET,
                                            Values.SILHOUETTE_SECTION_HEIGHT - h - 2))
             else:
-                silhouette = Background.get_silhouette(UnitType.PLANE, self.nation.name, self.unit.name.lower())
-                w, h = silhouette.size
-                scale = Values.AIRCRAFT_SILHOUETTE_MAX_HEIGHT / h
-                silhouette = silhouette.resize((int(w * scale), int(h * scale)))
+                silhouette = Background.get_silhouette(UnitType.PLANE, self.nation.name, self.unit.name.lower(),
+                                                       plan=_plan_plane_silhouette)
                 height = center_image(0, 0, 0, Values.SILHOUETTE_SECTION_HEIGHT, silhouette)[1]
                 transparent_overlay.paste(silhouette, (Values.SILHOUETTE_X_MARGIN, height))
 
@@ -521,24 +553,24 @@ class Generator:
                 if self.unit.blue_print_settings.file_name is not None:
                     blueprint = Background.get_blueprint(UnitType.PLANE,
                                                          self.nation.name,
-                                                         self.unit.blue_print_settings.file_name)
+                                                         self.unit.blue_print_settings.file_name,
+                                                         plan=_plan_back_blueprint)
                 else:
                     blueprint = Background.get_blueprint(UnitType.PLANE,
                                                          self.nation.name,
-                                                         self.unit.name.lower())
+                                                         self.unit.name.lower(),
+                                                         plan=_plan_back_blueprint)
             else:
                 if self.unit.blue_print_settings.file_name is not None:
                     blueprint = Background.get_blueprint(UnitType.SHIP,
                                                          self.nation.name,
-                                                         self.unit.blue_print_settings.file_name)
+                                                         self.unit.blue_print_settings.file_name,
+                                                         plan=_plan_back_blueprint)
                 else:
                     blueprint = Background.get_blueprint(UnitType.SHIP,
                                                          self.nation.name,
-                                                         self.unit.ship_class.lower())
-            w, h = blueprint.size
-            if w > Values.BLUEPRINT_MAX_WIDTH_BACK:
-                scale = Values.BLUEPRINT_MAX_WIDTH_BACK / w
-                blueprint = blueprint.resize((int(w * scale), int(h * scale)))
+                                                         self.unit.ship_class.lower(),
+                                                         plan=_plan_back_blueprint)
             if self.unit.blue_print_settings.back_y_placement is not None:
                 blueprint_layer.paste(blueprint,
                                       (
@@ -551,27 +583,14 @@ class Generator:
                                       blueprint_layer,
                                       wrap_over=[[255, 255, 255, 0], [0, 0, 0, 0]],
                                       margin=0)
-            blueprint_layer = text_wrap.wrap_around(self.unit.back_text, start_coord=Coordinates.BACK_TEXT)
-
-        populate_header()
-        populate_text_area()
-        base = numpy.array(card_back)
-        base = base.astype(float)
-        blueprint_layer = numpy.array(blueprint_layer)
-        blueprint_layer = blueprint_layer.astype(float)
-        base = screen(base, blueprint_layer, 1.0)
-        base = numpy.uint8(base)
-        base = Image.fromarray(base)
-        base = Image.alpha_composite(base, transparent_overlay)
-        if display:
-            base.show()
-        if output_folder is not None:
-            card_path = (os.path.join(output_folder, "cards", self.nation.name))
-        else:
-            card_path = (os.path.join(os.getcwd(), "cards", self.nation.name))
-        try:
-            base.save("{}/{}-back.png".format(card_path, self.unit.name).replace("\"", ";"))
-            logger.debug("saved to {}".format(card_path))
-        except FileNotFoundError:
-            os.makedirs(card_path, exist_ok=True)
-            base.save("{}/{}-back.png".format(card_path, self.unit.name).replace("\"", ";"))
\ No newline at end of file
+            with stage("back.wrap_around"):
+                blueprint_layer = text_wrap.wrap_around(self.unit.back_text, start_coord=Coordinates.BACK_TEXT)
+
+        with stage("back.populate_header"):
+            populate_header()
+        with stage("back.populate_text_area"):
+            populate_text_area()
+        with stage("back.screen_blend"):
+            base = screen_blend(card_back, blueprint_layer)
+        with stage("back.composite"):
+            return alpha_composite_region(base, transparent_overlay)
@@ -0,0 +1,361 @@
+"""
+Benchmarks of the stages of the rendering and printing pipeline, run against a few representative units. Results are
+written as JSON and are compared against the reference results committed with the repository, or the results of an
+earlier run, to tell whether a change made things faster.
+
+    python card_generator/benchmark.py
+    python card_generator/benchmark.py -o benchmark.json
+    python card_generator/benchmark.py --baseline benchmark.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable
+
+import PIL
+
+from card_generator import Generator, _plan_ship_silhouette, _plan_plane_silhouette, _plan_back_blueprint
+from card_generator.models.assets import get_war_at_sea_json, Background
+from card_generator.models.nation import Nation
+from card_generator.models.unit import Unit, UnitType
+from card_generator.models.utils import load_json
+from card_generator.utils.encoding import OutputProfile, PROFILES, DEFAULT_PROFILE, get_profile
+from card_generator.utils.printing import PrintFormatter, PageFormat, CardFormat
+from card_generator.utils.profiling import StageTimes, recording
+
+logger = logging.getLogger(__name__)
+
+#: version of the results format, results of a different version are not compared.
+RESULTS_VERSION = 1
+
+#: reference results compared against by default, update them with -o when the benchmarks or the reference machine
+#: change.
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "benchmarks",
+                                "baseline.json")
+
+#: units benchmarked by default: a battleship with many abilities, a plane and a submarine.
+DEFAULT_UNITS = [
+    ("United States", "USS Missouri (BB 63)"),
+    ("United States", "F6F-3 Hellcat"),
+    ("United States", "USS Cod (SS 224)")
+]
+
+
+class BenchmarkResult:
+
+    def __init__(self, name: str, samples: list):
+        """
+        Timings of a single benchmark.
+        :param name: name of the benchmark.
+        :param samples: time taken by each repetition, in seconds.
+        """
+        self.name = name
+        self.samples = samples
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    def to_dict(self) -> dict:
+        return {
+            "median": self.median,
+            "mean": statistics.mean(self.samples),
+            "min": min(self.samples),
+            "max": max(self.samples),
+            "stdev": statistics.stdev(self.samples) if len(self.samples) > 1 else 0.0,
+            "samples": self.samples
+        }
+
+    def __str__(self):
+        return "{:<60} {:>10.2f} ms (min {:.2f} ms, {} runs)".format(self.name, 1000 * self.median,
+                                                                     1000 * min(self.samples), len(self.samples))
+
+
+class Comparison:
+
+    def __init__(self, name: str, baseline: float, current: float, threshold: float):
+        """
+        A benchmark's median compared against the baseline's.
+        :param name: name of the benchmark.
+        :param baseline: median of the baseline in seconds.
+        :param current: median of the current run in seconds.
+        :param threshold: relative change below which the difference is considered noise, e.g. 0.1 for 10%.
+        """
+        self.name = name
+        self.baseline = baseline
+        self.current = current
+        self.threshold = threshold
+
+    @property
+    def change(self) -> float:
+        """
+        Relative change from the baseline, negative when the current run is faster.
+        """
+        if self.baseline == 0:
+            return 0.0
+        return self.current / self.baseline - 1
+
+    @property
+    def regressed(self) -> bool:
+        return self.change > self.threshold
+
+    @property
+    def improved(self) -> bool:
+        return self.change < -self.threshold
+
+    def __str__(self):
+        verdict = "slower" if self.regressed else "faster" if self.improved else ""
+        return "{:<60} {:>10.2f} ms -> {:>10.2f} ms {:>+7.1%} {}".format(
+            self.name, 1000 * self.baseline, 1000 * self.current, self.change, verdict).rstrip()
+
+
+def measure(name: str, func: Callable, warmup: int = 1, repeat: int = 5, setup: Callable = None) -> BenchmarkResult:
+    """
+    Times a function, discarding the warmup runs.
+    :param name: name of the benchmark.
+    :param func: function to time.
+    :keyword warmup: number of untimed runs before the timed runs.
+    :keyword repeat: number of timed runs.
+    :keyword setup: function called before every run, outside of the timing.
+    :return: the timings of the timed runs.
+    """
+    samples = list()
+    for run in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if run >= warmup:
+            samples.append(elapsed)
+    logger.debug("{}: {}".format(name, samples))
+    return BenchmarkResult(name, samples)
+
+
+def measure_stages(prefix: str, func: Callable, warmup: int = 1, repeat: int = 5) -> list:
+    """
+    Times the stages marked within a function, discarding the warmup runs. Stages are timed separately, so a stage
+    nested within another is included in the timings of both.
+    :param prefix: prefix of the benchmark names, followed by the name of the stage.
+    :param func: function to run.
+    :keyword warmup: number of untimed runs before the timed runs.
+    :keyword repeat: number of timed runs.
+    :return: the timings of each stage, one sample per run with a stage run more than once per run being summed.
+    """
+    for _ in range(warmup):
+        func()
+    totals = dict()
+    for run in range(repeat):
+        times = StageTimes()
+        with recording(times):
+            func()
+        for name, samples in times.samples.items():
+            totals.setdefault(name, [0.0] * repeat)[run] = sum(samples)
+    return [BenchmarkResult("{}.{}".format(prefix, name), samples) for name, samples in sorted(totals.items())]
+
+
+def _unit_images(nation: Nation, unit: Unit) -> Callable:
+    """
+    Gets a function loading the silhouette and blueprints of a unit the way the generator does.
+    """
+    if unit.ship_class is not None:
+        unit_type, name, plan = UnitType.SHIP, unit.ship_class.lower(), _plan_ship_silhouette
+    else:
+        unit_type, name, plan = UnitType.PLANE, unit.name.lower(), _plan_plane_silhouette
+    blueprint = unit.blue_print_settings.file_name if unit.blue_print_settings.file_name is not None else name
+
+    def load():
+        Background.get_silhouette(unit_type, nation.name, name, plan=plan)
+        Background.get_blueprint(unit_type, nation.name, blueprint, plan=_plan_back_blueprint)
+    return load
+
+
+def _load_templates() -> None:
+    for template in (Background.ALLIES_BASE, Background.AXIS_BASE):
+        Background.get_front_template(template)
+    for template in (Background.ALLIES_BACK, Background.AXIS_BACK):
+        Background.get_template(template)
+
+
+def _load_data() -> list:
+    with get_war_at_sea_json() as data_file:
+        return load_json(json.load(data_file))
+
+
+def find_units(nations: list, wanted: list) -> list:
+    """
+    Finds the units to benchmark, skipping those that do not exist or cannot be rendered, e.g. because their assets
+    have not been created yet.
+    :param nations: loaded nations.
+    :param wanted: list of (nation name, unit name) tuples.
+    :return: list of (nation, unit) tuples.
+    """
+    units = {(nation.name, unit.name): (nation, unit) for nation in nations for unit in nation.get_units()}
+    found = list()
+    for key in wanted:
+        if key not in units:
+            logger.warning("\"{}\" unit does not exist for \"{}\", skipping it".format(key[1], key[0]))
+            continue
+        nation, unit = units[key]
+        try:
+            Generator(nation, unit).render_front()
+            Generator(nation, unit).render_back()
+        except Exception as e:
+            logger.warning("Skipping {}/{}, it cannot be rendered: {}: {}".format(key[0], key[1], type(e).__name__, e))
+            continue
+        found.append((nation, unit))
+    return found
+
+
+def run(units: list = None, warmup: int = 1, repeat: int = 5, profile: OutputProfile = DEFAULT_PROFILE) -> dict:
+    """
+    Runs the benchmarks.
+    :keyword units: list of (nation name, unit name) tuples to benchmark, defaults to DEFAULT_UNITS.
+    :keyword warmup: number of untimed runs before the timed runs of each benchmark.
+    :keyword repeat: number of timed runs of each benchmark.
+    :keyword profile: output profile to benchmark saving with.
+    :return: the results, ready to be written as JSON.
+    """
+    results = list()
+
+    def add(result: BenchmarkResult) -> None:
+        logger.info(result)
+        results.append(result)
+
+    add(measure("load_json", _load_data, warmup, repeat))
+    add(measure("assets.templates", _load_templates, warmup, repeat, setup=Background.clear_templates))
+    _load_templates()
+    # silhouettes and blueprints are always resized from their source images
+    resize_cache = Background.resize_cache
+    Background.set_resize_cache(None)
+    try:
+        work = find_units(_load_data(), units if units is not None else DEFAULT_UNITS)
+        for nation, unit in work:
+            name = "{}/{}".format(nation.name, unit.name)
+            add(measure("assets.unit_images[{}]".format(name), _unit_images(nation, unit), warmup, repeat))
+            generator = Generator(nation, unit, profile)
+            for result in measure_stages("render[{}]".format(name), generator.render_front, warmup, repeat):
+                add(result)
+            for result in measure_stages("render[{}]".format(name), generator.render_back, warmup, repeat):
+                add(result)
+
+        with tempfile.TemporaryDirectory() as folder:
+            for nation, unit in work:
+                name = "{}/{}".format(nation.name, unit.name)
+                generator = Generator(nation, unit, profile)
+                card = generator.render_front()
+                path = generator.get_card_path(folder)
+                add(measure("save.{}[{}]".format(profile, name), lambda: profile.save(card, path), warmup, repeat))
+                generator.generate_back(output_folder=folder)
+            if len(work) > 0:
+                card_folder = os.path.join(folder, "cards", work[0][0].name)
+                page_folder = os.path.join(folder, "pages")
+                os.makedirs(page_folder)
+                add(measure("print_layout[{}]".format(work[0][0].name),
+                            lambda: PrintFormatter.generate_print_layout(PageFormat.LETTER, CardFormat.STANDARD,
+                                                                         card_folder, page_folder, profile=profile),
+                            warmup, repeat))
+    finally:
+        Background.set_resize_cache(resize_cache)
+
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "machine": platform.machine(),
+        "warmup": warmup,
+        "repeat": repeat,
+        "profile": profile.name,
+        "units": ["{}/{}".format(nation.name, unit.name) for nation, unit in work],
+        "results": {result.name: result.to_dict() for result in results}
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list:
+    """
+    Compares the medians of the benchmarks that appear in both results.
+    :param baseline: results to compare against.
+    :param current: results of the current run.
+    :keyword threshold: relative change below which a difference is considered noise, defaults to 10%.
+    :return: list of Comparisons, in the order of the current results.
+    :raises ValueError: if the results were written in a different format.
+    """
+    if baseline.get("version") != current.get("version"):
+        raise ValueError("Baseline results are version {}, expected version {}".format(baseline.get("version"),
+                                                                                      current.get("version")))
+    return [Comparison(name, baseline["results"][name]["median"], result["median"], threshold)
+            for name, result in current["results"].items() if name in baseline["results"]]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog="War at Sea Card Benchmarks",
+                                     description="Time the stages of rendering and printing cards.")
+    parser.add_argument("-l", "--log-level", required=False, default="INFO", help="Sets the logging level, defaults to"
+                                                                                  " INFO.")
+    parser.add_argument("-u", "--unit", action="append", default=None, metavar="NATION/UNIT",
+                        help="Unit to benchmark, may be repeated. Defaults to {}.".format(
+                            ", ".join("/".join(unit) for unit in DEFAULT_UNITS)))
+    parser.add_argument("-w", "--warmup", default=1, type=int,
+                        help="Number of untimed runs before the timed runs of each benchmark, defaults to 1.")
+    parser.add_argument("-r", "--repeat", default=5, type=int,
+                        help="Number of timed runs of each benchmark, defaults to 5.")
+    parser.add_argument("--encoder", default=DEFAULT_PROFILE.name, choices=list(PROFILES),
+                        help="Output encoder to benchmark saving with, defaults to {}.".format(DEFAULT_PROFILE.name))
+    parser.add_argument("-o", "--output", required=False, default=None,
+                        help="File to write the results to as JSON.")
+    parser.add_argument("-b", "--baseline", required=False, default=DEFAULT_BASELINE,
+                        help="Results of an earlier run to compare against, defaults to the reference results in "
+                             "tests/benchmarks/baseline.json.")
+    parser.add_argument("--no-baseline", dest="baseline", action="store_const", const=None,
+                        help="Do not compare against any results.")
+    parser.add_argument("-t", "--threshold", default=10.0, type=float,
+                        help="Change in percent below which a difference from the baseline is considered noise, "
+                             "defaults to 10.")
+    parser.add_argument("--fail-on-regression", action="store_true", default=False,
+                        help="Exit with an error if any benchmark is slower than the baseline.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.getLevelName(args.log_level))
+    logging.getLogger("PIL").propagate = False
+    # the generator logs every card it renders
+    logging.getLogger("card_generator").setLevel(max(logging.WARNING, logging.getLevelName(args.log_level)))
+    if args.repeat < 1 or args.warmup < 0:
+        parser.error("--repeat must be at least 1 and --warmup at least 0")
+    try:
+        profile = get_profile(args.encoder)
+    except ValueError as e:
+        parser.error(str(e))
+    wanted = None
+    if args.unit is not None:
+        wanted = list()
+        for unit in args.unit:
+            if "/" not in unit:
+                parser.error("Expected --unit as NATION/UNIT, got \"{}\"".format(unit))
+            wanted.append(tuple(unit.split("/", 1)))
+
+    results = run(wanted, args.warmup, args.repeat, profile)
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+        logger.info("Results written to {}".format(args.output))
+    if args.baseline == DEFAULT_BASELINE and not os.path.exists(DEFAULT_BASELINE):
+        # the reference results are not installed with the package
+        logger.warning("No reference results found at {}, skipping the comparison".format(DEFAULT_BASELINE))
+    elif args.baseline is not None:
+        logger.info("Comparing against {}".format(args.baseline))
+        with open(args.baseline, "r") as baseline_file:
+            comparisons = compare(json.load(baseline_file), results, args.threshold / 100)
+        for comparison in comparisons:
+            print(comparison)
+        regressions = [comparison for comparison in comparisons if comparison.regressed]
+        improvements = [comparison for comparison in comparisons if comparison.improved]
+        print("{} faster, {} slower, {} unchanged".format(len(improvements), len(regressions),
+                                                          len(comparisons) - len(improvements) - len(regressions)))
+        if args.fail_on_regression and len(regressions) > 0:
+            sys.exit(1)
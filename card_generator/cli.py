@@ -1,73 +1,191 @@
-import json
 import argparse
 import logging
+import os
 
 from card_generator import Generator
-from card_generator.models.assets import get_war_at_sea_json
-from card_generator.models.utils import load_json
-from card_generator.utils.printing import PrintFormatter, PageFormat, CardFormat
+from card_generator.models.assets import Background
+from card_generator.models.dataset import Dataset
+from card_generator.models.stat_names import ATTACKS, RANGES, STATS, CODED_STATS
+from card_generator.utils.encoding import OutputProfile, get_profile, DEFAULT_PROFILE, PROFILES
+from card_generator.utils.image.ResizeCache import ResizeCache
+from card_generator.utils.profiling import Trace, set_recorder, card
 
 logger = logging.getLogger(__name__)
 
+#: help of the --encoder options, formatted with what is being encoded.
+ENCODER_HELP = "Output profile to encode the {} with: png (Pillow defaults), fast-png, small-png, webp (lossless) or " \
+               "jpeg. Defaults to png."
 
-def generate_all(output_folder: str = None):
+
+def _report_failures(results: list):
+    """
+    Exits with an error if any of the rendered cards failed.
+    :param results: results returned from render_units.
+    """
+    failures = [result for result in results if result.failed]
+    if len(failures) > 0:
+        logger.error("{} of {} units failed to generate".format(len(failures), len(results)))
+        exit(1)
+
+
+def _get_profile(name: str) -> OutputProfile:
+    """
+    Looks up the output profile selected on the command line, exiting if it cannot be used.
+    :param name: name of the profile.
+    :return: the profile.
+    """
+    try:
+        return get_profile(name)
+    except ValueError as e:
+        logger.error(e)
+        exit(1)
+
+
+def _render(work: list, data: list, output_folder: str = None, full: bool = False, jobs: int = 1,
+            incremental: bool = False, profile: OutputProfile = DEFAULT_PROFILE, write_queue_depth: int = 4,
+            prune: bool = True) -> list:
+    """
+    Renders a list of units, skipping the units whose cards are up-to-date when building incrementally.
+    :param work: list of (nation, unit) tuples to render.
+    :param data: records of the nations the units were loaded from, as they appear in the War at Sea JSON.
+    :param output_folder: folder to dump the cards to, defaults to the current directory.
+    :param full: whether to generate both the front and backs of the cards.
+    :param jobs: number of processes to render with.
+    :param incremental: whether to only render the cards whose inputs changed since the last build.
+    :param profile: output profile to write the cards with.
+    :param write_queue_depth: number of cards each process may have waiting to be encoded and written in the
+                              background, 0 writes each card before rendering the next.
+    :param prune: whether work holds every unit of its nations, so that the cards of the units missing from it are
+                  dropped from the manifest.
+    :return: the results of the units that were rendered.
+    """
+    # the modules only used by some of the commands are imported by the commands, keeping startup fast
+    from card_generator.utils.manifest import BuildManifest, get_card_inputs, get_unit_records
+    from card_generator.utils.parallel import render_units
+    if not incremental:
+        return render_units(work, output_folder=output_folder, full=full, jobs=jobs, profile=profile,
+                            queue_depth=write_queue_depth)
+    manifest = BuildManifest.load(os.path.join(output_folder or os.getcwd(), BuildManifest.CARDS_FILE_NAME))
+    records = get_unit_records(data)
+    pending = list()
+    for nation, unit in work:
+        generator = Generator(nation, unit, profile)
+        outputs = [generator.get_card_path(output_folder)]
+        if full:
+            outputs.append(generator.get_card_path(output_folder, back=True))
+        inputs = get_card_inputs(nation, unit, records[(nation.name, unit.name)])
+        inputs["encoder"] = profile.name
+        if not manifest.is_current("{}/{}".format(nation.name, unit.name), inputs, outputs):
+            pending.append((nation, unit, inputs, outputs))
+    # drop the cards of units that no longer exist in the nations being built
+    nations = set(nation.name for nation, _ in work)
+    keys = set("{}/{}".format(nation.name, unit.name) for nation, unit in work)
+    for key in manifest.keys() if prune else list():
+        if key.split("/")[0] in nations and key not in keys:
+            manifest.remove(key)
+    logger.info("{} of {} units changed since the last build".format(len(pending), len(work)))
+    results = render_units([(nation, unit) for nation, unit, _, _ in pending],
+                           output_folder=output_folder, full=full, jobs=jobs, profile=profile,
+                           queue_depth=write_queue_depth)
+    for (nation, unit, inputs, outputs), result in zip(pending, results):
+        if not result.failed:
+            manifest.record("{}/{}".format(nation.name, unit.name), inputs, outputs)
+    manifest.save()
+    return results
+
+
+def _build(dataset: Dataset, nations: list, output_folder: str = None, full: bool = False, jobs: int = 1,
+           incremental: bool = False, encoder: str = "png", write_queue_depth: int = 4, where: str = None):
+    """
+    Plans the build of a list of nations and renders it in a single session, exiting if a nation does not exist or the
+    query is invalid.
+    :param dataset: the data set.
+    :param nations: names of the nations to build, in the order to build them.
+    :param output_folder: folder to dump the cards to, defaults to the current directory.
+    :param full: whether to generate both the front and backs of the cards.
+    :param jobs: number of processes to render with, 0 uses every available core.
+    :param incremental: only render the cards whose inputs changed since the last build.
+    :param encoder: name of the output profile to write the cards with.
+    :param write_queue_depth: number of cards each process may have waiting to be encoded and written in the
+                              background, 0 writes each card before rendering the next.
+    :param where: only generate the units matching this query over their stats.
+    """
+    profile = _get_profile(encoder)
+    try:
+        work = dataset.plan(nations, where)
+    except ValueError as e:
+        logger.error(e)
+        exit(1)
+    if where is not None:
+        logger.info("{} units match {}".format(len(work), where))
+    records = [dataset.get_record(nation) for nation in dict.fromkeys(nations)]
+    _report_failures(_render(work, records, output_folder, full, jobs, incremental, profile, write_queue_depth,
+                             prune=where is None))
+
+
+def generate_all(output_folder: str = None, full: bool = False, jobs: int = 1, incremental: bool = False,
+                 encoder: str = "png", write_queue_depth: int = 4, where: str = None):
     """
     Generates all units that are present in the included War at Sea data file.
     :param output_folder: folder to dump the cards to, defaults to the current directory.
+    :param full: whether to generate both the front and backs of the cards, defaults to false which generates only the
+                 front.
+    :param jobs: number of processes to render with, 0 uses every available core. Defaults to 1.
+    :param incremental: only render the cards whose inputs changed since the last build. Defaults to false.
+    :param encoder: name of the output profile to write the cards with. Defaults to png.
+    :param write_queue_depth: number of cards each process may have waiting to be encoded and written in the
+                              background, 0 writes each card before rendering the next. Defaults to 4.
+    :param where: only generate the units matching this query over their stats, e.g.
+                  'set == "Task Force" and points < 20'. Defaults to every unit.
     """
-    data_file = get_war_at_sea_json()
-    data = json.load(data_file)
-    axis_and_allies_deck = load_json(data)
-    for nation in axis_and_allies_deck:
-        for unit in nation.get_units():
-            Generator(nation, unit).generate_front(output_folder=output_folder)
-    data_file.close()
+    dataset = Dataset.load()
+    _build(dataset, dataset.get_nation_names(), output_folder, full, jobs, incremental, encoder, write_queue_depth,
+           where)
 
 
-def generate_country(country: str, output_folder: str = None, full: bool = False):
+def generate_country(country: str, output_folder: str = None, full: bool = False, jobs: int = 1,
+                     incremental: bool = False, encoder: str = "png", write_queue_depth: int = 4, where: str = None):
     """
     Generates all units for a given country.
     :param country: name of the nation to generate units for.
     :param output_folder: folder to dump the cards to, defaults to the current directory.
     :param full: whether to generate both the front and backs of the cards, defaults to false which generates only the
                  front.
+    :param jobs: number of processes to render with, 0 uses every available core. Defaults to 1.
+    :param incremental: only render the cards whose inputs changed since the last build. Defaults to false.
+    :param encoder: name of the output profile to write the cards with. Defaults to png.
+    :param write_queue_depth: number of cards each process may have waiting to be encoded and written in the
+                              background, 0 writes each card before rendering the next. Defaults to 4.
+    :param where: only generate the units matching this query over their stats, e.g.
+                  'set == "Task Force" and points < 20'. Defaults to every unit.
     """
-    data_file = get_war_at_sea_json()
-    data = json.load(data_file)
-    axis_and_allies_deck = load_json(data)
-    try:
-        index = 0
-        for candidate_country in axis_and_allies_deck:
-            if candidate_country.name == country:
-                break
-            else:
-                index += 1
-        if index == len(axis_and_allies_deck):
-            raise ValueError("\"{}\" does not exist in the default countries".format(country))
-        for unit in axis_and_allies_deck[index].get_units():
-            generator = Generator(axis_and_allies_deck[index], unit)
-            if full:
-                generator.generate_back(output_folder=output_folder)
-            generator.generate_front(output_folder=output_folder)
-    except ValueError as e:
-        logger.error(e)
+    _build(Dataset.load(), [country], output_folder, full, jobs, incremental, encoder, write_queue_depth, where)
 
 
-def generate_from_countries_file(file: str, output_folder: str = None, full: bool = False):
+def generate_from_countries_file(file: str, output_folder: str = None, full: bool = False, jobs: int = 1,
+                                 incremental: bool = False, encoder: str = "png", write_queue_depth: int = 4,
+                                 where: str = None):
     """
-    Generates units for countries listed in a new line delimited text file.
+    Generates units for countries listed in a new line delimited text file. The data set is loaded once and every
+    country is rendered in a single session, after checking that all of them exist.
     :param file: files containing countries to generate for.
     :param output_folder: folder to dump the cards to, defaults to the current directory.
     :param full: whether to generate both the front and backs of the cards, defaults to false which generates only the
                  front.
+    :param jobs: number of processes to render with, 0 uses every available core. Defaults to 1.
+    :param incremental: only render the cards whose inputs changed since the last build. Defaults to false.
+    :param encoder: name of the output profile to write the cards with. Defaults to png.
+    :param write_queue_depth: number of cards each process may have waiting to be encoded and written in the
+                              background, 0 writes each card before rendering the next. Defaults to 4.
+    :param where: only generate the units matching this query over their stats, e.g.
+                  'set == "Task Force" and points < 20'. Defaults to every unit.
     """
-    countries_file = open(file, "r")
-    for country in countries_file:
-        generate_country(country.strip(), output_folder, full)
-    countries_file.close()
+    with open(file, "r") as countries_file:
+        countries = [country.strip() for country in countries_file if country.strip() != ""]
+    _build(Dataset.load(), countries, output_folder, full, jobs, incremental, encoder, write_queue_depth, where)
 
 
-def generate_single(country: str, unit: str, output_folder: str = None, full: bool = False):
+def generate_single(country: str, unit: str, output_folder: str = None, full: bool = False, encoder: str = "png"):
     """
     Generates a single card for a single unit.
     :param country: name of country of the unit
@@ -75,34 +193,19 @@ def generate_single(country: str, unit: str, output_folder: str = None, full: bo
     :param output_folder: output folder, defaults to the current directory.
     :param full: whether to generate both the front and backs of the cards, defaults to false which generates only the
                  front.
+    :param encoder: name of the output profile to write the cards with. Defaults to png.
     """
-    data_file = get_war_at_sea_json()
-    data = json.load(data_file)
-    axis_and_allies_deck = load_json(data)
-
-    country_index = 0
-    unit_index = 0
-    for candidate_country in axis_and_allies_deck:
-        if candidate_country.name == country:
-            for candidate_unit in candidate_country.get_units():
-                if candidate_unit.name == unit:
-                    break
-                else:
-                    unit_index += 1
-            break
-        else:
-            country_index += 1
-    if country_index == len(axis_and_allies_deck) or \
-            unit_index == len(axis_and_allies_deck[country_index].get_units()):
+    profile = _get_profile(encoder)
+    dataset = Dataset.load()
+    try:
+        generator = Generator(dataset.get_nation(country), dataset.get_unit(country, unit), profile)
+    except ValueError:
         logger.error("\"{}\" unit does not exist in for \"{}\"".format(unit, country))
         exit(1)
-
-    generator = Generator(axis_and_allies_deck[country_index],
-                          axis_and_allies_deck[country_index].get_units()[unit_index])
-    if full:
-        generator.generate_back(display=True, output_folder=output_folder)
-    generator.generate_front(display=True, output_folder=output_folder)
-    data_file.close()
+    with card("{}/{}".format(country, unit)):
+        if full:
+            generator.generate_back(display=True, output_folder=output_folder)
+        generator.generate_front(display=True, output_folder=output_folder)
 
 
 def generate_print_sheet(cards_folder: str,
@@ -110,19 +213,79 @@ def generate_print_sheet(cards_folder: str,
                          ppi: int = 300,
                          spacing: int = 0,
                          card_format: str = "STANDARD",
-                         page_format: str = "LETTER"):
+                         page_format: str = "LETTER",
+                         incremental: bool = False,
+                         encoder: str = "png",
+                         jobs: int = 1,
+                         pdf: bool = False,
+                         manifest: str = None):
+    """
+    Generates printable sheets from a folder of cards.
+    :param cards_folder: folder containing the cards to print.
+    :param output_folder: folder to write the sheets to, defaults to the current directory.
+    :param ppi: pixels per inch of the sheets.
+    :param spacing: spacing between the cards in inches.
+    :param card_format: name of the card format.
+    :param page_format: name of the page format.
+    :param incremental: skip generating the sheets if neither the cards nor the settings changed since the sheets were
+                        last generated. Defaults to false.
+    :param encoder: name of the output profile to write the sheets with. Defaults to png.
+    :param jobs: number of threads building pages, 0 uses every available core. Defaults to 1.
+    :param pdf: write the sheets to a single duplex PDF named after the cards folder instead of a file per page.
+                Defaults to false.
+    :param manifest: manifest recording the sheets of incremental builds, shared by every output folder. Defaults to
+                     sheets-manifest.json in the current directory, outside of the sheets that are shipped.
+    """
+    from card_generator.utils.manifest import BuildManifest, generator_version, hash_file
+    from card_generator.utils.printing import PrintFormatter, PageFormat, CardFormat
+    from card_generator.utils.printing.pdf import supports
+    profile = _get_profile(encoder)
+    if pdf and not supports(profile):
+        logger.error(f"Sheets encoded with the {profile} profile cannot be written to a PDF, use a png or jpeg profile")
+        exit(1)
     try:
         card_format = CardFormat[card_format]
         page_format = PageFormat[page_format]
     except Exception as e:
         logger.error(f"The supplied format is not accepted at this time: {e}")
         exit(1)
-    PrintFormatter.generate_print_layout(page_format,
-                                         card_format,
-                                         cards_folder,
-                                         output_folder,
-                                         ppi=ppi,
-                                         spacing=spacing)
+    if incremental:
+        manifest = BuildManifest.load(manifest or BuildManifest.SHEETS_FILE_NAME)
+        # the sheets of each output folder are recorded separately
+        key = os.path.relpath(os.path.abspath(output_folder), manifest.folder).replace(os.sep, "/")
+        inputs = {"generator": generator_version(), "ppi": str(ppi), "spacing": str(spacing),
+                  "card_format": card_format.name, "page_format": page_format.name, "encoder": profile.name,
+                  "pdf": str(pdf)}
+        for card in sorted(os.listdir(cards_folder)):
+            inputs[card] = hash_file(os.path.join(cards_folder, card))
+        if manifest.is_current(key, inputs):
+            logger.info(f"Print sheets for {cards_folder} are up-to-date")
+            return
+    pdf_path = None
+    if pdf:
+        pdf_path = os.path.join(output_folder, os.path.basename(os.path.normpath(cards_folder)) + ".pdf")
+    pages = PrintFormatter.generate_print_layout(page_format,
+                                                 card_format,
+                                                 cards_folder,
+                                                 output_folder,
+                                                 ppi=ppi,
+                                                 spacing=spacing,
+                                                 profile=profile,
+                                                 jobs=jobs,
+                                                 pdf=pdf_path)
+    if incremental:
+        manifest.record(key, inputs, pages)
+        manifest.save()
+
+
+def _where_help() -> str:
+    """
+    Gets the help of the --where options, listing the stats a query can compare.
+    :return: the help text.
+    """
+    return "Only generate the units matching a query over their stats, e.g. 'set == \"Task Force\" and points < 20'. " \
+           "Compares {} and the attacks at range 0 ({}) or at another range up to {}, e.g. torpedo[2], combined " \
+           "with and, or and not.".format(", ".join(STATS + CODED_STATS), ", ".join(ATTACKS), RANGES - 1)
 
 
 if __name__ == '__main__':
@@ -141,66 +304,84 @@ if __name__ == '__main__':
                                      )
     parser.add_argument("-l", "--log-level", required=False, default="INFO", help="Sets the logging level, defaults to"
                                                                                   " INFO.")
+    parser.add_argument("--cache-dir", required=False, default=None,
+                        help="Directory to cache resized silhouettes and blueprints, along with a compiled copy of "
+                             "the data set, in between runs. Caching is disabled by default.")
+    parser.add_argument("--cache-size", required=False, default=256, type=int,
+                        help="Maximum size of the silhouette cache in megabytes, defaults to 256.")
+    parser.add_argument("--profile", required=False, default=None, metavar="TRACE_FILE",
+                        help="Records the time spent in each stage of every card, along with counters such as font "
+                             "fitting iterations and asset cache hits, and writes them to TRACE_FILE in the Chrome "
+                             "trace event format (open it in chrome://tracing or Perfetto). A summary of the slowest "
+                             "cards is logged at the end of the run. Disabled by default.")
+    parser.add_argument("--profile-top", required=False, default=10, type=int,
+                        help="Number of cards listed in the profiling summary, defaults to 10.")
     subparsers = parser.add_subparsers(title="Available Commands", dest="command", metavar="command [options ...]")
+    # -------------------------------------  Shared Options -------------------------------------
+    # options of every command generating cards
+    card_options = argparse.ArgumentParser(add_help=False)
+    card_options.add_argument("-o", "--output-folder",
+                              help="Location to output the generated cards to, defaults to the current directory.")
+    card_options.add_argument("--full",
+                              help="Generates the front and back of the cards. By default only the front is generated.",
+                              default=False,
+                              action="store_true")
+    card_options.add_argument("--encoder",
+                              help=ENCODER_HELP.format("cards"),
+                              choices=list(PROFILES),
+                              default="png")
+    # options of the commands generating many cards at once
+    build_options = argparse.ArgumentParser(add_help=False, parents=[card_options])
+    build_options.add_argument("-j", "--jobs",
+                               help="Number of processes to render cards with, 0 uses every available core. "
+                                    "Defaults to 1.",
+                               default=1,
+                               type=int)
+    build_options.add_argument("--incremental",
+                               help="Only generate the cards whose unit data, assets or generator changed since the "
+                                    "last build.",
+                               default=False,
+                               action="store_true")
+    build_options.add_argument("--write-queue-depth",
+                               help="Number of rendered cards each process may have waiting to be encoded and written "
+                                    "in the background while it renders the next one, 0 writes each card before "
+                                    "rendering the next. Defaults to 4.",
+                               default=4,
+                               type=int)
+    build_options.add_argument("--where",
+                               help=_where_help(),
+                               default=None)
     # ---------------------------------------  Generate All -------------------------------------
     generate_all_command = subparsers.add_parser("generate_all",
+                                                 parents=[build_options],
                                                  help="Generates the entire deck as defined by the "
                                                       "War at Sea data set.")
     generate_all_command.description = "Generate all units for all countries in the included War at Sea data set."
-    generate_all_command.add_argument("-o", "--output-folder",
-                                      help="Location to output the generated cards to, defaults to the current "
-                                           "directory.")
-    generate_all_command.add_argument("--full",
-                                      help="Generates the front and back of the cards. By default only the front is"
-                                           " generated.",
-                                      default=False,
-                                      action="store_true")
     # -------------------------------------  Generate Country ------------------------------------
     generate_country_command = subparsers.add_parser("generate_country",
+                                                     parents=[build_options],
                                                      help="Generates all units for a specified country")
     generate_country_command.description = "Generate all units for a specific country"
     generate_country_command.add_argument("-c", "--country", required=True,
                                           help="name of the country to generate units for")
-    generate_country_command.add_argument("-o", "--output-folder",
-                                          help="Location to output the generated cards to, defaults to the current "
-                                               "directory.")
-    generate_country_command.add_argument("--full",
-                                          help="Generates the front and back of the cards. By default only the front is"
-                                               " generated.",
-                                          default=False,
-                                          action="store_true")
     # ---------------------------------  Generate From Countries File -----------------------------
     generate_from_file_command = subparsers.add_parser("generate_from_countries_file",
+                                                       parents=[build_options],
                                                        help="Generates all units for all countries"
                                                             " specified in a text file.")
     generate_from_file_command.description = "Generate all units for all countries specified in a new line delimited" \
                                              " text file."
     generate_from_file_command.add_argument("-f", "--file", required=True,
                                             help="countries file")
-    generate_from_file_command.add_argument("-o", "--output-folder",
-                                            help="Location to output the generated cards to, defaults to the current "
-                                                 "directory.")
-    generate_from_file_command.add_argument("--full",
-                                            help="Generates the front and back of the cards. By default only the "
-                                                 "front is generated.",
-                                            default=False,
-                                            action="store_true")
     # --------------------------------------  Generate Single -------------------------------------
     generate_single_command = subparsers.add_parser("generate_single",
+                                                    parents=[card_options],
                                                     help="Generate a single card for a single unit")
     generate_single_command.description = "Generate a single card for a single unit"
     generate_single_command.add_argument("-c", "--country", required=True,
                                          help="name of the country to generate units for")
     generate_single_command.add_argument("-u", "--unit", required=True,
                                          help="unit to generate")
-    generate_single_command.add_argument("-o", "--output-folder",
-                                         help="Location to output the generated cards to, defaults to the current "
-                                              "directory.")
-    generate_single_command.add_argument("--full",
-                                         help="Generates the front and back of the cards. By default only the front is"
-                                              " generated.",
-                                         default=False,
-                                         action="store_true")
 
     # -----------------------------------  Generate Print Sheet ----------------------------------
     generate_printable_sheet_command = subparsers.add_parser("generate_print_sheet",
@@ -228,6 +409,31 @@ if __name__ == '__main__':
                                                   default="LETTER",
                                                   help="The page format for printing. Defaults to LETTER. Other "
                                                        "accepted values are A4 and LEGAL.")
+    generate_printable_sheet_command.add_argument("--incremental",
+                                                  help="Skip generating the sheets if the cards and settings have not "
+                                                       "changed since they were last generated.",
+                                                  default=False,
+                                                  action="store_true")
+    generate_printable_sheet_command.add_argument("--encoder",
+                                                  help=ENCODER_HELP.format("sheets"),
+                                                  choices=list(PROFILES),
+                                                  default="png")
+    generate_printable_sheet_command.add_argument("-j", "--jobs",
+                                                  help="Number of threads building pages, 0 uses every available "
+                                                       "core. Defaults to 1.",
+                                                  default=1,
+                                                  type=int)
+    generate_printable_sheet_command.add_argument("--pdf",
+                                                  help="Write the sheets to a single PDF named after the cards folder, "
+                                                       "with the back of each page following its front for duplex "
+                                                       "printing. Needs a png or jpeg encoder.",
+                                                  default=False,
+                                                  action="store_true")
+    generate_printable_sheet_command.add_argument("--manifest",
+                                                  help="File recording the sheets of incremental builds, shared by "
+                                                       "every output folder. Defaults to sheets-manifest.json in the "
+                                                       "current directory.",
+                                                  default=None)
 
     args = parser.parse_args()
     # check the log level
@@ -241,6 +447,24 @@ if __name__ == '__main__':
     args = vars(args)
     del args["command"]
     del args["log_level"]
+    if args["cache_dir"] is not None:
+        Background.set_resize_cache(ResizeCache(args["cache_dir"], args["cache_size"] * 1024 * 1024))
+        Dataset.set_cache_dir(args["cache_dir"])
+    del args["cache_dir"]
+    del args["cache_size"]
+    trace_file = args.pop("profile")
+    profile_top = args.pop("profile_top")
+    trace = None
+    if trace_file is not None:
+        trace = Trace()
+        set_recorder(trace)
 
-    # pass all remaining args as keyword args.
-    command(**args)
+    try:
+        # pass all remaining args as keyword args.
+        command(**args)
+    finally:
+        if trace is not None:
+            set_recorder(None)
+            trace.write(trace_file)
+            logger.info("Trace written to {}".format(trace_file))
+            logger.info("Profile summary:\n{}".format(trace.summary(profile_top)))
@@ -4,22 +4,93 @@ Contains various attributes and assets relating to fonts, card icons, and icon p
 import io
 import importlib.resources as pkg_resources
 from textwrap import wrap
-from typing import BinaryIO
+from typing import BinaryIO, Callable
 import logging
 
-from PIL import ImageFont, Image
+from PIL import ImageFont, Image, ImageDraw
 
 from card_generator.models.nation import Nation
 from card_generator.models.unit import UnitType, Unit
 from card_generator import assets
 from card_generator.models.unit import ability_sort
 from card_generator.utils.image import icon_resize, x_center_image
-from card_generator.utils.text import x_center_text, center_text
+from card_generator.utils.image.ResizeCache import ResizeCache
+from card_generator.utils.profiling import count
+from card_generator.utils.text import x_center_text, center_text, draw_text_psd_style, fit_font_size, FitResult, \
+    TextLayout, get_metrics
 
 RESOURCES = pkg_resources.files(assets)
 logger = logging.getLogger(__name__)
 
 
+def _open_asset(*path: str) -> Image.Image:
+    """
+    Opens an image from the package assets.
+    :param path: path of the image within the assets, one folder or file name per argument.
+    :return: the image.
+    """
+    resource = RESOURCES
+    for part in path:
+        resource = resource / part
+    return Image.open(io.BytesIO(resource.read_bytes()))
+
+
+class LazyAsset:
+
+    def __init__(self, load: Callable):
+        """
+        A class attribute that is only loaded the first time it is read, so that importing the generator does not
+        decode assets a command may never use. The loaded value replaces the attribute on its class, every read after
+        the first is an ordinary attribute lookup.
+        :param load: callable returning the value of the attribute.
+        """
+        self.load = load
+        self.name = None
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance, owner):
+        value = self.load()
+        setattr(owner, self.name, value)
+        count("assets.loaded")
+        return value
+
+
+class AssetRegistry:
+
+    def __init__(self, loaders: dict):
+        """
+        A read-only mapping of assets that loads each asset the first time it is looked up.
+        :param loaders: callables returning each asset, keyed by the name the asset is looked up with.
+        """
+        self._loaders = loaders
+        self._assets = dict()
+
+    def __getitem__(self, key):
+        asset = self._assets.get(key)
+        if asset is None:
+            # raises a KeyError for unknown assets, like a dict would
+            asset = self._assets[key] = self._loaders[key]()
+            count("assets.loaded")
+        return asset
+
+    def __contains__(self, key) -> bool:
+        return key in self._loaders
+
+    def __iter__(self):
+        return iter(self._loaders)
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+    def keys(self):
+        return self._loaders.keys()
+
+    def get(self, key, default=None):
+        return self[key] if key in self._loaders else default
+
+
 class Values:
     """
     Variety of values relating to element placement.
@@ -102,8 +173,7 @@ class Background:
     """
     Background assets
     """
-    with pkg_resources.path(assets, "hitpoints.png") as _resource:
-        HIT_POINTS = Image.open(_resource).resize(Resizing.HIT_POINTS)
+    HIT_POINTS = LazyAsset(lambda: _open_asset("hitpoints.png").resize(Resizing.HIT_POINTS))
     with pkg_resources.path(assets, "axis-card-base.png") as _resource:
         AXIS_BASE = _resource
     with pkg_resources.path(assets, "axis-card-back.png") as _resource:
@@ -113,73 +183,136 @@ class Background:
     with pkg_resources.path(assets, "allies-card-back.png") as _resource:
         ALLIES_BACK = _resource
 
+    # decoded card templates, keyed by the template path
+    _TEMPLATES = dict()
+
     @staticmethod
-    def get_silhouette(unit_type: UnitType, nation: str, unit: str) -> Image.Image:
-        if unit_type == UnitType.SHIP:
-            resource = (RESOURCES / "silhouettes" / "ships" / nation / "{}.png".format(unit)).read_bytes()
+    def get_template(template) -> Image.Image:
+        """
+        Gets a card template (e.g. ALLIES_BASE or AXIS_BACK) ready for drawing on. The template is only decoded the
+        first time it is requested, every call after that receives a copy of the decoded image.
+        :param template: path of the template.
+        :return: an RGBA copy of the template.
+        """
+        if template not in Background._TEMPLATES:
+            count("cache.templates.misses")
+            logger.debug("Decoding template {}".format(template))
+            Background._TEMPLATES[template] = Image.open(template).convert("RGBA")
         else:
-            resource = (RESOURCES / "silhouettes" / "planes" / nation / "{}.png".format(unit)).read_bytes()
-        resource = io.BytesIO(resource)
-        return Image.open(resource).convert("RGBA")
+            count("cache.templates.hits")
+        return Background._TEMPLATES[template].copy()
 
     @staticmethod
-    def get_blueprint(unit_type: UnitType, nation: str, unit: str) -> Image.Image:
+    def get_front_template(template) -> Image.Image:
+        """
+        Gets a card front template with the elements that are identical on every card, the attack table headings and
+        their dividers, already drawn on to it. These are only drawn the first time the template is requested.
+        :param template: path of the template, ALLIES_BASE or AXIS_BASE.
+        :return: an RGBA copy of the template.
+        """
+        key = ("front", template)
+        if key not in Background._TEMPLATES:
+            card_base = Background.get_template(template)
+            draw = ImageDraw.Draw(card_base, "RGBA")
+            draw_text_psd_style(draw,
+                                Coordinates.ATTACK_HEADING,
+                                "Attacks",
+                                font=Fonts.ATTACK_ARMOR_STATS_HEADINGS,
+                                tracking=-30, leading=0, center_x=True, fill=Colors.STATS)
+            for heading, text in ((Coordinates.ATTACK_RANGE_HEADING_0, "0"),
+                                  (Coordinates.ATTACK_RANGE_HEADING_1, "1"),
+                                  (Coordinates.ATTACK_RANGE_HEADING_2, "2"),
+                                  (Coordinates.ATTACK_RANGE_HEADING_3, "3")):
+                draw.text(heading, text, font=Fonts.ATTACK_ARMOR_STATS_HEADINGS, fill=Colors.STATS)
+            draw.line(Coordinates.ATTACK_HEADING_DIVIDER, Colors.STATS, Values.BORDER_WIDTH)
+            draw.line(Coordinates.ATTACK_HEADING_DIVIDER_1, Colors.STATS, 1)
+            draw.line(Coordinates.ATTACK_HEADING_DIVIDER_2, Colors.POINT_VALUE, 1)
+            draw.line(Coordinates.ATTACK_HEADING_DIVIDER_3, Colors.POINT_VALUE, 1)
+            Background._TEMPLATES[key] = card_base
+        return Background._TEMPLATES[key].copy()
+
+    @staticmethod
+    def clear_templates() -> None:
+        """
+        Discards the decoded card templates, they are decoded again the next time they are requested.
+        """
+        Background._TEMPLATES.clear()
+
+    #: optional on-disk cache of resized silhouettes and blueprints
+    resize_cache = None
+
+    @staticmethod
+    def set_resize_cache(cache: ResizeCache) -> None:
+        """
+        Sets the cache used to store resized silhouettes and blueprints between runs.
+        :param cache: the cache, or None to disable caching.
+        """
+        Background.resize_cache = cache
+
+    @staticmethod
+    def _get_unit_image(unit_type: UnitType, nation: str, file_name: str, plan: Callable = None) -> Image.Image:
+        """
+        Loads a silhouette or blueprint, resizing it as planned.
+        :param unit_type: type of the unit the image belongs to.
+        :param nation: nation of the unit.
+        :param file_name: name of the image file.
+        :param plan: callable taking the size of the image and returning the sizes to resize it through, in order.
+        :return: the RGBA image.
+        """
         if unit_type == UnitType.SHIP:
-            resource = (RESOURCES / "silhouettes" / "ships" / nation / "{} blueprint.png".format(unit)).read_bytes()
+            resource = (RESOURCES / "silhouettes" / "ships" / nation / file_name).read_bytes()
         else:
-            resource = (RESOURCES / "silhouettes" / "planes" / nation / "{} blueprint.png".format(
-                unit)).read_bytes()
-        resource = io.BytesIO(resource)
-        return Image.open(resource).convert("RGBA")
+            resource = (RESOURCES / "silhouettes" / "planes" / nation / file_name).read_bytes()
+        if plan is None:
+            return Image.open(io.BytesIO(resource)).convert("RGBA")
+        if Background.resize_cache is not None:
+            return Background.resize_cache.get(resource, plan)
+        image = Image.open(io.BytesIO(resource))
+        return ResizeCache.resize(image, plan(image.size))
+
+    @staticmethod
+    def get_silhouette(unit_type: UnitType, nation: str, unit: str, plan: Callable = None) -> Image.Image:
+        return Background._get_unit_image(unit_type, nation, "{}.png".format(unit), plan)
+
+    @staticmethod
+    def get_blueprint(unit_type: UnitType, nation: str, unit: str, plan: Callable = None) -> Image.Image:
+        return Background._get_unit_image(unit_type, nation, "{} blueprint.png".format(unit), plan)
 
 
 class Icons:
     """
     Icons including attacks, sets, and rarities.
     """
-    ATTACK_ICONS = {
-        "aircraft_gunnery": Image.open(io.BytesIO((RESOURCES / "card-icons" / "Gunnery1-Aircraft.png").read_bytes())),
-        "main_gunnery": icon_resize(
-            Image.open(io.BytesIO((RESOURCES / "card-icons" / "Gunnery1-Ship.png").read_bytes())), 0.8),
-        "secondary_gunnery": icon_resize(
-            Image.open(io.BytesIO((RESOURCES / "card-icons" / "Gunnery2.png").read_bytes())), 0.7),
-        "tertiary_gunnery": icon_resize(
-            Image.open(io.BytesIO((RESOURCES / "card-icons" / "Gunnery3.png").read_bytes())), 0.6),
-        "anti-air": Image.open(io.BytesIO((RESOURCES / "card-icons" / "Antiair.png").read_bytes())),
-        "bomb": Image.open(io.BytesIO((RESOURCES / "card-icons" / "Bomb.png").read_bytes())),
-        "asw": Image.open(io.BytesIO((RESOURCES / "card-icons" / "ASW.png").read_bytes())),
-        "torpedo": Image.open(io.BytesIO((RESOURCES / "card-icons" / "Torpedo.png").read_bytes()))
-    }
-
-    SET_ICONS = {
-        "Starter Set": Image.open(io.BytesIO((RESOURCES / "card-icons" / "Flagship.png").read_bytes()))
-        .resize(Resizing.SET_ICONS),
-        "War At Sea": Image.open(io.BytesIO((RESOURCES / "card-icons" / "war_at_sea.png").read_bytes()))
-        .resize(Resizing.SET_ICONS),
-        "Task Force": Image.open(io.BytesIO((RESOURCES / "card-icons" / "task_force.png").read_bytes()))
-        .resize(Resizing.SET_ICONS),
-        "Flank Speed": Image.open(io.BytesIO((RESOURCES / "card-icons" / "flank_speed.png").read_bytes()))
-        .resize(Resizing.SET_ICONS),
-        "Condition Zebra": Image.open(io.BytesIO((RESOURCES / "card-icons" / "condition_zebra.png").read_bytes()))
-        .resize(Resizing.SET_ICONS),
-        "Set V": Image.open(io.BytesIO((RESOURCES / "card-icons" / "set V.png").read_bytes()))
-        .resize(Resizing.SET_ICONS),
-        "Surface Action": Image.open(io.BytesIO((RESOURCES / "card-icons" / "surface_action.png").read_bytes()))
-        .resize(Resizing.SET_ICONS),
-        "Custom": Image.open(io.BytesIO((RESOURCES / "card-icons" / "custom.png").read_bytes()))
-        .resize(Resizing.SET_ICONS)
-    }
+    ATTACK_ICONS = AssetRegistry({
+        "aircraft_gunnery": lambda: _open_asset("card-icons", "Gunnery1-Aircraft.png"),
+        "main_gunnery": lambda: icon_resize(_open_asset("card-icons", "Gunnery1-Ship.png"), 0.8),
+        "secondary_gunnery": lambda: icon_resize(_open_asset("card-icons", "Gunnery2.png"), 0.7),
+        "tertiary_gunnery": lambda: icon_resize(_open_asset("card-icons", "Gunnery3.png"), 0.6),
+        "anti-air": lambda: _open_asset("card-icons", "Antiair.png"),
+        "bomb": lambda: _open_asset("card-icons", "Bomb.png"),
+        "asw": lambda: _open_asset("card-icons", "ASW.png"),
+        "torpedo": lambda: _open_asset("card-icons", "Torpedo.png")
+    })
+
+    SET_ICONS = AssetRegistry({
+        "Starter Set": lambda: _open_asset("card-icons", "Flagship.png").resize(Resizing.SET_ICONS),
+        "War At Sea": lambda: _open_asset("card-icons", "war_at_sea.png").resize(Resizing.SET_ICONS),
+        "Task Force": lambda: _open_asset("card-icons", "task_force.png").resize(Resizing.SET_ICONS),
+        "Flank Speed": lambda: _open_asset("card-icons", "flank_speed.png").resize(Resizing.SET_ICONS),
+        "Condition Zebra": lambda: _open_asset("card-icons", "condition_zebra.png").resize(Resizing.SET_ICONS),
+        "Set V": lambda: _open_asset("card-icons", "set V.png").resize(Resizing.SET_ICONS),
+        "Surface Action": lambda: _open_asset("card-icons", "surface_action.png").resize(Resizing.SET_ICONS),
+        "Custom": lambda: _open_asset("card-icons", "custom.png").resize(Resizing.SET_ICONS)
+    })
 
     # special icons
-    CARRIER = Image.open(io.BytesIO((RESOURCES / "card-icons" / "Carrier.png").read_bytes())) \
-        .resize(Resizing.CARRIER)
-    FLAGSHIP = Image.open(io.BytesIO((RESOURCES / "card-icons" / "Flagship.png").read_bytes())) \
-        .resize(Resizing.FLAGSHIP)
+    CARRIER = LazyAsset(lambda: _open_asset("card-icons", "Carrier.png").resize(Resizing.CARRIER))
+    FLAGSHIP = LazyAsset(lambda: _open_asset("card-icons", "Flagship.png").resize(Resizing.FLAGSHIP))
 
     # rarity icons
-    RARE = Image.open(io.BytesIO((RESOURCES / "card-icons" / "rare.png").read_bytes())).resize((30, 30))
-    UNCOMMON = Image.open(io.BytesIO((RESOURCES / "card-icons" / "uncommon.png").read_bytes())).resize((30, 30))
-    COMMON = Image.open(io.BytesIO((RESOURCES / "card-icons" / "common.png").read_bytes())).resize((30, 30))
+    RARE = LazyAsset(lambda: _open_asset("card-icons", "rare.png").resize((30, 30)))
+    UNCOMMON = LazyAsset(lambda: _open_asset("card-icons", "uncommon.png").resize((30, 30)))
+    COMMON = LazyAsset(lambda: _open_asset("card-icons", "common.png").resize((30, 30)))
 
     @staticmethod
     def get_set_icon(set_name: str):
@@ -221,46 +354,32 @@ class NationEmblems:
     """
     Emblems and mappings relating to the various nations.
     """
-    GERMANY = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "Germany-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-    ITALY = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "Italy-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-    JAPAN = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "Japan-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-    US = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "United States-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-    UK = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "United Kingdom-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-    CANADA = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "Canada-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-    AUSTRALIA = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "Australia-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-    FRANCE = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "France-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-    GREECE = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "Greece-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-    NETHERLANDS = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "Netherlands-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-    SWEDEN = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "Sweden-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-    USSR = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "Soviet Union-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-    FINLAND = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "Finland-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-    NEW_ZEALAND = Image.open(io.BytesIO((RESOURCES / "nation-emblems" / "New Zealand-sm.png").read_bytes())) \
-        .resize(Resizing.NATION_EMBLEM)
-
-    NATION_MAPPING = {
-        "Australia": AUSTRALIA,
-        "United States": US,
-        "Canada": CANADA,
-        "United Kingdom": UK,
-        "Soviet Union": USSR,
-        "France": FRANCE,
-        "Germany": GERMANY,
-        "Italy": ITALY,
-        "Japan": JAPAN
-    }
+    GERMANY = LazyAsset(lambda: _open_asset("nation-emblems", "Germany-sm.png").resize(Resizing.NATION_EMBLEM))
+    ITALY = LazyAsset(lambda: _open_asset("nation-emblems", "Italy-sm.png").resize(Resizing.NATION_EMBLEM))
+    JAPAN = LazyAsset(lambda: _open_asset("nation-emblems", "Japan-sm.png").resize(Resizing.NATION_EMBLEM))
+    US = LazyAsset(lambda: _open_asset("nation-emblems", "United States-sm.png").resize(Resizing.NATION_EMBLEM))
+    UK = LazyAsset(lambda: _open_asset("nation-emblems", "United Kingdom-sm.png").resize(Resizing.NATION_EMBLEM))
+    CANADA = LazyAsset(lambda: _open_asset("nation-emblems", "Canada-sm.png").resize(Resizing.NATION_EMBLEM))
+    AUSTRALIA = LazyAsset(lambda: _open_asset("nation-emblems", "Australia-sm.png").resize(Resizing.NATION_EMBLEM))
+    FRANCE = LazyAsset(lambda: _open_asset("nation-emblems", "France-sm.png").resize(Resizing.NATION_EMBLEM))
+    GREECE = LazyAsset(lambda: _open_asset("nation-emblems", "Greece-sm.png").resize(Resizing.NATION_EMBLEM))
+    NETHERLANDS = LazyAsset(lambda: _open_asset("nation-emblems", "Netherlands-sm.png").resize(Resizing.NATION_EMBLEM))
+    SWEDEN = LazyAsset(lambda: _open_asset("nation-emblems", "Sweden-sm.png").resize(Resizing.NATION_EMBLEM))
+    USSR = LazyAsset(lambda: _open_asset("nation-emblems", "Soviet Union-sm.png").resize(Resizing.NATION_EMBLEM))
+    FINLAND = LazyAsset(lambda: _open_asset("nation-emblems", "Finland-sm.png").resize(Resizing.NATION_EMBLEM))
+    NEW_ZEALAND = LazyAsset(lambda: _open_asset("nation-emblems", "New Zealand-sm.png").resize(Resizing.NATION_EMBLEM))
+
+    NATION_MAPPING = AssetRegistry({
+        "Australia": lambda: NationEmblems.AUSTRALIA,
+        "United States": lambda: NationEmblems.US,
+        "Canada": lambda: NationEmblems.CANADA,
+        "United Kingdom": lambda: NationEmblems.UK,
+        "Soviet Union": lambda: NationEmblems.USSR,
+        "France": lambda: NationEmblems.FRANCE,
+        "Germany": lambda: NationEmblems.GERMANY,
+        "Italy": lambda: NationEmblems.ITALY,
+        "Japan": lambda: NationEmblems.JAPAN
+    })
 
     @staticmethod
     def get_emblem(nation: Nation) -> Image.Image:
@@ -283,69 +402,173 @@ class Colors:
     ATTACK_VALUE_BACKGROUND = (0, 255, 0, 80)  # transparent green
 
 
+class FontRegistry:
+    """
+    Shared store of font handles. Each font file is read from the package resources once, and each (font file, size)
+    pair is only parsed by FreeType once.
+    """
+
+    def __init__(self) -> None:
+        self._font_files = dict()
+        self._fonts = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_font(self, font_file: str, size: int) -> ImageFont.FreeTypeFont:
+        """
+        Gets a font at the given size.
+        :param font_file: name of the font file within the package assets.
+        :param size: font size.
+        :return: the font.
+        """
+        key = (font_file, size)
+        font = self._fonts.get(key)
+        if font is not None:
+            self.hits += 1
+            count("cache.fonts.hits")
+            return font
+        self.misses += 1
+        count("cache.fonts.misses")
+        if font_file not in self._font_files:
+            self._font_files[font_file] = (RESOURCES / font_file).read_bytes()
+        font = ImageFont.truetype(io.BytesIO(self._font_files[font_file]), size)
+        self._fonts[key] = font
+        return font
+
+    def stats(self) -> dict:
+        """
+        Gets the cache statistics of the registry.
+        :return: hit and miss counts along with the number of fonts and font files held.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "fonts": len(self._fonts),
+            "font_files": len(self._font_files)
+        }
+
+
+#: registry every card font is loaded through.
+FONT_REGISTRY = FontRegistry()
+
+
 class Fonts:
     """
     Predefined fonts for the various card text.
     """
-    POINT_VALUE = ImageFont.truetype(io.BytesIO((RESOURCES / "Norfolk.otf").read_bytes()), 94)
-    FLAGSHIP = ImageFont.truetype(io.BytesIO((RESOURCES / "RobotoSlab-Bold.ttf").read_bytes()), 17)
-    SHIP_TYPE_AND_YEAR = ImageFont.truetype(io.BytesIO((RESOURCES / "Norfolk.otf").read_bytes()), 30)
-    SHIP_SPEED = ImageFont.truetype(io.BytesIO((RESOURCES / "Norfolk.otf").read_bytes()), 35)
-    ATTACK_ARMOR_STATS_HEADINGS = ImageFont.truetype(io.BytesIO((RESOURCES / "Norfolk.otf").read_bytes()), 30)
-    ATTACK_STATS = ImageFont.truetype(io.BytesIO((RESOURCES / "Norfolk.otf").read_bytes()), 60)
-    ARMOR_STATS = ImageFont.truetype(io.BytesIO((RESOURCES / "Norfolk.otf").read_bytes()), 50)
-    SET_INFO = ImageFont.truetype(io.BytesIO((RESOURCES / "Norfolk.otf").read_bytes()), 35)
-    BACK_TEXT = ImageFont.truetype(io.BytesIO((RESOURCES / "RobotoSlab-Regular.ttf").read_bytes()), 20)
+    NORFOLK = "Norfolk.otf"
+    ROBOTO_SLAB_REGULAR = "RobotoSlab-Regular.ttf"
+    ROBOTO_SLAB_BOLD = "RobotoSlab-Bold.ttf"
+
+    POINT_VALUE = LazyAsset(lambda: FONT_REGISTRY.get_font(Fonts.NORFOLK, 94))
+    FLAGSHIP = LazyAsset(lambda: FONT_REGISTRY.get_font(Fonts.ROBOTO_SLAB_BOLD, 17))
+    SHIP_TYPE_AND_YEAR = LazyAsset(lambda: FONT_REGISTRY.get_font(Fonts.NORFOLK, 30))
+    SHIP_SPEED = LazyAsset(lambda: FONT_REGISTRY.get_font(Fonts.NORFOLK, 35))
+    ATTACK_ARMOR_STATS_HEADINGS = LazyAsset(lambda: FONT_REGISTRY.get_font(Fonts.NORFOLK, 30))
+    ATTACK_STATS = LazyAsset(lambda: FONT_REGISTRY.get_font(Fonts.NORFOLK, 60))
+    ARMOR_STATS = LazyAsset(lambda: FONT_REGISTRY.get_font(Fonts.NORFOLK, 50))
+    SET_INFO = LazyAsset(lambda: FONT_REGISTRY.get_font(Fonts.NORFOLK, 35))
+    BACK_TEXT = LazyAsset(lambda: FONT_REGISTRY.get_font(Fonts.ROBOTO_SLAB_REGULAR, 20))
+
+    #: bounds of the dynamically sized fonts
+    ABILITIES_MAX_SIZE = 25
+    HEADER_MAX_SIZE = 60
+    MIN_SIZE = 1
 
     @staticmethod
-    def get_abilities_font(unit: Unit, y_offset: int) -> [ImageFont.FreeTypeFont, ImageFont.FreeTypeFont, int]:
+    def _layout_abilities(unit: Unit, y_offset: int, font_size: int) -> [bool, TextLayout]:
         """
-        Gets the fonts for the ability text and header.
+        Lays out the special abilities of a unit at the given font size.
+        :param unit: unit to lay out the abilities for.
+        :param y_offset: y offset of the bottom of the attack table.
+        :param font_size: font size to lay the abilities out at.
+        :return: whether the abilities fit on the card, and the layout of the ability titles and text.
+        """
+        abilities = FONT_REGISTRY.get_font(Fonts.ROBOTO_SLAB_REGULAR, font_size)
+        abilities_title = FONT_REGISTRY.get_font(Fonts.ROBOTO_SLAB_BOLD, font_size)
+        abilities_metrics = get_metrics(abilities)
+        abilities_title_metrics = get_metrics(abilities_title)
+        layout = TextLayout()
+        current_y_offset = y_offset + Values.ARMOR_ROW_TOP_MARGIN + 45 + Values.SPECIAL_ABILITY_TOP_MARGIN
+        for title, ability in sorted(unit.special_abilities.items(), key=ability_sort):
+            if ability is not None:
+                title = title + " - "
+            layout.add_line((Values.SPECIAL_ABILITY_LEFT_MARGIN, current_y_offset), title, abilities_title)
+            first_line_offset = abilities_title_metrics.size(title)[0]
+            # scale the width of the first line to accommodate the title text.
+            first_line_width = int(
+                (1.2 - ((Values.SPECIAL_ABILITY_LEFT_MARGIN + first_line_offset) / Values.ATTACK_RECTANGLE_END_X)) *
+                (Values.SPECIAL_ABILITY_TEXT_WIDTH * (25 / font_size)))
+            text = ability
+            if ability is not None:
+                if first_line_width > 0:
+                    text = wrap(text, width=first_line_width)
+                    first_line = text[0]
+                    text = " ".join(text[1:])
+                    layout.add_line((Values.SPECIAL_ABILITY_LEFT_MARGIN + first_line_offset, current_y_offset),
+                                    first_line, abilities)
+                    current_y_offset += abilities_metrics.size(first_line)[1]
+                else:
+                    current_y_offset += abilities_metrics.size(title)[1]
+                for line in wrap(text, width=int((Values.SPECIAL_ABILITY_TEXT_WIDTH * (25 / font_size)))):
+                    layout.add_line((Values.SPECIAL_ABILITY_LEFT_MARGIN, current_y_offset), line, abilities)
+                    current_y_offset += abilities_metrics.size(line)[1]
+            else:
+                current_y_offset += abilities_title_metrics.size(title)[1]
+            current_y_offset += Values.SPECIAL_ABILITY_BOTTOM_MARGIN
+        layout.end_y = current_y_offset
+        return current_y_offset < 980, layout
+
+    @staticmethod
+    def fit_abilities(unit: Unit, y_offset: int) -> FitResult:
+        """
+        Sizes and lays out the ability titles and text.
 
         Given that the abilities font is dynamically sized to fit the available space in the abilities section of the
         card, the font itself cannot be determined without first checking the size that will fit within the bounds of
-        the section.
+        the section. The layout measured for the chosen size is kept so that it can be drawn directly.
+        :param unit: unit to lay out the abilities for.
+        :param y_offset: y offset of the bottom of the attack table.
+        :return: the fit result, whose layout is the TextLayout of the abilities.
+        """
+        result = fit_font_size(lambda font_size: Fonts._layout_abilities(unit, y_offset, font_size),
+                               Fonts.MIN_SIZE, Fonts.ABILITIES_MAX_SIZE)
+        logger.debug("Abilities font sized to {} in {} iterations".format(result.size, result.iterations))
+        count("font_fit.abilities.iterations", result.iterations)
+        return result
+
+    @staticmethod
+    def get_abilities_font(unit: Unit, y_offset: int) -> [ImageFont.FreeTypeFont, ImageFont.FreeTypeFont, int]:
+        """
+        Gets the fonts for the ability text and header.
         :return: a tuple where index 0 is the ability text font, index 1 is the ability title font, and index 2 is the
                  font size.
         """
-        correct_size = False
-        font_size = 25
-        # dry run until we get the right size
-        while not correct_size:
-            abilities = ImageFont.truetype(io.BytesIO((RESOURCES / "RobotoSlab-Regular.ttf").read_bytes()), font_size)
-            abilities_title = ImageFont.truetype(io.BytesIO((RESOURCES / "RobotoSlab-Bold.ttf").read_bytes()),
-                                                 font_size)
-            current_y_offset = y_offset + Values.ARMOR_ROW_TOP_MARGIN + 45 + Values.SPECIAL_ABILITY_TOP_MARGIN
-            for title, ability in sorted(unit.special_abilities.items(), key=ability_sort):
-                if ability is not None:
-                    title = title + " - "
-                first_line_offset = abilities_title.getsize(title)[0]
-                # scale the width of the first line to accommodate the title text.
-                first_line_width = int(
-                    (1.2 - ((Values.SPECIAL_ABILITY_LEFT_MARGIN + first_line_offset) / Values.ATTACK_RECTANGLE_END_X)) *
-                    (Values.SPECIAL_ABILITY_TEXT_WIDTH * (25 / font_size)))
-                text = ability
-                if ability is not None:
-                    if first_line_width > 0:
-                        text = wrap(text, width=first_line_width)
-                        first_line = text[0]
-                        text = " ".join(text[1:])
-                        current_y_offset += abilities.getsize(first_line)[1]
-                    else:
-                        current_y_offset += abilities.getsize(title)[1]
-                    for line in wrap(text, width=int((Values.SPECIAL_ABILITY_TEXT_WIDTH * (25 / font_size)))):
-                        current_y_offset += abilities.getsize(line)[1]
-                else:
-                    current_y_offset += abilities_title.getsize(title)[1]
-                current_y_offset += Values.SPECIAL_ABILITY_BOTTOM_MARGIN
-            if current_y_offset < 980:
-                correct_size = True
-            else:
-                font_size -= 1
-        return (ImageFont.truetype(io.BytesIO((RESOURCES / "RobotoSlab-Regular.ttf").read_bytes()), font_size),
-                ImageFont.truetype(io.BytesIO((RESOURCES / "RobotoSlab-Bold.ttf").read_bytes()), font_size),
+        font_size = Fonts.fit_abilities(unit, y_offset).size
+        return (FONT_REGISTRY.get_font(Fonts.ROBOTO_SLAB_REGULAR, font_size),
+                FONT_REGISTRY.get_font(Fonts.ROBOTO_SLAB_BOLD, font_size),
                 font_size)
 
+    @staticmethod
+    def fit_header(text: str, tracking: int = 0) -> FitResult:
+        """
+        Sizes the card title font to fit the header.
+        :param text: text to size
+        :param tracking: reduces the space between the individual characters by a factor of x/1000.
+        :return: the fit result, whose layout is the sized font.
+        """
+        max_size = Values.SHIP_NAME_END_X - Values.SHIP_NAME_START_X
+
+        def measure(font_size: int) -> [bool, ImageFont.FreeTypeFont]:
+            font = FONT_REGISTRY.get_font(Fonts.NORFOLK, font_size)
+            width = get_metrics(font).size(text)[0] + ((tracking / 1000) * font_size * (len(text) - 1))
+            return width <= max_size, font
+
+        result = fit_font_size(measure, Fonts.MIN_SIZE, Fonts.HEADER_MAX_SIZE)
+        logger.debug("Header font sized to {} in {} iterations".format(result.size, result.iterations))
+        count("font_fit.header.iterations", result.iterations)
+        return result
+
     @staticmethod
     def get_header_font(text: str, tracking: int = 0) -> ImageFont.FreeTypeFont:
         """
@@ -354,17 +577,7 @@ class Fonts:
         :param tracking: reduces the space between the individual characters by a factor of x/1000.
         :return: appropriately sized header text.
         """
-        correct = False
-        font_size = 60
-        max_size = Values.SHIP_NAME_END_X - Values.SHIP_NAME_START_X
-        while not correct:
-            font = ImageFont.truetype(io.BytesIO((RESOURCES / "Norfolk.otf").read_bytes()), font_size)
-            width = font.getsize(text)[0] + ((tracking / 1000) * font_size * (len(text) - 1))
-            correct = width <= max_size
-            if not correct:
-                font_size -= 1
-                logger.debug("Default size is too large, trying {}".format(font_size))
-        return ImageFont.truetype(io.BytesIO((RESOURCES / "Norfolk.otf").read_bytes()), font_size)
+        return Fonts.fit_header(text, tracking).layout
 
 
 class Coordinates:
@@ -378,31 +591,37 @@ class Coordinates:
     SHIP_YEAR = (510, 160)
     SHIP_SPEED = (130, 200)
 
-    ATTACK_HEADING = center_text(
+    # positioned by measuring text, so computed when first used rather than when the fonts are not needed
+    ATTACK_HEADING = LazyAsset(lambda: center_text(
         Values.LEFT_CARD_BORDER, 247, Values.ATTACK_RECTANGLE_START_X, 292,
         "Attacks",
         Fonts.ATTACK_ARMOR_STATS_HEADINGS
-    )
-    ATTACK_RANGE_HEADING_0 = (x_center_text(Values.ATTACK_RECTANGLE_START_X,
-                                            Values.ATTACK_RECTANGLE_START_X + Values.DIVIDER_SPACING,
-                                            "0",
-                                            Fonts.ATTACK_ARMOR_STATS_HEADINGS),
-                              ATTACK_HEADING[1])
-    ATTACK_RANGE_HEADING_1 = (x_center_text(Values.ATTACK_RECTANGLE_START_X + Values.DIVIDER_SPACING,
-                                            Values.ATTACK_RECTANGLE_START_X + (2 * Values.DIVIDER_SPACING),
-                                            "1",
-                                            Fonts.ATTACK_ARMOR_STATS_HEADINGS),
-                              ATTACK_HEADING[1])
-    ATTACK_RANGE_HEADING_2 = (x_center_text(Values.ATTACK_RECTANGLE_START_X + (2 * Values.DIVIDER_SPACING),
-                                            Values.ATTACK_RECTANGLE_START_X + (3 * Values.DIVIDER_SPACING),
-                                            "2",
-                                            Fonts.ATTACK_ARMOR_STATS_HEADINGS),
-                              ATTACK_HEADING[1])
-    ATTACK_RANGE_HEADING_3 = (x_center_text(Values.ATTACK_RECTANGLE_START_X + (3 * Values.DIVIDER_SPACING),
-                                            Values.ATTACK_RECTANGLE_START_X + (4 * Values.DIVIDER_SPACING),
-                                            "3",
-                                            Fonts.ATTACK_ARMOR_STATS_HEADINGS),
-                              ATTACK_HEADING[1])
+    ))
+    ATTACK_RANGE_HEADING_0 = LazyAsset(lambda: (x_center_text(Values.ATTACK_RECTANGLE_START_X,
+                                                              Values.ATTACK_RECTANGLE_START_X + Values.DIVIDER_SPACING,
+                                                              "0",
+                                                              Fonts.ATTACK_ARMOR_STATS_HEADINGS),
+                                                Coordinates.ATTACK_HEADING[1]))
+    ATTACK_RANGE_HEADING_1 = LazyAsset(lambda: (x_center_text(Values.ATTACK_RECTANGLE_START_X + Values.DIVIDER_SPACING,
+                                                              Values.ATTACK_RECTANGLE_START_X +
+                                                              (2 * Values.DIVIDER_SPACING),
+                                                              "1",
+                                                              Fonts.ATTACK_ARMOR_STATS_HEADINGS),
+                                                Coordinates.ATTACK_HEADING[1]))
+    ATTACK_RANGE_HEADING_2 = LazyAsset(lambda: (x_center_text(Values.ATTACK_RECTANGLE_START_X +
+                                                              (2 * Values.DIVIDER_SPACING),
+                                                              Values.ATTACK_RECTANGLE_START_X +
+                                                              (3 * Values.DIVIDER_SPACING),
+                                                              "2",
+                                                              Fonts.ATTACK_ARMOR_STATS_HEADINGS),
+                                                Coordinates.ATTACK_HEADING[1]))
+    ATTACK_RANGE_HEADING_3 = LazyAsset(lambda: (x_center_text(Values.ATTACK_RECTANGLE_START_X +
+                                                              (3 * Values.DIVIDER_SPACING),
+                                                              Values.ATTACK_RECTANGLE_START_X +
+                                                              (4 * Values.DIVIDER_SPACING),
+                                                              "3",
+                                                              Fonts.ATTACK_ARMOR_STATS_HEADINGS),
+                                                Coordinates.ATTACK_HEADING[1]))
 
     ATTACK_HEADING_DIVIDER = [(Values.ATTACK_RECTANGLE_START_X, 254), (Values.ATTACK_RECTANGLE_START_X, 292)]
     ATTACK_HEADING_DIVIDER_1 = [
@@ -0,0 +1,252 @@
+"""
+The War at Sea data set indexed by nation and unit name. Parsing the JSON is kept off the common path by a compiled copy
+of the data set cached on disk, and nations are only built into models once they are used.
+"""
+import hashlib
+import json
+import logging
+import marshal
+import os
+import sys
+import tempfile
+
+from card_generator.models.assets import get_war_at_sea_json
+from card_generator.models.nation import Nation
+from card_generator.models.unit import Unit
+from card_generator.models.utils import load_json
+from card_generator.utils.profiling import count
+
+log = logging.getLogger(__name__)
+
+
+class Dataset:
+    #: bump whenever the layout of the compiled cache changes.
+    CACHE_VERSION = 1
+
+    #: file name of the compiled cache, marshal's format is only stable within a Python version.
+    CACHE_FILE_NAME = "War_at_Sea.py{}{}.marshal".format(*sys.version_info[:2])
+
+    # directory the compiled data set is cached in, None disables the cache
+    _cache_dir = None
+
+    def __init__(self, records: dict):
+        """
+        The nations and units of a War at Sea data set, keyed by name. Each nation is parsed the first time it is used.
+
+        :param records: mapping of nation name to the nation's record in the War at Sea JSON, either parsed or still
+                        marshalled.
+        """
+        self._records = records
+        self._nations = dict()
+        self._units = dict()
+        self._stats = None
+
+    @staticmethod
+    def set_cache_dir(cache_dir: str) -> None:
+        """
+        Sets the directory the compiled data set is cached in.
+        :param cache_dir: the directory, created if it does not exist. None disables the cache.
+        """
+        Dataset._cache_dir = cache_dir
+
+    @staticmethod
+    def from_json(data: list) -> 'Dataset':
+        """
+        Indexes parsed War at Sea JSON.
+        :param data: the parsed War at Sea JSON.
+        :return: the data set.
+        """
+        return Dataset({nation["name"]: nation for nation in data})
+
+    @staticmethod
+    def load(cache_dir: str = None) -> 'Dataset':
+        """
+        Loads the built-in War at Sea data set. The JSON is only parsed when the compiled cache is missing or was
+        compiled from a different version of the data set, in which case the cache is compiled again.
+        :keyword cache_dir: directory the compiled data set is cached in, defaults to the one set with set_cache_dir.
+        :return: the data set.
+        """
+        cache_dir = cache_dir or Dataset._cache_dir
+        with get_war_at_sea_json() as data_file:
+            source = data_file.read()
+        if cache_dir is None:
+            return Dataset.from_json(json.loads(source))
+        digest = hashlib.sha256(source).hexdigest()
+        path = os.path.join(cache_dir, Dataset.CACHE_FILE_NAME)
+        records = Dataset._read_cache(path, digest)
+        if records is not None:
+            count("cache.dataset.hits")
+            return Dataset(records)
+        count("cache.dataset.misses")
+        data = json.loads(source)
+        Dataset._write_cache(cache_dir, path, digest, data)
+        return Dataset.from_json(data)
+
+    @staticmethod
+    def _read_cache(path: str, digest: str):
+        """
+        Reads the compiled data set.
+        :param path: path of the compiled data set.
+        :param digest: hash of the War at Sea JSON the cache must have been compiled from.
+        :return: mapping of nation name to its marshalled record, None if the cache is missing, unreadable or stale.
+        """
+        try:
+            with open(path, "rb") as cache_file:
+                cache = marshal.load(cache_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            log.warning(f"Unable to read the compiled data set {path}: {e}")
+            return None
+        if not isinstance(cache, dict) or cache.get("version") != Dataset.CACHE_VERSION or \
+                cache.get("source") != digest:
+            return None
+        return cache["nations"]
+
+    @staticmethod
+    def _write_cache(cache_dir: str, path: str, digest: str, data: list) -> None:
+        """
+        Compiles the data set and writes it to the cache. Every nation is marshalled separately so that loading the
+        cache leaves the nations that are not used undecoded. The cache is written to a temporary file first so that
+        other processes never read a partially written cache.
+        :param cache_dir: directory the compiled data set is cached in.
+        :param path: path of the compiled data set.
+        :param digest: hash of the War at Sea JSON.
+        :param data: the parsed War at Sea JSON.
+        """
+        cache = {"version": Dataset.CACHE_VERSION, "source": digest,
+                 "nations": {nation["name"]: marshal.dumps(nation) for nation in data}}
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(file_descriptor, "wb") as temp_file:
+                marshal.dump(cache, temp_file)
+            os.replace(temp_path, path)
+        except OSError as e:
+            log.warning(f"Unable to write the compiled data set to {path}: {e}")
+
+    def get_nation_names(self) -> list:
+        """
+        :return: names of the nations in the data set, in the order of the data set.
+        """
+        return list(self._records)
+
+    def get_record(self, nation: str) -> dict:
+        """
+        Gets a nation's record in the War at Sea JSON.
+        :param nation: name of the nation.
+        :return: the nation's record.
+        :raises ValueError: if the nation does not exist.
+        """
+        if nation not in self._records:
+            raise ValueError("\"{}\" does not exist in the default countries".format(nation))
+        record = self._records[nation]
+        if isinstance(record, bytes):
+            record = self._records[nation] = marshal.loads(record)
+        return record
+
+    def get_records(self) -> list:
+        """
+        :return: the records of every nation, as they appear in the War at Sea JSON.
+        """
+        return [self.get_record(nation) for nation in self._records]
+
+    def get_nation(self, nation: str) -> Nation:
+        """
+        Gets a nation along with its units, building it on first use.
+        :param nation: name of the nation.
+        :return: the nation.
+        :raises ValueError: if the nation does not exist.
+        """
+        if nation not in self._nations:
+            loaded = load_json([self.get_record(nation)])[0]
+            self._units[nation] = {unit.name: unit for unit in loaded.get_units()}
+            self._nations[nation] = loaded
+        return self._nations[nation]
+
+    def get_nations(self) -> list:
+        """
+        :return: every nation in the data set, in the order of the data set.
+        """
+        return [self.get_nation(nation) for nation in self._records]
+
+    def get_units(self, nation: str) -> dict:
+        """
+        Gets the units of a nation.
+        :param nation: name of the nation.
+        :return: mapping of unit name to unit.
+        :raises ValueError: if the nation does not exist.
+        """
+        self.get_nation(nation)
+        return self._units[nation]
+
+    def get_unit(self, nation: str, unit: str) -> Unit:
+        """
+        Looks up a unit, only building the nation it belongs to.
+        :param nation: name of the nation.
+        :param unit: name of the unit.
+        :return: the unit.
+        :raises ValueError: if the nation or unit does not exist.
+        """
+        units = self.get_units(nation)
+        if unit not in units:
+            raise ValueError("\"{}\" unit does not exist in for \"{}\"".format(unit, nation))
+        return units[unit]
+
+    def get_index(self) -> dict:
+        """
+        Indexes every unit of the data set, building all the nations.
+        :return: mapping of nation name to a mapping of unit name to unit.
+        """
+        return {nation: self.get_units(nation) for nation in self._records}
+
+    def get_stats(self):
+        """
+        Gets the stats of every unit as a StatMatrix, building it on first use.
+        :return: the StatMatrix.
+        """
+        if self._stats is None:
+            # numpy is only imported when units are queried, keeping startup fast
+            from card_generator.models.stats import StatMatrix
+            self._stats = StatMatrix.from_records(self.get_records())
+        return self._stats
+
+    def query(self, where: str, nations: list = None) -> list:
+        """
+        Selects the units matching a query over their stats, e.g. ``set == "Task Force" and points < 20``. Only the
+        nations of the matching units are built. See StatMatrix.mask for the query syntax.
+        :param where: the query.
+        :keyword nations: names of the nations to select from, defaults to all of them.
+        :return: list of (nation, unit) tuples, in the order of the data set.
+        :raises ValueError: if the query is invalid or a nation does not exist.
+        """
+        for nation in nations or list():
+            if nation not in self._records:
+                raise ValueError("\"{}\" does not exist in the default countries".format(nation))
+        return [(self.get_nation(nation), self.get_unit(nation, unit))
+                for nation, unit in self.get_stats().select(where, nations)]
+
+    def plan(self, nations: list, where: str = None) -> list:
+        """
+        Resolves the nations to build into a single list of work, so that they can be rendered in one session.
+        :param nations: names of the nations to build, in the order to build them. Repeated names are built once.
+        :keyword where: only build the units matching this query, see query. Defaults to every unit.
+        :return: list of (nation, unit) tuples, ordered by nation as given and then as in the data set.
+        :raises ValueError: if any of the nations does not exist, before any nation is built, or the query is invalid.
+        """
+        unknown = [nation for nation in nations if nation not in self._records]
+        if len(unknown) > 0:
+            raise ValueError("{} {} not exist in the default countries".format(
+                ", ".join("\"{}\"".format(nation) for nation in unknown), "does" if len(unknown) == 1 else "do"))
+        nations = list(dict.fromkeys(nations))
+        if where is None:
+            return [(self.get_nation(nation), unit) for nation in nations
+                    for unit in self.get_nation(nation).get_units()]
+        order = {nation: index for index, nation in enumerate(nations)}
+        return sorted(self.query(where, nations), key=lambda work: order[work[0].name])
+
+    def __contains__(self, nation: str) -> bool:
+        return nation in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
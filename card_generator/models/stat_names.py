@@ -0,0 +1,17 @@
+"""
+Names of the stats units can be queried by. They are kept apart from the stat matrix so that they can be listed, e.g. in
+the command line help, without importing numpy.
+"""
+from card_generator.models.unit import Unit
+
+#: attacks in the matrix in the order they are listed on a card, named after the unit's attributes without "_attack".
+ATTACKS = tuple(attribute[:-len("_attack")] for attribute, _ in Unit.ATTACKS)
+
+#: number of ranges each attack has a value for.
+RANGES = 4
+
+#: numeric stats in the matrix.
+STATS = ("points", "armor", "vital_armor", "hull_points", "year")
+
+#: text stats in the matrix, stored as codes into the list of values the stat takes.
+CODED_STATS = ("nation", "set", "rarity", "type")
@@ -0,0 +1,206 @@
+"""
+The stats of every unit in the data set as numpy arrays, so that units can be selected with vectorized queries such as
+``set == "Task Force" and points < 20``.
+"""
+import ast
+import operator
+
+import numpy as np
+
+from card_generator.models.stat_names import ATTACKS, RANGES, STATS, CODED_STATS
+
+_COMPARISONS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge
+}
+
+
+class _Coded:
+    def __init__(self, name: str, codes: np.ndarray, values: list):
+        """
+        A text stat, only comparable for (in)equality with text.
+        :param name: name of the stat.
+        :param codes: code of each unit's value.
+        :param values: the values the codes refer to.
+        """
+        self.name = name
+        self.codes = codes
+        self.values = values
+
+    def encode(self, value) -> int:
+        if not isinstance(value, str):
+            raise ValueError("{} can only be compared with text, not {!r}".format(self.name, value))
+        # values that no unit has never match
+        return self.values.index(value) if value in self.values else -1
+
+
+class StatMatrix:
+
+    def __init__(self, keys: list, attacks: np.ndarray, stats: np.ndarray, codes: np.ndarray, values: list):
+        """
+        The stats of a list of units.
+
+        :param keys: (nation name, unit name) of each unit, in the order of the rows of the arrays.
+        :param attacks: units x attacks x ranges array of attack values, ranges a unit cannot attack at are 0.
+        :param stats: units x stats array of the numeric stats.
+        :param codes: units x coded stats array of the text stats, as indexes into values.
+        :param values: the values each text stat takes, in the order of CODED_STATS.
+        """
+        self.keys = keys
+        self.attacks = attacks
+        self.stats = stats
+        self.codes = codes
+        self.values = values
+
+    @staticmethod
+    def from_records(records: list) -> 'StatMatrix':
+        """
+        Builds the matrix from the records of the War at Sea JSON.
+        :param records: records of the nations to include.
+        :return: the matrix.
+        """
+        units = [(nation["name"], unit) for nation in records for unit in nation["units"]]
+        attacks = np.zeros((len(units), len(ATTACKS), RANGES), dtype=np.int16)
+        stats = np.zeros((len(units), len(STATS)), dtype=np.int32)
+        codes = np.zeros((len(units), len(CODED_STATS)), dtype=np.int32)
+        values = [list() for _ in CODED_STATS]
+        indexes = [dict() for _ in CODED_STATS]
+        for row, (nation, unit) in enumerate(units):
+            for column, attack in enumerate(ATTACKS):
+                for attack_range, value in enumerate(unit.get(attack + "_attack", [])):
+                    if value != "-":
+                        attacks[row, column, attack_range] = int(value)
+            stats[row] = [unit[stat] for stat in STATS]
+            for column, value in enumerate([nation, unit["set"], unit["rarity"], unit["type"]]):
+                if value not in indexes[column]:
+                    indexes[column][value] = len(values[column])
+                    values[column].append(value)
+                codes[row, column] = indexes[column][value]
+        return StatMatrix([(nation, unit["name"]) for nation, unit in units], attacks, stats, codes, values)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get_column(self, name: str, attack_range: int = 0):
+        """
+        Gets a stat of every unit.
+        :param name: name of the stat or attack.
+        :keyword attack_range: range of the attack, 0 to 3. Defaults to 0.
+        :return: the stat of every unit, a _Coded for text stats.
+        :raises ValueError: if there is no such stat.
+        """
+        if name in ATTACKS:
+            if not 0 <= attack_range < RANGES:
+                raise ValueError("{} has no range {}, ranges are 0 to {}".format(name, attack_range, RANGES - 1))
+            return self.attacks[:, ATTACKS.index(name), attack_range]
+        if name in STATS:
+            return self.stats[:, STATS.index(name)]
+        if name in CODED_STATS:
+            column = CODED_STATS.index(name)
+            return _Coded(name, self.codes[:, column], self.values[column])
+        raise ValueError("Unknown stat \"{}\", expected one of {}".format(name,
+                                                                      ", ".join(ATTACKS + STATS + CODED_STATS)))
+
+    def mask(self, where: str, nations: list = None) -> np.ndarray:
+        """
+        Evaluates a query over every unit. Queries are Python expressions over the stats that combine comparisons with
+        and, or and not, e.g. ``rarity in ["Rare", "Uncommon"] and not nation == "Japan"``. Attacks compare their value
+        at range 0 unless a range is given, e.g. ``torpedo[2] > 0``.
+        :param where: the query.
+        :keyword nations: names of the nations to restrict the query to, defaults to all of them.
+        :return: boolean array of which units match the query.
+        :raises ValueError: if the query is invalid.
+        """
+        try:
+            expression = ast.parse(where.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError("Invalid query \"{}\": {}".format(where, e.msg))
+        mask = self._mask(expression.body)
+        if nations is not None:
+            column = self.get_column("nation")
+            mask &= np.isin(column.codes, [column.encode(nation) for nation in nations])
+        return mask
+
+    def select(self, where: str, nations: list = None) -> list:
+        """
+        Finds the units matching a query, see mask.
+        :param where: the query.
+        :keyword nations: names of the nations to restrict the query to, defaults to all of them.
+        :return: list of (nation name, unit name) tuples of the matching units, in the order of the data set.
+        :raises ValueError: if the query is invalid.
+        """
+        return [self.keys[row] for row in np.flatnonzero(self.mask(where, nations))]
+
+    def _mask(self, node: ast.AST) -> np.ndarray:
+        mask = self._evaluate(node)
+        if not isinstance(mask, np.ndarray) or mask.dtype != bool:
+            raise ValueError("Expected a comparison, not \"{}\"".format(ast.unparse(node)))
+        return mask
+
+    def _evaluate(self, node: ast.AST):
+        if isinstance(node, ast.BoolOp):
+            masks = [self._mask(value) for value in node.values]
+            if isinstance(node.op, ast.And):
+                return np.logical_and.reduce(masks)
+            return np.logical_or.reduce(masks)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return ~self._mask(node.operand)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and \
+                isinstance(node.operand, ast.Constant) and type(node.operand.value) is int:
+            return -node.operand.value
+        if isinstance(node, ast.Compare):
+            masks = list()
+            left = self._evaluate(node.left)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self._evaluate(comparator)
+                masks.append(self._compare(left, op, right))
+                left = right
+            return np.logical_and.reduce(masks)
+        if isinstance(node, ast.Name):
+            return self.get_column(node.id)
+        if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id in ATTACKS:
+            attack_range = self._evaluate(node.slice)
+            if not isinstance(attack_range, int):
+                raise ValueError("The range of {} must be a number".format(node.value.id))
+            return self.get_column(node.value.id, attack_range)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, str)) and not isinstance(node.value, bool):
+            return node.value
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [self._evaluate(element) for element in node.elts]
+        raise ValueError("Unsupported query expression \"{}\"".format(ast.unparse(node)))
+
+    @staticmethod
+    def _compare(left, op: ast.cmpop, right) -> np.ndarray:
+        if isinstance(op, (ast.In, ast.NotIn)):
+            if not isinstance(right, list):
+                raise ValueError("in expects a list of values")
+            if isinstance(left, _Coded):
+                mask = np.isin(left.codes, [left.encode(value) for value in right])
+            elif isinstance(left, np.ndarray):
+                for value in right:
+                    if isinstance(value, str):
+                        raise ValueError("Numeric stats cannot be compared with text")
+                    if not isinstance(value, int):
+                        raise ValueError("in expects a list of numbers, not {!r}".format(value))
+                mask = np.isin(left, right)
+            else:
+                raise ValueError("in expects a stat on its left")
+            return ~mask if isinstance(op, ast.NotIn) else mask
+        if type(op) not in _COMPARISONS:
+            raise ValueError("Unsupported comparison {}".format(type(op).__name__))
+        if isinstance(left, _Coded) or isinstance(right, _Coded):
+            if not isinstance(op, (ast.Eq, ast.NotEq)):
+                raise ValueError("Text stats can only be compared with == and !=")
+            if isinstance(left, _Coded) and isinstance(right, _Coded):
+                raise ValueError("{} and {} cannot be compared with each other".format(left.name, right.name))
+            left, right = (left.codes, left.encode(right)) if isinstance(left, _Coded) else \
+                (right.encode(left), right.codes)
+        elif isinstance(left, str) or isinstance(right, str):
+            raise ValueError("Numeric stats cannot be compared with text")
+        if not isinstance(left, np.ndarray) and not isinstance(right, np.ndarray):
+            raise ValueError("Comparisons need a stat on one side")
+        return _COMPARISONS[type(op)](left, right)
@@ -1,4 +1,6 @@
 import enum
+from types import MappingProxyType
+from typing import NamedTuple
 
 
 def ability_sort(item: tuple) -> int:
@@ -23,23 +25,98 @@ class UnitType(enum.Enum):
     PLANE = 1
 
 
+# attack values, attack rows and armor shared between the frozen units that have the same ones
+_attack_values = dict()
+_attack_rows = dict()
+_armor = dict()
+
+
+class AttackRow(NamedTuple):
+    #: name of the attack, which is also the name of its icon.
+    name: str
+    #: the attack's value at each of the four ranges.
+    value: tuple
+
+
 class BlueprintSettings:
+    #: every setting, as they appear in the War at Sea JSON.
+    FIELDS = ("max_width", "x_placement", "y_placement", "file_name",
+              "back_max_width", "back_x_placement", "back_y_placement")
+
+    __slots__ = FIELDS + ("_frozen",)
+
     def __init__(self, settings: dict):
         """
-        Creates optional settings
+        Creates optional settings, they can no longer be changed once the unit they belong to is frozen.
         :param settings:
         """
-        fields = ["max_width", "x_placement", "y_placement", "file_name",
-                  "back_max_width", "back_x_placement", "back_y_placement"]
-        for field in fields:
+        self._frozen = False
+        for field in BlueprintSettings.FIELDS:
             try:
                 self.__setattr__(field, settings[field])
             except KeyError:
                 self.__setattr__(field, None)
 
+    def freeze(self):
+        """
+        Prevents the settings from being changed.
+        :return: the settings.
+        """
+        object.__setattr__(self, "_frozen", True)
+        return self
+
+    def to_json(self) -> dict:
+        """
+        :return: the settings that are set, as they appear in the War at Sea JSON.
+        """
+        return {field: getattr(self, field) for field in BlueprintSettings.FIELDS
+                if getattr(self, field) is not None}
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError("Blueprint settings are frozen and cannot be changed")
+        object.__setattr__(self, name, value)
+
+    def __getstate__(self):
+        return {field: getattr(self, field) for field in BlueprintSettings.FIELDS + ("_frozen",)}
+
+    def __setstate__(self, state):
+        for field, value in state.items():
+            object.__setattr__(self, field, value)
+
 
 class Unit:
+    #: the unit's attacks in the order they are listed on a card, as (attribute, attack name) tuples.
+    ATTACKS = (
+        ("aircraft_gunnery_attack", "aircraft_gunnery"),
+        ("main_gunnery_attack", "main_gunnery"),
+        ("secondary_gunnery_attack", "secondary_gunnery"),
+        ("tertiary_gunnery_attack", "tertiary_gunnery"),
+        ("anti_aircraft_attack", "anti-air"),
+        ("bomb_attack", "bomb"),
+        ("anti_submarine_attack", "asw"),
+        ("torpedo_attack", "torpedo")
+    )
+
+    #: fields every unit's record in the War at Sea JSON has, named as they are on the unit.
+    RECORD_FIELDS = ("name", "flagship", "points", "year", "type", "speed", "planes", "main_gunnery_attack",
+                     "aircraft_gunnery_attack", "secondary_gunnery_attack", "tertiary_gunnery_attack",
+                     "anti_aircraft_attack", "anti_submarine_attack", "torpedo_attack", "bomb_attack", "armor",
+                     "vital_armor", "hull_points", "special_abilities", "set", "set_number", "rarity")
+
+    #: every field of the unit.
+    FIELDS = RECORD_FIELDS + ("ship_class", "manufacturer", "blue_print_settings", "back_text")
+
+    __slots__ = FIELDS + ("_attacks", "_armor", "_frozen")
+
     def __init__(self):
+        """
+        A unit of the data set. Units are built with the with_* methods and frozen once loaded, after which their
+        attacks and armor are precomputed and they can no longer be changed.
+        """
+        self._frozen = False
+        self._attacks = None
+        self._armor = None
         self.name = None
         self.flagship = None
         self.points = None
@@ -175,45 +252,100 @@ class Unit:
         self.back_text = text
         return self
 
-    def get_attacks(self) -> tuple:
-        number_of_attacks = 0
-        attacks = list()
-        if len(self.aircraft_gunnery_attack) > 0:
-            number_of_attacks += 1
-            attacks.append({"name": "aircraft_gunnery", "value": self.aircraft_gunnery_attack})
-        if len(self.main_gunnery_attack) > 0:
-            number_of_attacks += 1
-            attacks.append({"name": "main_gunnery", "value": self.main_gunnery_attack})
-        if len(self.secondary_gunnery_attack) > 0:
-            number_of_attacks += 1
-            attacks.append({"name": "secondary_gunnery", "value": self.secondary_gunnery_attack})
-        if len(self.tertiary_gunnery_attack) > 0:
-            number_of_attacks += 1
-            attacks.append({"name": "tertiary_gunnery", "value": self.tertiary_gunnery_attack})
-        if len(self.anti_aircraft_attack) > 0:
-            number_of_attacks += 1
-            attacks.append({"name": "anti-air", "value": self.anti_aircraft_attack})
-        if len(self.bomb_attack) > 0:
-            number_of_attacks += 1
-            attacks.append({"name": "bomb", "value": self.bomb_attack})
-        if len(self.anti_submarine_attack) > 0:
-            number_of_attacks += 1
-            attacks.append({"name": "asw", "value": self.anti_submarine_attack})
-        if len(self.torpedo_attack) > 0:
-            number_of_attacks += 1
-            attacks.append({"name": "torpedo", "value": self.torpedo_attack})
-        return number_of_attacks, attacks
-
-    def get_armor(self) -> dict:
-        return {
+    def freeze(self):
+        """
+        Precomputes the unit's attacks and armor, then prevents the unit, its special abilities and its blueprint
+        settings from being changed. The attacks and armor are shared with the other units that have the same ones.
+        :return: the unit.
+        """
+        for attribute, _ in Unit.ATTACKS:
+            value = tuple(getattr(self, attribute))
+            self.__setattr__(attribute, _attack_values.setdefault(value, value))
+        number_of_attacks, attacks = self._build_attacks()
+        self._attacks = number_of_attacks, tuple(_attack_rows.setdefault(attack, attack) for attack in attacks)
+        armor = (self.armor, self.vital_armor, self.hull_points)
+        if armor not in _armor:
+            _armor[armor] = self._build_armor()
+        self._armor = _armor[armor]
+        self.special_abilities = MappingProxyType(dict(self.special_abilities))
+        if self.blue_print_settings is not None:
+            self.blue_print_settings.freeze()
+        self._frozen = True
+        return self
+
+    def is_frozen(self) -> bool:
+        return self._frozen
+
+    def _build_attacks(self) -> tuple:
+        attacks = tuple(AttackRow(name, tuple(getattr(self, attribute)))
+                        for attribute, name in Unit.ATTACKS if len(getattr(self, attribute)) > 0)
+        return len(attacks), attacks
+
+    def _build_armor(self) -> MappingProxyType:
+        return MappingProxyType({
             "ARMOR": str(self.armor),
             "VITAL ARMOR": str(self.vital_armor),
             "HULL POINTS": str(self.hull_points)
-        }
+        })
+
+    def get_attacks(self) -> tuple:
+        """
+        :return: a tuple of the number of attacks and the AttackRows of the unit's attacks, in the order they are
+                 listed on a card.
+        """
+        if self._attacks is not None:
+            return self._attacks
+        return self._build_attacks()
+
+    def get_armor(self) -> MappingProxyType:
+        """
+        :return: the armor, vital armor and hull points of the unit, as text.
+        """
+        if self._armor is not None:
+            return self._armor
+        return self._build_armor()
+
+    def to_json(self) -> dict:
+        """
+        :return: the unit as it appears in the War at Sea JSON.
+        """
+        record = {field: getattr(self, field) for field in Unit.RECORD_FIELDS}
+        record["special_abilities"] = dict(self.special_abilities)
+        if self.ship_class is not None:
+            record["class"] = self.ship_class
+        if self.manufacturer is not None:
+            record["manufacturer"] = self.manufacturer
+        if self.blue_print_settings is not None and len(self.blue_print_settings.to_json()) > 0:
+            record["blue_print_settings"] = self.blue_print_settings
+        if self.back_text != "":
+            record["back_text"] = self.back_text
+        return record
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError("{} is frozen and cannot be changed".format(self.name))
+        object.__setattr__(self, name, value)
+
+    def __getstate__(self):
+        # the precomputed attacks and armor are rebuilt when unpickled rather than pickled
+        state = {field: getattr(self, field) for field in Unit.FIELDS}
+        # mapping proxies cannot be pickled, the special abilities are frozen again when unpickled
+        state["special_abilities"] = dict(self.special_abilities)
+        state["_frozen"] = self._frozen
+        return state
+
+    def __setstate__(self, state):
+        object.__setattr__(self, "_frozen", False)
+        object.__setattr__(self, "_attacks", None)
+        object.__setattr__(self, "_armor", None)
+        frozen = state.pop("_frozen")
+        for field, value in state.items():
+            self.__setattr__(field, value)
+        if frozen:
+            self.freeze()
 
     def __str__(self):
-        elements = self.__dict__.keys()
         string = ""
-        for element in elements:
-            string += str(element) + ": " + str(self.__dict__[element]) + "\n"
+        for element in Unit.FIELDS:
+            string += str(element) + ": " + str(getattr(self, element)) + "\n"
         return string
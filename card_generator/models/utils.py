@@ -1,7 +1,7 @@
 from json.encoder import JSONEncoder
 from card_generator.models.alliance import Alliance
 from card_generator.models.nation import Nation, NATION_LIST
-from card_generator.models.unit import Unit
+from card_generator.models.unit import Unit, BlueprintSettings
 import logging
 
 log = logging.getLogger(__name__)
@@ -12,55 +12,68 @@ class ModelJsonEncoder(JSONEncoder):
         if isinstance(o, Nation):
             return o.__dict__
         elif isinstance(o, Unit):
-            return o.__dict__
+            return o.to_json()
+        elif isinstance(o, BlueprintSettings):
+            return o.to_json()
         elif isinstance(o, Alliance):
             return o.value
         return super().default(o)
 
 
+def load_unit(unit: dict) -> Unit:
+    """
+    Builds a unit from its record in the War at Sea JSON, frozen so that its attacks and armor are only computed once.
+    :param unit: the unit's record.
+    :return: the unit.
+    :raises KeyError: if a required field is missing from the record.
+    """
+    current_unit = Unit() \
+        .with_name(unit["name"]) \
+        .with_flagship_value(unit["flagship"]) \
+        .with_point_value(unit["points"]) \
+        .with_year(unit["year"]) \
+        .with_type(unit["type"]).with_speed(unit["speed"]) \
+        .with_plane_capacity(unit["planes"]) \
+        .with_main_gunnery_attack(unit["main_gunnery_attack"]) \
+        .with_secondary_gunnery_attack(unit["secondary_gunnery_attack"]) \
+        .with_tertiary_gunnery_attack(unit["tertiary_gunnery_attack"]) \
+        .with_anti_air_attack(unit["anti_aircraft_attack"]) \
+        .with_anti_submarine_attack(unit["anti_submarine_attack"]) \
+        .with_torpedo_attack(unit["torpedo_attack"]) \
+        .with_bomb_attack(unit["bomb_attack"]) \
+        .with_armor(unit["armor"]) \
+        .with_vital_armor(unit["vital_armor"]) \
+        .with_hull_points(unit["hull_points"]) \
+        .with_special_abilities(unit["special_abilities"]) \
+        .with_set(unit["set"]) \
+        .with_set_number(unit["set_number"]) \
+        .with_rarity(unit["rarity"])
+    try:
+        current_unit = current_unit.with_ship_class(unit["class"])
+    except KeyError:
+        # TODO all aircraft will need their manufacturer listed.
+        # current_unit = current_unit.with_manufacturer(unit["manufacturer"])
+        pass
+    try:
+        current_unit = current_unit.with_blueprint_settings(unit["blue_print_settings"])
+    except KeyError:
+        current_unit = current_unit.with_blueprint_settings(dict())
+
+    try:
+        current_unit = current_unit.with_back_text(unit["back_text"])
+    except KeyError:
+        pass
+    return current_unit.freeze()
+
+
 def load_json(json) -> list:
+    unit = None
     try:
         populated_nations = list()
         for nation in json:
             current_nation = Nation(nation["name"], nation["alliance"])
             for unit in nation["units"]:
-                current_unit = Unit() \
-                    .with_name(unit["name"]) \
-                    .with_flagship_value(unit["flagship"]) \
-                    .with_point_value(unit["points"]) \
-                    .with_year(unit["year"]) \
-                    .with_type(unit["type"]).with_speed(unit["speed"]) \
-                    .with_plane_capacity(unit["planes"]) \
-                    .with_main_gunnery_attack(unit["main_gunnery_attack"]) \
-                    .with_secondary_gunnery_attack(unit["secondary_gunnery_attack"]) \
-                    .with_tertiary_gunnery_attack(unit["tertiary_gunnery_attack"]) \
-                    .with_anti_air_attack(unit["anti_aircraft_attack"]) \
-                    .with_anti_submarine_attack(unit["anti_submarine_attack"]) \
-                    .with_torpedo_attack(unit["torpedo_attack"]) \
-                    .with_bomb_attack(unit["bomb_attack"]) \
-                    .with_armor(unit["armor"]) \
-                    .with_vital_armor(unit["vital_armor"]) \
-                    .with_hull_points(unit["hull_points"]) \
-                    .with_special_abilities(unit["special_abilities"]) \
-                    .with_set(unit["set"]) \
-                    .with_set_number(unit["set_number"]) \
-                    .with_rarity(unit["rarity"])
-                try:
-                    current_unit = current_unit.with_ship_class(unit["class"])
-                except KeyError:
-                    # TODO all aircraft will need their manufacturer listed.
-                    # current_unit = current_unit.with_manufacturer(unit["manufacturer"])
-                    pass
-                try:
-                    current_unit = current_unit.with_blueprint_settings(unit["blue_print_settings"])
-                except KeyError:
-                    current_unit = current_unit.with_blueprint_settings(dict())
-
-                try:
-                    current_unit = current_unit.with_back_text(unit["back_text"])
-                except KeyError:
-                    pass
-                current_nation.add_unit(current_unit)
+                current_nation.add_unit(load_unit(unit))
             populated_nations.append(current_nation)
         return populated_nations
     except Exception as e:
@@ -0,0 +1,114 @@
+"""
+In-memory rendering of cards, for tools that want the card images rather than files on disk.
+"""
+import logging
+import traceback
+
+from PIL import Image
+
+from card_generator import Generator
+from card_generator.models.assets import Background
+from card_generator.models.nation import Nation
+from card_generator.models.unit import Unit
+from card_generator.utils.encoding import OutputProfile, DEFAULT_PROFILE
+from card_generator.utils.image.ResizeCache import ResizeCache
+
+logger = logging.getLogger(__name__)
+
+
+class RenderedCard:
+    def __init__(self, nation: Nation, unit: Unit, front=None, back=None, error: str = None):
+        """
+        The rendered faces of a single unit's card.
+        :param nation: nation the unit belongs to.
+        :param unit: the unit.
+        :param front: the front of the card, an image or its encoded bytes.
+        :param back: the back of the card, an image or its encoded bytes. None if the back was not rendered.
+        :param error: description of the failure, None if the card rendered successfully.
+        """
+        self.nation = nation
+        self.unit = unit
+        self.front = front
+        self.back = back
+        self.error = error
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+    def __str__(self):
+        return "{}/{}".format(self.nation.name, self.unit.name)
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class Renderer:
+    """
+    A long-lived rendering session. The card templates are decoded when the session starts and, along with the fonts
+    and resized unit images, are reused by every card the session renders. Nothing is written to disk.
+    """
+
+    def __init__(self, profile: OutputProfile = DEFAULT_PROFILE, resize_cache: ResizeCache = None) -> None:
+        """
+        :keyword profile: output profile cards are encoded with when bytes are requested, defaults to PNG at Pillow's
+                          default settings.
+        :keyword resize_cache: persistent cache of resized silhouettes and blueprints to use, defaults to the cache
+                               already configured, if any.
+        """
+        self.profile = profile
+        if resize_cache is not None:
+            Background.set_resize_cache(resize_cache)
+        for template in (Background.ALLIES_BASE, Background.AXIS_BASE):
+            Background.get_front_template(template)
+        for template in (Background.ALLIES_BACK, Background.AXIS_BACK):
+            Background.get_template(template)
+
+    def encode(self, card: Image.Image) -> bytes:
+        """
+        Encodes a rendered card with the session's output profile.
+        :param card: the rendered card.
+        :return: the encoded card.
+        """
+        return self.profile.encode(card)
+
+    def render_front(self, nation: Nation, unit: Unit, encode: bool = False):
+        """
+        Renders the front of a unit's card.
+        :param nation: nation the unit belongs to.
+        :param unit: unit to render.
+        :keyword encode: return the encoded card instead of the image. Defaults to false.
+        :return: the image of the card, or its encoded bytes.
+        """
+        card = Generator(nation, unit).render_front()
+        return self.encode(card) if encode else card
+
+    def render_back(self, nation: Nation, unit: Unit, encode: bool = False):
+        """
+        Renders the back of a unit's card.
+        :param nation: nation the unit belongs to.
+        :param unit: unit to render.
+        :keyword encode: return the encoded card instead of the image. Defaults to false.
+        :return: the image of the card, or its encoded bytes.
+        """
+        card = Generator(nation, unit).render_back()
+        return self.encode(card) if encode else card
+
+    def render_many(self, work: list, full: bool = False, encode: bool = False) -> list:
+        """
+        Renders the cards of several units, capturing the failure of a unit instead of raising it.
+        :param work: list of (nation, unit) tuples to render.
+        :keyword full: whether to render the backs of the cards as well as the fronts. Defaults to false.
+        :keyword encode: return the encoded cards instead of the images. Defaults to false.
+        :return: a RenderedCard for each entry in work, in the same order.
+        """
+        results = list()
+        for nation, unit in work:
+            try:
+                back = self.render_back(nation, unit, encode) if full else None
+                results.append(RenderedCard(nation, unit, self.render_front(nation, unit, encode), back))
+            except Exception as e:
+                logger.debug(traceback.format_exc())
+                logger.error("Failed to render {}/{}: {}".format(nation.name, unit.name, e))
+                results.append(RenderedCard(nation, unit, error="{}: {}".format(type(e).__name__, e)))
+        return results
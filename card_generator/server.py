@@ -0,0 +1,286 @@
+"""
+A local HTTP service that renders cards on request, keeping the data set, assets and recently rendered cards warm
+between requests.
+
+    GET /cards/<nation>/<unit>/front.png
+    GET /cards/<nation>/<unit>/back.png
+    POST /render[?face=back]  with a nation, or list of nations, in the War at Sea JSON format as the body. The first
+                              unit of the first nation is rendered.
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, unquote, parse_qs
+
+from card_generator.models.assets import get_war_at_sea_json, Background
+from card_generator.models.utils import load_json
+from card_generator.renderer import Renderer
+from card_generator.utils.image.ResizeCache import ResizeCache
+from card_generator.utils.manifest import BuildManifest, get_card_inputs, get_unit_records
+
+logger = logging.getLogger(__name__)
+
+FACES = ("front", "back")
+
+
+class RenderCache:
+
+    def __init__(self, max_size: int = 64 * 1024 * 1024):
+        """
+        Keeps the most recently used encoded cards in memory.
+
+        :keyword max_size: maximum total size of the cached cards in bytes. The least recently used cards are evicted
+                           once the cache grows beyond this. Defaults to 64 MB.
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """
+        Gets a cached card.
+        :param key: key of the card.
+        :return: the encoded card, or None if it is not cached.
+        """
+        with self._lock:
+            card = self._entries.get(key)
+            if card is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return card
+
+    def put(self, key: str, card: bytes) -> None:
+        """
+        Caches a card, evicting the least recently used cards if the cache is full.
+        :param key: key of the card.
+        :param card: the encoded card.
+        """
+        if len(card) > self.max_size:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = card
+            self.size += len(card)
+            while self.size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        Gets the statistics of the cache.
+        :return: hit, miss and eviction counts along with the number and total size of the cached cards.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "size": self.size
+        }
+
+
+class CardService:
+
+    def __init__(self, data: list, renderer: Renderer = None, cache: RenderCache = None):
+        """
+        Renders the cards of a data set on request.
+
+        :param data: the parsed War at Sea JSON.
+        :keyword renderer: renderer session to render with, defaults to a new PNG session.
+        :keyword cache: cache of rendered cards, defaults to a 64 MB cache.
+        """
+        self.renderer = renderer if renderer is not None else Renderer()
+        self.cache = cache if cache is not None else RenderCache()
+        self.records = get_unit_records(data)
+        self.units = {(nation.name, unit.name): (nation, unit) for nation in load_json(data)
+                      for unit in nation.get_units()}
+        # rendering shares the decoded assets and font caches, so only one card is rendered at a time
+        self._render_lock = threading.Lock()
+
+    def get_unit(self, nation_name: str, unit_name: str):
+        """
+        Looks up a unit of the data set.
+        :param nation_name: name of the nation.
+        :param unit_name: name of the unit.
+        :return: a tuple of the nation, the unit and the unit's record, or None if the unit does not exist.
+        """
+        if (nation_name, unit_name) not in self.units:
+            return None
+        nation, unit = self.units[(nation_name, unit_name)]
+        return nation, unit, self.records[(nation_name, unit_name)]
+
+    @staticmethod
+    def check_names(nation, unit) -> None:
+        """
+        Checks that the names a posted unit's assets are looked up by cannot reach outside the asset folder.
+        :param nation: nation of the unit.
+        :param unit: the unit.
+        :raises ValueError: if a name is a path rather than a plain file or folder name.
+        """
+        names = {"nation": nation.name, "name": unit.name, "class": unit.ship_class}
+        if unit.blue_print_settings is not None:
+            names["blue_print_settings.file_name"] = unit.blue_print_settings.file_name
+        for field, name in names.items():
+            if name is None:
+                continue
+            if name.strip() in ("", ".", "..") or "/" in name or "\\" in name or os.sep in name or os.path.isabs(name):
+                raise ValueError("{} must be a plain name, not \"{}\"".format(field, name))
+
+    def get_etag(self, nation, unit, record: dict, face: str) -> str:
+        """
+        Gets the entity tag of a card face, which changes whenever the unit's record, its assets or the generator do.
+        :param nation: nation of the unit.
+        :param unit: the unit.
+        :param record: the unit's record.
+        :param face: front or back.
+        :return: the quoted entity tag.
+        """
+        return "\"{}-{}\"".format(BuildManifest.digest(get_card_inputs(nation, unit, record)), face)
+
+    def render(self, nation, unit, face: str, etag: str) -> bytes:
+        """
+        Gets an encoded card face, rendering it if it is not cached.
+        :param nation: nation of the unit.
+        :param unit: the unit.
+        :param face: front or back.
+        :param etag: entity tag of the card face, used as the cache key.
+        :return: the encoded card face.
+        """
+        card = self.cache.get(etag)
+        if card is None:
+            with self._render_lock:
+                if face == "back":
+                    card = self.renderer.render_back(nation, unit, encode=True)
+                else:
+                    card = self.renderer.render_front(nation, unit, encode=True)
+            self.cache.put(etag, card)
+        return card
+
+
+class CardRequestHandler(BaseHTTPRequestHandler):
+    #: the service requests are handled by, set on the server's handler class.
+    service: CardService = None
+
+    def do_GET(self):
+        segments = [unquote(segment) for segment in urlsplit(self.path).path.split("/")[1:]]
+        if len(segments) != 4 or segments[0] != "cards" or segments[3] not in ["{}.png".format(f) for f in FACES]:
+            self.send_error(HTTPStatus.NOT_FOUND, "Expected /cards/<nation>/<unit>/front.png or back.png")
+            return
+        found = self.service.get_unit(segments[1], segments[2])
+        if found is None:
+            self.send_error(HTTPStatus.NOT_FOUND, "\"{}\" unit does not exist for \"{}\"".format(segments[2],
+                                                                                                  segments[1]))
+            return
+        nation, unit, record = found
+        self._send_card(nation, unit, record, segments[3][:-len(".png")])
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/render":
+            self.send_error(HTTPStatus.NOT_FOUND, "Expected /render")
+            return
+        face = parse_qs(url.query).get("face", ["front"])[0]
+        if face not in FACES:
+            self.send_error(HTTPStatus.BAD_REQUEST, "face must be front or back")
+            return
+        try:
+            data = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            if isinstance(data, dict):
+                data = [data]
+            nation = load_json(data)[0]
+            unit = nation.get_units()[0]
+            record = data[0]["units"][0]
+            # the names are used to look up the unit's assets on disk
+            self.service.check_names(nation, unit)
+        except (Exception, SystemExit) as e:
+            # load_json exits on malformed units rather than raising
+            self.send_error(HTTPStatus.BAD_REQUEST, "Invalid unit: {}".format(e))
+            return
+        self._send_card(nation, unit, record, face)
+
+    def _send_card(self, nation, unit, record: dict, face: str) -> None:
+        """
+        Responds with a card face, or with Not Modified if the client already has the current version.
+        """
+        etag = self.service.get_etag(nation, unit, record, face)
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        try:
+            card = self.service.render(nation, unit, face, etag)
+        except Exception as e:
+            logger.exception("Failed to render {}/{}".format(nation.name, unit.name))
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, "{}: {}".format(type(e).__name__, e))
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", self.service.renderer.profile.mime_type)
+        self.send_header("Content-Length", str(len(card)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(card)
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8080, cache_size: int = 64 * 1024 * 1024) -> ThreadingHTTPServer:
+    """
+    Creates the card server, loading the data set and decoding the assets up front.
+    :keyword host: address to listen on, defaults to 127.0.0.1.
+    :keyword port: port to listen on, defaults to 8080. 0 picks a free port.
+    :keyword cache_size: maximum size of the rendered card cache in bytes, defaults to 64 MB.
+    :return: the server, ready to serve_forever.
+    """
+    data_file = get_war_at_sea_json()
+    data = json.load(data_file)
+    data_file.close()
+    handler = type("BoundCardRequestHandler", (CardRequestHandler,),
+                   {"service": CardService(data, cache=RenderCache(cache_size))})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog="War at Sea Card Server",
+                                     description="Serve rendered unit cards for the Axis and Allies War at Sea Naval "
+                                                 "Miniatures game over HTTP.")
+    parser.add_argument("-l", "--log-level", required=False, default="INFO", help="Sets the logging level, defaults to"
+                                                                                  " INFO.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on, defaults to 127.0.0.1.")
+    parser.add_argument("-p", "--port", default=8080, type=int, help="Port to listen on, defaults to 8080.")
+    parser.add_argument("--render-cache-size", default=64, type=int,
+                        help="Maximum size of the rendered card cache in megabytes, defaults to 64.")
+    parser.add_argument("--cache-dir", required=False, default=None,
+                        help="Directory to cache resized silhouettes and blueprints in between runs. Caching is "
+                             "disabled by default.")
+    parser.add_argument("--cache-size", required=False, default=256, type=int,
+                        help="Maximum size of the silhouette cache in megabytes, defaults to 256.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.getLevelName(args.log_level))
+    logging.getLogger("PIL").propagate = False
+    if args.cache_dir is not None:
+        Background.set_resize_cache(ResizeCache(args.cache_dir, args.cache_size * 1024 * 1024))
+    server = create_server(args.host, args.port, args.render_cache_size * 1024 * 1024)
+    logger.info("Serving cards on http://{}:{}".format(*server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
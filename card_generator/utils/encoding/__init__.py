@@ -0,0 +1,231 @@
+"""
+Output encoders for cards and print sheets, trading encode time against file size.
+"""
+import io
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+
+from PIL import Image, features
+
+from card_generator.utils.profiling import stage, attribute_to, current_card
+
+logger = logging.getLogger(__name__)
+
+
+class EncodeStats:
+    def __init__(self, count: int = 0, seconds: float = 0.0, size: int = 0):
+        """
+        Running totals of the images that have been encoded.
+        :keyword count: number of images encoded.
+        :keyword seconds: time spent encoding, in seconds.
+        :keyword size: total size of the encoded images, in bytes.
+        """
+        self.count = count
+        self.seconds = seconds
+        self.size = size
+
+    def add(self, seconds: float, size: int) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.size += size
+
+    def merge(self, other: 'EncodeStats') -> None:
+        self.count += other.count
+        self.seconds += other.seconds
+        self.size += other.size
+
+    def __str__(self):
+        if self.count == 0:
+            return "no images encoded"
+        return "{} images, {:.1f} MB, {:.2f}s encoding ({:.0f} ms and {:.0f} KB per image)".format(
+            self.count, self.size / (1024 * 1024), self.seconds,
+            1000 * self.seconds / self.count, self.size / (1024 * self.count))
+
+
+class OutputProfile:
+
+    def __init__(self, name: str, image_format: str, extension: str, feature: str = None, flatten: bool = False,
+                 **options):
+        """
+        How images are encoded when they are written out.
+
+        :param name: name of the profile, as selected on the command line.
+        :param image_format: Pillow format to encode with.
+        :param extension: file extension of the encoded images, including the leading dot.
+        :keyword feature: Pillow feature the format depends on, if it is optional.
+        :keyword flatten: whether the format lacks an alpha channel, in which case images are flattened onto white.
+        :keyword options: options passed to Image.save.
+        """
+        self.name = name
+        self.image_format = image_format
+        self.extension = extension
+        self.feature = feature
+        self.flatten = flatten
+        self.options = options
+
+    @property
+    def mime_type(self) -> str:
+        return Image.MIME[self.image_format.upper()]
+
+    def is_available(self) -> bool:
+        """
+        Checks whether the installed Pillow can encode this profile's format.
+        :return: True if the format can be encoded.
+        """
+        return self.feature is None or bool(features.check(self.feature))
+
+    def encode(self, image: Image.Image) -> bytes:
+        """
+        Encodes an image.
+        :param image: image to encode.
+        :return: the encoded image.
+        """
+        if self.flatten and image.mode != "RGB":
+            flattened = Image.new("RGB", image.size, (255, 255, 255))
+            flattened.paste(image, mask=image.getchannel("A") if "A" in image.getbands() else None)
+            image = flattened
+        buffer = io.BytesIO()
+        image.save(buffer, self.image_format, **self.options)
+        return buffer.getvalue()
+
+    def save(self, image: Image.Image, path: str, stats: EncodeStats = None) -> int:
+        """
+        Encodes an image and writes it out, creating the folder it is written to if it does not exist.
+        :param image: image to write.
+        :param path: path to write the image to.
+        :keyword stats: totals to add the encode time and size to.
+        :return: size of the written image in bytes.
+        """
+        start = time.perf_counter()
+        with stage("encode"):
+            encoded = self.encode(image)
+        if stats is not None:
+            stats.add(time.perf_counter() - start, len(encoded))
+        with stage("write"):
+            OutputProfile.write(encoded, path)
+        return len(encoded)
+
+    @staticmethod
+    def write(encoded: bytes, path: str) -> None:
+        """
+        Writes out an encoded image, creating the folder it is written to if it does not exist.
+        :param encoded: the encoded image.
+        :param path: path to write the image to.
+        """
+        try:
+            with open(path, "wb") as image_file:
+                image_file.write(encoded)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as image_file:
+                image_file.write(encoded)
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class AsyncWriter:
+
+    def __init__(self, threads: int = 2, queue_depth: int = 4):
+        """
+        Encodes and writes images on a pool of threads, so that the next image can be rendered while the previous ones
+        are written. Pillow releases the GIL while compressing, so the encoding overlaps with rendering.
+
+        :keyword threads: number of threads encoding and writing images, defaults to 2.
+        :keyword queue_depth: maximum number of images handed to the writer that have not been written yet, submitting
+                              another blocks until one has been written. Bounds the memory held by rendered images that
+                              are waiting to be written. Defaults to 4.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="image-writer")
+        self._slots = threading.BoundedSemaphore(max(queue_depth, 1))
+        self._stats_lock = threading.Lock()
+        self._pending = set()
+
+    def submit(self, profile: OutputProfile, image: Image.Image, path: str, stats: EncodeStats = None) -> Future:
+        """
+        Hands an image to the writer. The image must not be modified afterwards.
+        :param profile: output profile to encode the image with.
+        :param image: image to write.
+        :param path: path to write the image to.
+        :keyword stats: totals to add the encode time and size to.
+        :return: a future that completes once the image has been written, raising any error that occurred.
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._save, profile, image, path, stats, current_card())
+        except BaseException:
+            self._slots.release()
+            raise
+        self._pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _save(self, profile: OutputProfile, image: Image.Image, path: str, stats: EncodeStats, card: str) -> int:
+        with attribute_to(card):
+            start = time.perf_counter()
+            with stage("encode"):
+                encoded = profile.encode(image)
+            if stats is not None:
+                with self._stats_lock:
+                    stats.add(time.perf_counter() - start, len(encoded))
+            with stage("write"):
+                OutputProfile.write(encoded, path)
+        logger.debug("saved to {}".format(path))
+        return len(encoded)
+
+    def _done(self, future: Future) -> None:
+        self._pending.discard(future)
+        self._slots.release()
+
+    def flush(self) -> None:
+        """
+        Waits for every image that has been handed to the writer to be written.
+        """
+        wait(list(self._pending))
+
+    def close(self) -> None:
+        """
+        Flushes the writer and stops its threads.
+        """
+        self.flush()
+        self._executor.shutdown()
+
+    def __enter__(self) -> 'AsyncWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+#: available output profiles, keyed by name.
+PROFILES = {
+    # Pillow's default PNG settings
+    "png": OutputProfile("png", "png", ".png"),
+    "fast-png": OutputProfile("fast-png", "png", ".png", compress_level=1),
+    "small-png": OutputProfile("small-png", "png", ".png", optimize=True),
+    "webp": OutputProfile("webp", "webp", ".webp", feature="webp", lossless=True, quality=100, method=4),
+    "jpeg": OutputProfile("jpeg", "jpeg", ".jpg", flatten=True, quality=95, subsampling=0)
+}
+
+DEFAULT_PROFILE = PROFILES["png"]
+
+
+def get_profile(name: str) -> OutputProfile:
+    """
+    Looks up an output profile.
+    :param name: name of the profile.
+    :return: the profile.
+    :raises ValueError: if the profile does not exist or its format is not supported by the installed Pillow.
+    """
+    if name not in PROFILES:
+        raise ValueError("\"{}\" is not an output profile, expected one of {}".format(name, ", ".join(PROFILES)))
+    profile = PROFILES[name]
+    if not profile.is_available():
+        raise ValueError("The installed Pillow was built without {} support".format(profile.feature))
+    return profile
@@ -4,6 +4,7 @@ A collection of utility classes and functions that improve code readability and
 
 
 import logging
+import re
 from typing import Tuple
 
 import numpy as np
@@ -12,11 +13,14 @@ from PIL import ImageFont
 from PIL.ImageDraw import Draw
 
 from card_generator.models.assets import Colors
+from card_generator.utils.profiling import count
 
 log = logging.getLogger(__name__)
 
 
 class ImageTextWrap:
+    # words along with their trailing spaces, and line breaks
+    _TOKENS = re.compile(r"\n|[^ \n]+ *| +")
 
     def __init__(self, font: ImageFont.FreeTypeFont,
                  image: Image.Image,
@@ -33,15 +37,47 @@ class ImageTextWrap:
         """
         self._font = font
         self._image = image
-        self._pixels = np.array(image)
         self._image_width = image.size[0]
         self._image_height = image.size[1]
         self._wrap_over = wrap_over
         self._margin = margin
         self._last_x_pixel_checked = 0
         self._last_x_pixel_written = 0
+        self._writable = self._build_writable_mask(np.asarray(image), wrap_over)
+        # cumulative count of blocked columns for each band of rows that has been checked
+        self._blocked_columns = dict()
+        self._token_lengths = dict()
         log.debug(f"Image width: {self._image_width}, height: {self._image_height}")
 
+    @staticmethod
+    def _build_writable_mask(pixels: np.ndarray, wrap_over: list) -> np.ndarray:
+        """
+        Builds a mask of the pixels that text can be written over.
+
+        :param pixels: image pixels, with shape (height, width, channels)
+        :param wrap_over: pixel values that text can be displayed over
+        :return: a boolean array with shape (height, width) that is True where text can be written.
+        """
+        writable = np.zeros(pixels.shape[:2], dtype=bool)
+        for value in wrap_over:
+            writable |= (pixels == np.asarray(value, dtype=pixels.dtype)).all(axis=2)
+        return writable
+
+    def _get_blocked_columns(self, y_start: int, y_end: int) -> np.ndarray:
+        """
+        Gets the cumulative count of blocked columns for a band of rows, where a column is blocked if any of its pixels
+        within the band cannot be written over.
+
+        :param y_start: first row of the band
+        :param y_end: row after the last row of the band
+        :return: array where index x holds the number of blocked columns before x.
+        """
+        band = (y_start, y_end)
+        if band not in self._blocked_columns:
+            blocked = ~self._writable[y_start:y_end].all(axis=0)
+            self._blocked_columns[band] = np.concatenate(([0], np.cumsum(blocked)))
+        return self._blocked_columns[band]
+
     @staticmethod
     def _split_last_word(buffer: str) -> Tuple[str, str]:
         """
@@ -77,26 +113,59 @@ class ImageTextWrap:
         :param buffer_height: height of the current buffer
         :return: True is the checked area is blank, otherwise False.
         """
-        log.debug(f"Checking pixels {self._last_x_pixel_checked},{y_offset} "
-                  f"to {buffer_width},{y_offset + buffer_height - 1}")
-        for y in range(y_offset, y_offset + buffer_height - 1):
-            for x in range(self._last_x_pixel_checked, buffer_width + 1):
-                log.debug(f"Checking pixel at {x},{y}")
-                pixel = self._pixels[y][x].tolist()
-                if pixel not in self._wrap_over:
-                    self._last_x_pixel_checked = start_x
-                    log.debug(f"Unsafe pixel detected at {x}, {y} with value {pixel}, wrapping text")
-                    return False
-        log.debug(f"All pixels are safe, setting last checked x to {buffer_width}")
+        # only the columns that have not been checked since the last wrap need checking
+        x_start = self._last_x_pixel_checked
+        x_end = min(buffer_width, self._image_width - 1)
+        count("wrap.pixel_checks")
+        if y_offset < y_offset + buffer_height - 1 and x_start <= x_end:
+            blocked_columns = self._get_blocked_columns(y_offset, y_offset + buffer_height - 1)
+            if blocked_columns[x_end + 1] - blocked_columns[x_start] > 0:
+                self._last_x_pixel_checked = start_x
+                log.debug(f"Unsafe pixel detected between {x_start},{y_offset} and {x_end},"
+                          f"{y_offset + buffer_height - 2}, wrapping text")
+                return False
         self._last_x_pixel_checked = buffer_width
         return True
 
+    def _get_length(self, token: str) -> float:
+        """
+        Gets the advance of a token, measuring each distinct token only once.
+
+        :param token: token to measure
+        :return: the advance of the token in pixels.
+        """
+        length = self._token_lengths.get(token)
+        if length is None:
+            length = self._token_lengths[token] = self._font.getlength(token)
+        return length
+
+    def _get_wrap_width(self, y_offset: int, buffer_height: int) -> int:
+        """
+        Gets the buffer width at which the current line has to wrap, either because it reaches the edge of the image
+        or because it runs into the first unsafe pixel after the last checked column.
+
+        :param y_offset: current y offset
+        :param buffer_height: height of the current buffer
+        :return: the smallest buffer width that will not fit on the current line.
+        """
+        if not y_offset < y_offset + buffer_height - 1 or self._last_x_pixel_checked >= self._image_width:
+            return self._image_width
+        blocked_columns = self._get_blocked_columns(y_offset, y_offset + buffer_height - 1)
+        blocked_before = blocked_columns[self._last_x_pixel_checked]
+        if blocked_before == blocked_columns[-1]:
+            return self._image_width
+        return int(np.searchsorted(blocked_columns, blocked_before, side="right")) - 1
+
     def wrap_around(self, text: str,
                     font_gap: int = 2,
                     start_coord: tuple[int, int] = (0, 0)) -> Image.Image:
         """
         Wraps text around the non-transparent part of an image.
 
+        The text is added a word at a time using the cached advance of each word, words that end well clear of the
+        wrap width are added without measuring the line. The line is only measured a character at a time close to where
+        it has to wrap.
+
         :param text: text to wrap
         :param font_gap:
         :param start_coord:
@@ -109,48 +178,74 @@ class ImageTextWrap:
         # buffers for holding words between writing
         exchange_buffer = ""
         buffer = ""
+        # estimated advance of the buffer, words are added to it as long as it stays below the wrap width
+        buffer_length = 0.0
+        wrap_width = 0
+        # words have been added to the buffer without measuring it
+        buffer_measured = True
         # offset down the image to check
         y_offset = start_coord[1]
         # a place to fit the current buffer has been found
         fit_found = True
         # start a new line
         new_line = True
-        for i, character in enumerate(text):
-            if new_line:
-                buffer = exchange_buffer
-                exchange_buffer = ""
-                new_line = False
-            buffer += character
-            buffer_width = self._font.getsize(buffer)[0]
-            buffer_width += start_coord[0]
-            if y_offset + font_height >= self._image_height:
-                log.warning("The rest of the text could not be wrapped.")
+        out_of_room = False
+        for token in self._TOKENS.findall(text):
+            # glyphs never extend more than a font size past their advance, so none of the characters of a word that
+            # ends that far before the wrap width can cause the line to wrap
+            if not new_line and token != "\n" and \
+                    start_coord[0] + buffer_length + self._get_length(token) + font_height < wrap_width:
+                buffer += token
+                buffer_length += self._get_length(token)
+                buffer_measured = False
+                continue
+            if not buffer_measured and not new_line:
+                self._last_x_pixel_checked = self._font.getsize(buffer)[0] + start_coord[0]
+            for character in token:
+                if new_line:
+                    buffer = exchange_buffer
+                    exchange_buffer = ""
+                    new_line = False
+                buffer += character
+                buffer_width = self._font.getsize(buffer)[0]
+                buffer_width += start_coord[0]
+                if y_offset + font_height >= self._image_height:
+                    log.warning("The rest of the text could not be wrapped.")
+                    out_of_room = True
+                    break
+                # if the width of the line is greater than the width of the image we are producing, break the line
+                if buffer_width >= self._image_width or character == "\n" or\
+                        not self._is_blank_area(buffer_width, y_offset, font_height, start_x=start_coord[0]):
+                    if character == "\n":
+                        buffer = buffer.strip("\n")
+                    else:
+                        buffer, exchange_buffer = self._split_last_word(buffer)
+                    new_line = True
+                    if buffer == "":
+                        # only one word was in the buffer, find a place to put it before continuing
+                        log.debug("Single word found that may not fit, checking next line")
+                        fit_found = False
+                        while not fit_found:
+                            y_offset += font_height
+                            if y_offset + font_height >= self._image_height:
+                                # we have run out of room.
+                                break
+                            fit_found = self._is_blank_area(buffer_width, y_offset, font_height)
+                    if fit_found:
+                        lines.append(buffer)
+                    y_offset += font_height
+            if out_of_room:
                 break
-            # if the width of the line is greater than the width of the image we are producing, break the line
-            log.debug(f"checking character: {character}")
-            if buffer_width >= self._image_width or character == "\n" or\
-                    not self._is_blank_area(buffer_width, y_offset, font_height, start_x=start_coord[0]):
-                if character == "\n":
-                    buffer = buffer.strip("\n")
-                else:
-                    buffer, exchange_buffer = self._split_last_word(buffer)
-                new_line = True
-                if buffer == "":
-                    # only one word was in the buffer, find a place to put it before continuing
-                    log.debug("Single word found that may not fit, checking next line")
-                    fit_found = False
-                    while not fit_found:
-                        y_offset += font_height
-                        if y_offset + font_height >= self._image_height:
-                            # we have run out of room.
-                            break
-                        fit_found = self._is_blank_area(buffer_width, y_offset, font_height)
-                if fit_found:
-                    lines.append(buffer)
-                y_offset += font_height
+            if not new_line:
+                buffer_length = self._font.getlength(buffer)
+                buffer_measured = True
+                wrap_width = self._get_wrap_width(y_offset, font_height)
+        else:
             # catch the last line
-            elif i == len(text) - 1:
+            if not new_line:
                 lines.append(buffer)
+                if not buffer_measured:
+                    self._last_x_pixel_checked = self._font.getsize(buffer)[0] + start_coord[0]
         y_offset = 0 + start_coord[1]
         for line in lines:
             base_draw.text((0 + start_coord[0], y_offset), line, font=self._font, fill=Colors.WHITE)
@@ -0,0 +1,144 @@
+"""
+A persistent, size bounded cache of resized images.
+"""
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from typing import Callable
+
+from PIL import Image
+
+from card_generator.utils.profiling import count
+
+log = logging.getLogger(__name__)
+
+
+class ResizeCache:
+
+    def __init__(self, cache_dir: str, max_size: int = 256 * 1024 * 1024):
+        """
+        Stores the final result of resizing an image on disk so that later runs can skip both decoding the source and
+        resampling it. Entries are keyed by the content hash of the source image, the sizes it was resized through and
+        the resampling filter, so a changed asset never hits a stale entry.
+
+        :param cache_dir: directory to keep the cached images in, created if it does not exist.
+        :keyword max_size: maximum total size of the cached images in bytes. The least recently used entries are evicted
+                           once the cache grows beyond this. Defaults to 256 MB.
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _entry_name(digest: str, sizes: list, resample: int) -> str:
+        """
+        Builds the file name of a cache entry.
+        :param digest: content hash of the source image.
+        :param sizes: sizes the source is resized through, in order.
+        :param resample: resampling filter.
+        :return: the file name of the entry.
+        """
+        sizes = "-".join("{}x{}".format(w, h) for w, h in sizes)
+        return "{}_{}_{}.png".format(digest, sizes, int(resample))
+
+    def get(self, source: bytes, plan: Callable[[tuple[int, int]], list],
+            resample: int = Image.Resampling.BICUBIC) -> Image.Image:
+        """
+        Gets the resized RGBA image for a source image.
+
+        :param source: encoded source image.
+        :param plan: callable taking the size of the source image and returning the list of sizes to resize it through.
+                     The size is read from the image header, so planning does not decode the image.
+        :keyword resample: resampling filter used for every resize, defaults to bicubic.
+        :return: the resized image.
+        """
+        source_image = Image.open(io.BytesIO(source))
+        sizes = plan(source_image.size)
+        path = os.path.join(self.cache_dir,
+                            self._entry_name(hashlib.sha256(source).hexdigest(), sizes, resample))
+        try:
+            image = Image.open(path)
+            image.load()
+            # mark the entry as recently used
+            os.utime(path)
+            self.hits += 1
+            count("cache.resize.hits")
+            return image
+        except (FileNotFoundError, OSError):
+            self.misses += 1
+            count("cache.resize.misses")
+        image = ResizeCache.resize(source_image, sizes, resample)
+        self._store(path, image)
+        return image
+
+    @staticmethod
+    def resize(image: Image.Image, sizes: list, resample: int = Image.Resampling.BICUBIC) -> Image.Image:
+        """
+        Converts an image to RGBA and resizes it through each of the given sizes.
+        :param image: image to resize.
+        :param sizes: sizes to resize the image through, in order.
+        :keyword resample: resampling filter used for every resize, defaults to bicubic.
+        :return: the resized image.
+        """
+        image = image.convert("RGBA")
+        for size in sizes:
+            image = image.resize(size, resample)
+        return image
+
+    def _store(self, path: str, image: Image.Image) -> None:
+        """
+        Writes an entry to the cache. The entry is written to a temporary file first so that other processes sharing
+        the cache never read a partially written image.
+        :param path: path of the entry.
+        :param image: image to store.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(file_descriptor, "wb") as temp_file:
+                image.save(temp_file, "png")
+            os.replace(temp_path, path)
+        except OSError as e:
+            log.warning(f"Unable to write {path} to the resize cache: {e}")
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        Removes the least recently used entries until the cache fits within its maximum size.
+        """
+        entries = list()
+        total_size = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".png"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+        if total_size <= self.max_size:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # another process has already evicted it
+                pass
+            self.evictions += 1
+            total_size -= size
+            log.debug(f"Evicted {path} from the resize cache")
+            if total_size <= self.max_size:
+                break
+
+    def stats(self) -> dict:
+        """
+        Gets the statistics of the cache.
+        :return: hit, miss and eviction counts.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
@@ -64,4 +64,24 @@ def expand_transparent_area(x_scale: float, y_scale: float, img: Image.Image) ->
     return final_image
 
 
+def alpha_composite_region(base: Image.Image, overlay: Image.Image) -> Image.Image:
+    """
+    Alpha composites an overlay onto an image in place. Only the bounding box of the overlay's visible pixels is
+    composited, everything outside of it would be left unchanged by a full composite anyway.
+    :param base: image to composite onto, modified in place.
+    :param overlay: overlay the same size as the base.
+    :return: the base image.
+    """
+    bbox = overlay.getchannel("A").getbbox()
+    if bbox is not None:
+        base.alpha_composite(overlay, dest=bbox[:2], source=bbox)
+    return base
+
 
+def __getattr__(name: str):
+    # screen_blend is the only helper needing numpy, which is only imported once the first card is blended so that
+    # commands that never blend, such as laying out print sheets, start faster
+    if name == "screen_blend":
+        from card_generator.utils.image.blend import screen_blend
+        return screen_blend
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
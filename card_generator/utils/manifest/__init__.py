@@ -0,0 +1,243 @@
+"""
+Build manifests used to only regenerate the cards and print sheets whose inputs have changed.
+"""
+import hashlib
+import json
+import logging
+import os
+
+from card_generator.models.alliance import Alliance
+from card_generator.models.assets import RESOURCES, Fonts
+from card_generator.models.nation import Nation
+from card_generator.models.unit import Unit
+
+logger = logging.getLogger(__name__)
+
+#: assets shared by every card, relative to the package assets.
+SHARED_ASSETS = [Fonts.NORFOLK, Fonts.ROBOTO_SLAB_REGULAR, Fonts.ROBOTO_SLAB_BOLD, "hitpoints.png", "card-icons"]
+
+_file_hashes = dict()
+_shared_asset_hashes = None
+_generator_version = None
+
+
+def hash_file(path) -> str:
+    """
+    Hashes the contents of a file, remembering the result for the rest of the run.
+    :param path: path of the file.
+    :return: the SHA-256 of the file, or "missing" if the file does not exist.
+    """
+    path = str(path)
+    if path not in _file_hashes:
+        try:
+            with open(path, "rb") as file:
+                _file_hashes[path] = hashlib.sha256(file.read()).hexdigest()
+        except FileNotFoundError:
+            _file_hashes[path] = "missing"
+    return _file_hashes[path]
+
+
+def hash_record(record) -> str:
+    """
+    Hashes a JSON record, independent of its key order.
+    :param record: record to hash.
+    :return: the SHA-256 of the record.
+    """
+    return hashlib.sha256(json.dumps(record, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def generator_version() -> str:
+    """
+    Gets the version of the generator, a hash of the package source code. Any change to the code is treated as a
+    change to every card.
+    :return: the generator version.
+    """
+    global _generator_version
+    if _generator_version is None:
+        package = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        digest = hashlib.sha256()
+        for root, dirs, files in sorted(os.walk(package)):
+            dirs.sort()
+            for file in sorted(files):
+                if file.endswith(".py"):
+                    path = os.path.join(root, file)
+                    digest.update(os.path.relpath(path, package).encode("utf-8"))
+                    digest.update(hash_file(path).encode("utf-8"))
+        _generator_version = digest.hexdigest()
+    return _generator_version
+
+
+def _shared_assets() -> dict:
+    """
+    Hashes the assets that are shared by every card.
+    :return: a mapping of asset path to hash.
+    """
+    global _shared_asset_hashes
+    if _shared_asset_hashes is None:
+        _shared_asset_hashes = dict()
+        for asset in SHARED_ASSETS:
+            resource = RESOURCES / asset
+            if resource.is_dir():
+                for child in sorted(resource.iterdir(), key=lambda r: r.name):
+                    if child.is_file():
+                        _shared_asset_hashes["{}/{}".format(asset, child.name)] = hash_file(child)
+            else:
+                _shared_asset_hashes[asset] = hash_file(resource)
+    return _shared_asset_hashes
+
+
+def get_card_assets(nation: Nation, unit: Unit) -> list:
+    """
+    Gets the assets that are specific to a unit's card.
+    :param nation: nation of the unit.
+    :param unit: the unit.
+    :return: asset paths relative to the package assets.
+    """
+    if nation.get_alliance() == Alliance.Allies.value:
+        assets = ["allies-card-base.png", "allies-card-back.png"]
+    else:
+        assets = ["axis-card-base.png", "axis-card-back.png"]
+    assets.append("nation-emblems/{}-sm.png".format(nation.name))
+    if unit.ship_class is not None:
+        folder = "silhouettes/ships/{}".format(nation.name)
+        silhouette = unit.ship_class.lower()
+    else:
+        folder = "silhouettes/planes/{}".format(nation.name)
+        silhouette = unit.name.lower()
+    blueprint = silhouette
+    if unit.blue_print_settings is not None and unit.blue_print_settings.file_name is not None:
+        blueprint = unit.blue_print_settings.file_name
+    assets.append("{}/{}.png".format(folder, silhouette))
+    assets.append("{}/{} blueprint.png".format(folder, blueprint))
+    return assets
+
+
+def get_card_inputs(nation: Nation, unit: Unit, record: dict) -> dict:
+    """
+    Gets everything a card depends on.
+    :param nation: nation of the unit.
+    :param unit: the unit.
+    :param record: the unit's record from the data set.
+    :return: a mapping of input name to hash.
+    """
+    inputs = {"generator": generator_version(), "record": hash_record(record)}
+    inputs.update(_shared_assets())
+    for asset in get_card_assets(nation, unit):
+        inputs[asset] = hash_file(RESOURCES.joinpath(*asset.split("/")))
+    return inputs
+
+
+def get_unit_records(data: list) -> dict:
+    """
+    Indexes the raw unit records of the data set.
+    :param data: the parsed War at Sea JSON.
+    :return: a mapping of (nation name, unit name) to the unit's record.
+    """
+    return {(nation["name"], unit["name"]): unit for nation in data for unit in nation["units"]}
+
+
+class BuildManifest:
+    """
+    Records the inputs each output was built from, so that outputs whose inputs have not changed can be skipped.
+    """
+    CARDS_FILE_NAME = "cards-manifest.json"
+    SHEETS_FILE_NAME = "sheets-manifest.json"
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: path of the manifest file. Outputs are recorded relative to the folder containing it.
+        """
+        self.path = path
+        self.folder = os.path.dirname(os.path.abspath(path))
+        self.entries = dict()
+
+    @staticmethod
+    def load(path: str) -> 'BuildManifest':
+        """
+        Loads a manifest, starting an empty one if it does not exist or cannot be read.
+        :param path: path of the manifest file.
+        :return: the manifest.
+        """
+        manifest = BuildManifest(path)
+        try:
+            with open(path, "r") as manifest_file:
+                manifest.entries = json.load(manifest_file)["entries"]
+        except FileNotFoundError:
+            logger.info(f"No build manifest found at {path}, building everything")
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable build manifest {path}: {e}")
+        return manifest
+
+    @staticmethod
+    def digest(inputs: dict) -> str:
+        """
+        Combines the hashes of a set of inputs.
+        :param inputs: mapping of input name to hash.
+        :return: the combined hash.
+        """
+        return hash_record(inputs)
+
+    def is_current(self, key: str, inputs: dict, outputs: list = None) -> bool:
+        """
+        Checks whether an output is up-to-date.
+        :param key: name of the output.
+        :param inputs: the current inputs of the output.
+        :param outputs: paths of the files the output is expected to consist of, defaults to the recorded files.
+        :return: True if the output was built from the same inputs and all of its files still exist.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry["inputs"] != self.digest(inputs):
+            return False
+        recorded = set(entry["outputs"])
+        if outputs is None:
+            outputs = [os.path.join(self.folder, output) for output in recorded]
+        return all(self._relative(output) in recorded and os.path.exists(output) for output in outputs)
+
+    def record(self, key: str, inputs: dict, outputs: list) -> None:
+        """
+        Records that an output was built, removing the files it previously consisted of that it no longer does.
+        :param key: name of the output.
+        :param inputs: the inputs it was built from.
+        :param outputs: paths of the files the output consists of.
+        """
+        outputs = [self._relative(o) for o in outputs]
+        previous = self.entries.get(key)
+        if previous is not None:
+            for output in previous["outputs"]:
+                if output not in outputs:
+                    self._delete(output)
+        self.entries[key] = {"inputs": self.digest(inputs), "outputs": outputs}
+
+    def remove(self, key: str) -> None:
+        """
+        Removes an output and its files.
+        :param key: name of the output.
+        """
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for output in entry["outputs"]:
+            self._delete(output)
+
+    def keys(self) -> list:
+        return list(self.entries.keys())
+
+    def save(self) -> None:
+        """
+        Writes the manifest.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as manifest_file:
+            json.dump({"entries": self.entries}, manifest_file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def _delete(self, output: str) -> None:
+        try:
+            os.remove(os.path.join(self.folder, output))
+            logger.info(f"Removed stale output {output}")
+        except FileNotFoundError:
+            pass
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.folder)
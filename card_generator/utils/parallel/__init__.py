@@ -0,0 +1,192 @@
+"""
+Utilities for spreading card rendering across multiple processes.
+"""
+import logging
+import math
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from card_generator.models.assets import Background
+from card_generator.models.nation import Nation
+from card_generator.models.unit import Unit
+from card_generator.utils.encoding import OutputProfile, EncodeStats, AsyncWriter, DEFAULT_PROFILE
+from card_generator.utils.image.ResizeCache import ResizeCache
+from card_generator.utils.profiling import Trace, card, get_recorder, set_recorder
+
+logger = logging.getLogger(__name__)
+
+#: number of threads encoding and writing cards in each process.
+WRITER_THREADS = 2
+
+#: number of batches the work is split into for each worker process. Each batch is written before the worker takes the
+#: next, so more batches balance the work better but write less of it in the background.
+BATCHES_PER_PROCESS = 4
+
+# writer of the current worker process
+_worker_writer = None
+# trace of the current worker process, sent back to the parent with each card when profiling
+_worker_trace = None
+
+
+class CardResult:
+    def __init__(self, nation: str, unit: str, error: str = None, encode_stats: EncodeStats = None):
+        """
+        Outcome of rendering a single unit.
+        :param nation: name of the nation the unit belongs to.
+        :param unit: name of the unit.
+        :param error: description of the failure, None if the card rendered successfully.
+        :param encode_stats: time spent encoding the unit's cards and their size.
+        """
+        self.nation = nation
+        self.unit = unit
+        self.error = error
+        self.encode_stats = encode_stats if encode_stats is not None else EncodeStats()
+        #: trace events and counters recorded rendering the unit in a worker process, None unless profiling
+        self.trace = None
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+    def __str__(self):
+        return "{}/{}".format(self.nation, self.unit)
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def _init_worker(log_level: int, resize_cache: ResizeCache = None, queue_depth: int = 0, trace: bool = False) -> None:
+    """
+    Prepares a worker process. Importing the generator decodes the card assets, so this happens once per worker
+    rather than once per card.
+    :param log_level: logging level of the parent process.
+    :param resize_cache: resize cache configured in the parent process.
+    :param queue_depth: number of cards the worker's writer may hold, 0 writes each card before rendering the next.
+    :param trace: whether to trace the cards the worker renders.
+    """
+    global _worker_writer, _worker_trace
+    logging.basicConfig(level=log_level)
+    logging.getLogger("PIL").propagate = False
+    Background.set_resize_cache(resize_cache)
+    if queue_depth > 0:
+        _worker_writer = AsyncWriter(WRITER_THREADS, queue_depth)
+    if trace:
+        _worker_trace = Trace()
+        set_recorder(_worker_trace)
+
+
+def _generate(nation: Nation, unit: Unit, output_folder: str = None, full: bool = False,
+              profile: OutputProfile = DEFAULT_PROFILE, writer: AsyncWriter = None) -> tuple:
+    """
+    Renders the card(s) for a single unit, capturing any failure instead of raising it.
+    :param nation: nation the unit belongs to.
+    :param unit: unit to render.
+    :param output_folder: folder to dump the cards to, defaults to the current directory.
+    :param full: whether to generate the back of the card as well as the front.
+    :param profile: output profile to write the cards with.
+    :param writer: writer to hand the cards to, None writes them before returning.
+    :return: the generator, whose cards may still be being written, and the result of the render.
+    """
+    from card_generator import Generator
+    generator = Generator(nation, unit, profile, writer)
+    try:
+        with card("{}/{}".format(nation.name, unit.name)):
+            if full:
+                generator.generate_back(output_folder=output_folder)
+            generator.generate_front(output_folder=output_folder)
+        return generator, CardResult(nation.name, unit.name)
+    except Exception as e:
+        logger.debug(traceback.format_exc())
+        return generator, CardResult(nation.name, unit.name, "{}: {}".format(type(e).__name__, e))
+
+
+def _finish_card(generator, result: CardResult) -> CardResult:
+    """
+    Waits for the cards of a unit to be written, recording any failure to write them.
+    :param generator: the generator that rendered the unit.
+    :param result: the result of rendering the unit.
+    :return: the result, including the time spent encoding the cards.
+    """
+    try:
+        generator.wait_for_writes()
+    except Exception as e:
+        logger.debug(traceback.format_exc())
+        if not result.failed:
+            result.error = "{}: {}".format(type(e).__name__, e)
+    result.encode_stats = generator.encode_stats
+    return result
+
+
+def _render_batch(batch: list, output_folder: str = None, full: bool = False,
+                  profile: OutputProfile = DEFAULT_PROFILE) -> list:
+    """
+    Renders and writes the card(s) for a batch of units in a worker process. The cards are handed to the worker's
+    writer, if it has one, so that each card is written while the next one renders, and are all written before the
+    results are returned.
+    :param batch: list of (nation, unit) tuples to render.
+    :param output_folder: folder to dump the cards to, defaults to the current directory.
+    :param full: whether to generate the back of the card as well as the front.
+    :param profile: output profile to write the cards with.
+    :return: the result of each unit in the batch, in the same order.
+    """
+    rendered = [_generate(nation, unit, output_folder, full, profile, _worker_writer) for nation, unit in batch]
+    results = [_finish_card(generator, result) for generator, result in rendered]
+    if _worker_trace is not None and len(results) > 0:
+        # the batch's events are attributed to their cards, so they are sent back together with the first result
+        results[0].trace = _worker_trace.drain()
+    return results
+
+
+def render_units(work: list, output_folder: str = None, full: bool = False, jobs: int = 1,
+                 profile: OutputProfile = DEFAULT_PROFILE, queue_depth: int = 4) -> list:
+    """
+    Renders a list of units, optionally spread over a pool of worker processes.
+    :param work: list of (nation, unit) tuples to render.
+    :param output_folder: folder to dump the cards to, defaults to the current directory.
+    :param full: whether to generate both the front and backs of the cards.
+    :param jobs: number of worker processes to use. 1 renders in the current process, 0 uses every available core.
+    :param profile: output profile to write the cards with, defaults to PNG at Pillow's default settings.
+    :param queue_depth: number of rendered cards each process may hand to background threads to be encoded and written
+                        while it renders the next card. 0 writes each card before rendering the next. Defaults to 4.
+    :return: a CardResult for each entry in work, in the same order.
+    """
+    if jobs is None or jobs < 1:
+        jobs = os.cpu_count() or 1
+    # only the nation's name and alliance are needed by a worker, avoid sending every unit of the nation with each card
+    work = [(Nation(nation.name, nation.alliance), unit) for nation, unit in work]
+    if jobs == 1 or len(work) <= 1:
+        if queue_depth > 0:
+            # the writer is flushed once every card has been rendered
+            with AsyncWriter(WRITER_THREADS, queue_depth) as writer:
+                rendered = [_generate(nation, unit, output_folder, full, profile, writer) for nation, unit in work]
+            results = [_finish_card(generator, result) for generator, result in rendered]
+        else:
+            results = _render_batch(work, output_folder, full, profile)
+    else:
+        jobs = min(jobs, len(work))
+        logger.info("Rendering {} units across {} processes".format(len(work), jobs))
+        size = math.ceil(len(work) / (jobs * BATCHES_PER_PROCESS))
+        batches = [work[start:start + size] for start in range(0, len(work), size)]
+        with ProcessPoolExecutor(max_workers=jobs,
+                                 initializer=_init_worker,
+                                 initargs=(logging.getLogger().getEffectiveLevel(),
+                                           Background.resize_cache,
+                                           queue_depth,
+                                           isinstance(get_recorder(), Trace))) as executor:
+            results = [result for batch in executor.map(_render_batch,
+                                                        batches,
+                                                        [output_folder] * len(batches),
+                                                        [full] * len(batches),
+                                                        [profile] * len(batches))
+                       for result in batch]
+    encode_stats = EncodeStats()
+    for result in results:
+        encode_stats.merge(result.encode_stats)
+        if result.trace is not None:
+            get_recorder().merge(*result.trace)
+        if result.failed:
+            logger.error("Failed to generate {}: {}".format(result, result.error))
+    if len(results) > 0:
+        logger.info("Encoded cards with the {} profile: {}".format(profile, encode_stats))
+    return results
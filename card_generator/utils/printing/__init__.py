@@ -2,34 +2,43 @@
 import logging
 import math
 import os
-import queue
+import threading
+import time
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from queue import Queue
 
 from PIL import Image
 
 from card_generator import Colors
+from card_generator.utils.encoding import OutputProfile, EncodeStats, DEFAULT_PROFILE
+from card_generator.utils.printing.pdf import PdfWriter, FILTERS, supports
+from card_generator.utils.profiling import stage
 
 logger = logging.getLogger(__name__)
 
 
 class Card:
-    def __init__(self, path_for_front: str, has_back: bool, card_format: 'CardFormat', ppi: int):
+    def __init__(self, path_for_front: str, has_back: bool, card_format: 'CardFormat', ppi: int,
+                 front_image: Image.Image = None, back_image: Image.Image = None):
         """
         Class representing the front and back of a card.
         :param path_for_front:
         :param has_back:
+        :keyword front_image: already rendered front of the card, used instead of reading path_for_front.
+        :keyword back_image: already rendered back of the card, used instead of reading the back from disk.
         """
         self.front_path = path_for_front
-        if has_back:
-            self.back_path = path_for_front.replace(".png", "-back.png")
+        self.front_image = front_image
+        self.back_image = back_image
+        if has_back and path_for_front is not None:
+            self.back_path = Card.get_back_path(path_for_front)
         else:
             self.back_path = None
         self.card_format = card_format
         self.ppi = ppi
         if path_for_front is None:
-            self.name = "Blank"
+            self.name = "Blank" if front_image is None else "Rendered"
         else:
             self.name = os.path.basename(path_for_front)
 
@@ -38,9 +47,10 @@ class Card:
         Gets the image for the front of the card, formatted for printing.
         :return: the card image.
         """
-        if self.front_path is not None:
-            logger.debug(f"getting {self.front_path}")
-            return Image.open(self.front_path).resize(
+        if self.front_image is not None or self.front_path is not None:
+            logger.debug(f"getting {self.name}")
+            front = self.front_image if self.front_image is not None else Image.open(self.front_path)
+            return front.resize(
                 (self.card_format.width_in_pixels(self.ppi), self.card_format.height_in_pixels(self.ppi))
             )
         logger.debug("getting blank image")
@@ -51,9 +61,9 @@ class Card:
         Gets the image for the back of the card, rotated and formatted for printing.
         :return: the image if one exists, otherwise a white image that is the same size.
         """
-        if self.back_path is not None:
-            logger.debug(f"getting {self.back_path}")
-            back = Image.open(self.back_path)
+        if self.back_image is not None or self.back_path is not None:
+            logger.debug(f"getting back of {self.name}")
+            back = self.back_image if self.back_image is not None else Image.open(self.back_path)
             back = back.rotate(-90, expand=True)  # rotate the image clockwise, placing the name on the right side.
             return back.resize(
                 (self.card_format.width_in_pixels(self.ppi), self.card_format.height_in_pixels(self.ppi))
@@ -68,6 +78,25 @@ class Card:
         """
         return Image.new("RGB", self.card_format.size(self.ppi), color=Colors.WHITE)
 
+    @staticmethod
+    def get_back_path(path_for_front: str) -> str:
+        """
+        Gets the path of the back of a card.
+        :param path_for_front: path of the front of the card.
+        :return: the path of the back, which has a "-back" suffix and the same extension as the front.
+        """
+        root, extension = os.path.splitext(path_for_front)
+        return "{}-back{}".format(root, extension)
+
+    @staticmethod
+    def is_back(path: str) -> bool:
+        """
+        Checks whether a card image is the back of a card.
+        :param path: path of the card image.
+        :return: True if the image is the back of a card.
+        """
+        return os.path.splitext(path)[0].endswith("-back")
+
     @staticmethod
     def get_blank_card(card_format: 'CardFormat', ppi: int):
         """
@@ -144,116 +173,262 @@ class CardFormat(str, Enum):
     STANDARD = 2.5, 3.5
 
 
+class PageSide:
+    def __init__(self, path: str, page_number: int, back: bool, slots: list):
+        """
+        One side of a printed page, as planned by PrintFormatter.plan_layout.
+        :param path: path the side is written to.
+        :param page_number: number of the page, starting from 1.
+        :param back: whether this is the back of the page, whose cards are the backs of the cards on the front.
+        :param slots: list of (x, y, card) tuples of where each card is pasted, card is None for a blank slot.
+        """
+        self.path = path
+        self.page_number = page_number
+        self.back = back
+        self.slots = slots
+
+    def __str__(self):
+        return self.path
+
+    def __repr__(self):
+        return self.__str__()
+
+
 class PrintFormatter:
     """
     Creates a formatted sheet of cards for printing.
     """
 
     @staticmethod
-    def generate_print_layout(page_format: PageFormat,
-                              card_format: CardFormat,
-                              card_folder: str,
-                              output_folder: str,
-                              ppi: int = 300,
-                              spacing: float = 0.05) -> None:
+    def find_cards(card_folder: str, card_format: CardFormat, ppi: int) -> list:
         """
-        Generates a page of cards from a given folder. The size of the cards and size of the page are configurable based
-        on the available values from PageFormat and CardFormat classes.
-
-        :param page_format: page format to be used for printing.
-        :param card_format: card format to be used for printing.
+        Finds the cards to print in a folder, pairing each front with its back.
         :param card_folder: source folder for the card images.
-        :param output_folder: folder to place the formatted prints.
+        :param card_format: card format to be used for printing.
         :param ppi: ppi to be used for printing.
-        :param spacing: The spacing between cards on all sides in inches.
+        :return: list of Cards, in the order of their file names.
         """
-        logger.info(f"Preparing to print on {page_format.name.lower()} page format with {card_format.name.lower()}"
-                    f" card format")
         card_backs = set()
-        cards = Queue()
+        cards = list()
         for card in sorted(os.listdir(card_folder)):
             logger.debug(f"Found card {card}")
-            if card.endswith("-back.png"):
+            if Card.is_back(card):
                 card_backs.add(card)
                 logger.debug(f"Adding card back {card}")
             else:
-                has_back = card.replace(".png", "-back.png") in card_backs
+                has_back = Card.get_back_path(card) in card_backs
                 logger.debug(f"Checking back for {card} => {has_back}")
-                card = os.path.join(card_folder, card)
-                cards.put(Card(card, has_back, card_format, ppi))
+                cards.append(Card(os.path.join(card_folder, card), has_back, card_format, ppi))
+        return cards
 
+    @staticmethod
+    def plan_layout(page_format: PageFormat,
+                    card_format: CardFormat,
+                    cards: list,
+                    output_folder: str,
+                    ppi: int = 300,
+                    spacing: float = 0.05,
+                    extension: str = DEFAULT_PROFILE.extension) -> list:
+        """
+        Lays out cards on pages without rendering them. Each page has a front and a back, the back mirrors each row of
+        the front so that the back of every card lines up with its front when printed double-sided.
+
+        :param page_format: page format to be used for printing.
+        :param card_format: card format to be used for printing.
+        :param cards: the Cards to print, in order.
+        :param output_folder: folder to place the formatted prints.
+        :param ppi: ppi to be used for printing.
+        :param spacing: The spacing between cards on all sides in inches.
+        :param extension: file extension of the pages.
+        :return: list of PageSides, the front of each page followed by its back.
+        """
         cards_per_row = int(page_format.width / card_format.width)
         cards_per_column = int(page_format.height / card_format.height)
         cards_per_page = cards_per_row * cards_per_column
         row_width = (cards_per_row * card_format.width_in_pixels(ppi)) + ((cards_per_row - 1) * spacing * ppi)
         column_height = card_format.height_in_pixels(ppi)
-        number_of_pages = int(math.ceil(cards.qsize() / cards_per_page))
+        number_of_pages = int(math.ceil(len(cards) / cards_per_page))
 
         logger.info("Page fits {} cards".format(cards_per_page))
         logger.debug("Cards per row: {}".format(cards_per_row))
         logger.debug("Cards per column: {}".format(cards_per_column))
-        logger.debug(f"Number of cards: {cards.qsize()}")
+        logger.debug(f"Number of cards: {len(cards)}")
         logger.info("Will need to print {} pages front and back to print all cards".format(number_of_pages))
 
-        for page_number in range(number_of_pages):
-            page_number += 1
-            cards_queue_list = [deque() for _ in range(cards_per_row)]
-            for i in range(2):  # even is front page odd is back page.
-                is_front = i % 2 == 0
-                if is_front:
-                    output_page_path = f"{output_folder}/page-{page_number}.png"
-                else:
-                    output_page_path = f"{output_folder}/page-{page_number}-back.png"
-                logger.debug(f"Generating {output_page_path}")
-                page = Image.new("RGB", (int(page_format.width * ppi), int(page_format.height * ppi)), Colors.WHITE)
-                start_x = int((page.width - row_width) / 2)
-                start_y = int(
-                    (page.height - ((column_height * cards_per_column) + ((cards_per_row - 1) * ppi * spacing))) / 2)
-                logger.debug(f"Starting coordinate ({start_x}, {start_y})")
-                for row in range(cards_per_row):
-                    out_of_cards = False
-                    current_x = start_x
-                    current_y = start_y + (column_height * row) + int(spacing * ppi * row)
-                    for column in range(cards_per_column):
-                        logger.debug(f"Current row, column: {row},{column}")
-                        try:
-                            if is_front:
-                                # if we are using the fronts, put the card back in the queue for getting the back later
-                                card = cards.get(False)
-                                logger.debug(f"Adding {card} to deque {row}")
-                                cards_queue_list[row].append(card)
-                                logger.debug(f"Adding {card} to page {page_number}.")
-                                card_image = card.get_front()
-                            else:
-                                # if we are getting the backs, drain the queue.
-                                card = cards_queue_list[row].pop()
-                                logger.debug(f"Popping {card} from deque {row}")
-                                logger.debug(f"Adding {card} to page {page_number}-back")
-                                card_image = card.get_back()
-                            logger.debug(f"Current coordinate ({current_x}, {current_y})")
-                            page.paste(card_image, (current_x, current_y))
-                        except (queue.Empty, IndexError):  # either of these exceptions are expected and healthy.
-                            logger.info("Out of cards to add to this page")
-                            if is_front:
-                                # determine if we need to add blank cards to the queue to make up for empty columns.
-                                remaining_row_space = cards_per_row - column
-                                if remaining_row_space != 0:
-                                    logger.debug(f"Row space remaining in last row, "
-                                                 f"adding {remaining_row_space} blank cards")
-                                    for space in range(remaining_row_space):
-                                        cards_queue_list[row].append(Card.get_blank_card(card_format, ppi))
-                            out_of_cards = True
-                            break
-                        current_x += card_format.width_in_pixels(ppi) + int(spacing * ppi)
-                    if out_of_cards:
+        start_x = int((page_format.width_in_pixels(ppi) - row_width) / 2)
+        start_y = int((page_format.height_in_pixels(ppi) -
+                       ((column_height * cards_per_column) + ((cards_per_row - 1) * ppi * spacing))) / 2)
+        logger.debug(f"Starting coordinate ({start_x}, {start_y})")
+
+        def position(row: int, column: int) -> tuple:
+            return (start_x + column * (card_format.width_in_pixels(ppi) + int(spacing * ppi)),
+                    start_y + (column_height * row) + int(spacing * ppi * row))
+
+        sides = list()
+        remaining = iter(cards)
+        for page_number in range(1, number_of_pages + 1):
+            # the cards of each row of the front, the last row is padded with blanks to a full row
+            rows = list()
+            front = list()
+            for row in range(cards_per_row):
+                rows.append(list())
+                card = None
+                for column in range(cards_per_column):
+                    card = next(remaining, None)
+                    if card is None:
+                        logger.info("Out of cards to add to this page")
+                        rows[row].extend([None] * (cards_per_row - column))
                         break
+                    rows[row].append(card)
+                    front.append((*position(row, column), card))
+                if card is None:
+                    break
+            # the back of each row is laid out right to left, stopping at the first row with no cards
+            back = list()
+            for row in range(cards_per_row):
+                if row >= len(rows) or len(rows[row]) == 0:
+                    break
+                for column in range(min(cards_per_column, len(rows[row]))):
+                    card = rows[row][-1 - column]
+                    if card is not None and (card.back_path is not None or card.back_image is not None):
+                        back.append((*position(row, column), card))
+                if len(rows[row]) < cards_per_column:
+                    break
+            sides.append(PageSide(f"{output_folder}/page-{page_number}{extension}", page_number, False, front))
+            sides.append(PageSide(f"{output_folder}/page-{page_number}-back{extension}", page_number, True, back))
+        return sides
+
+    @staticmethod
+    def render_page(side: PageSide, page_format: PageFormat, ppi: int) -> Image.Image:
+        """
+        Renders one side of a page.
+        :param side: the side to render.
+        :param page_format: page format to be used for printing.
+        :param ppi: ppi to be used for printing.
+        :return: the page.
+        """
+        logger.debug(f"Generating {side.path}")
+        page = Image.new("RGB", (int(page_format.width * ppi), int(page_format.height * ppi)), Colors.WHITE)
+        for x, y, card in side.slots:
+            logger.debug(f"Adding {card} to {side.path} at ({x}, {y})")
+            with stage("print.load_card"):
+                card_image = card.get_back() if side.back else card.get_front()
+            with stage("print.paste"):
+                page.paste(card_image, (x, y))
+        return page
+
+    @staticmethod
+    def generate_print_layout(page_format: PageFormat,
+                              card_format: CardFormat,
+                              card_folder: str,
+                              output_folder: str,
+                              ppi: int = 300,
+                              spacing: float = 0.05,
+                              profile: OutputProfile = DEFAULT_PROFILE,
+                              jobs: int = 1,
+                              pdf: str = None) -> list:
+        """
+        Generates a page of cards from a given folder. The size of the cards and size of the page are configurable based
+        on the available values from PageFormat and CardFormat classes.
 
-                if is_front:
-                    logger.info(f"Saving page {page_number} to {output_page_path}")
-                else:
-                    logger.info(f"Saving back of page {page_number} to {output_page_path}")
-                try:
-                    page.save(output_page_path, "png")
-                except FileNotFoundError:
-                    os.makedirs(output_folder, exist_ok=True)
-                    page.save(output_page_path, "png")
+        :param page_format: page format to be used for printing.
+        :param card_format: card format to be used for printing.
+        :param card_folder: source folder for the card images.
+        :param output_folder: folder to place the formatted prints.
+        :param ppi: ppi to be used for printing.
+        :param spacing: The spacing between cards on all sides in inches.
+        :param profile: output profile to write the pages with, defaults to PNG at Pillow's default settings.
+        :param jobs: number of threads rendering and writing pages, 0 uses every available core. Pillow releases the
+                     GIL while decoding, resizing and encoding, so the pages are built in parallel. Defaults to 1.
+        :keyword pdf: path of a PDF to write every page to instead of writing each page to its own file. The fronts and
+                      backs alternate so the PDF prints duplex, and pages are streamed into it as they are built so
+                      only as many pages as there are jobs are held in memory.
+        :return: paths of the pages that were written, or of the PDF.
+        :raises ValueError: if the profile's format cannot be embedded in a PDF.
+        """
+        if pdf is not None and not supports(profile):
+            raise ValueError("{} pages cannot be embedded in a PDF, expected one of {}".format(
+                profile.image_format, ", ".join(FILTERS)))
+        logger.info(f"Preparing to print on {page_format.name.lower()} page format with {card_format.name.lower()}"
+                    f" card format")
+        cards = PrintFormatter.find_cards(card_folder, card_format, ppi)
+        sides = PrintFormatter.plan_layout(page_format, card_format, cards, output_folder, ppi, spacing,
+                                           profile.extension)
+        if jobs is None or jobs < 1:
+            jobs = os.cpu_count() or 1
+        encode_stats = EncodeStats()
+        if pdf is not None:
+            PrintFormatter._write_pdf(sides, page_format, ppi, profile, jobs, pdf, encode_stats)
+            logger.info("Encoded pages with the {} profile: {}".format(profile, encode_stats))
+            return [pdf]
+        stats_lock = threading.Lock()
+
+        def build(side: PageSide) -> None:
+            page = PrintFormatter.render_page(side, page_format, ppi)
+            if side.back:
+                logger.info(f"Saving back of page {side.page_number} to {side.path}")
+            else:
+                logger.info(f"Saving page {side.page_number} to {side.path}")
+            side_stats = EncodeStats()
+            profile.save(page, side.path, side_stats)
+            with stats_lock:
+                encode_stats.merge(side_stats)
+
+        if jobs == 1 or len(sides) <= 1:
+            for side in sides:
+                build(side)
+        else:
+            with ThreadPoolExecutor(max_workers=min(jobs, len(sides)), thread_name_prefix="page-builder") as executor:
+                # list() raises the first error building a page
+                list(executor.map(build, sides))
+        logger.info("Encoded pages with the {} profile: {}".format(profile, encode_stats))
+        return [side.path for side in sides]
+
+    @staticmethod
+    def _write_pdf(sides: list, page_format: PageFormat, ppi: int, profile: OutputProfile, jobs: int, path: str,
+                   encode_stats: EncodeStats) -> None:
+        """
+        Builds the sides of the pages and streams them into a PDF in order. Up to jobs sides are built ahead of the one
+        being written, so memory holds a bounded number of pages however many there are.
+        :param sides: the sides to write, in the order they are printed.
+        :param page_format: page format to be used for printing.
+        :param ppi: ppi to be used for printing.
+        :param profile: output profile to encode the pages with.
+        :param jobs: number of threads building pages.
+        :param path: path of the PDF.
+        :param encode_stats: totals to add the encode time and size of each page to.
+        """
+
+        def build(side: PageSide) -> tuple:
+            page = PrintFormatter.render_page(side, page_format, ppi)
+            start = time.perf_counter()
+            with stage("encode"):
+                encoded = profile.encode(page)
+            return encoded, time.perf_counter() - start
+
+        def add(writer: PdfWriter, side: PageSide, built: tuple) -> None:
+            encoded, seconds = built
+            # pages are only added from the calling thread, so the totals need no lock
+            encode_stats.add(seconds, len(encoded))
+            if side.back:
+                logger.info(f"Adding back of page {side.page_number} to {path}")
+            else:
+                logger.info(f"Adding page {side.page_number} to {path}")
+            with stage("write"):
+                writer.add_page(encoded, profile.image_format)
+
+        with PdfWriter(path, ppi) as writer:
+            if jobs == 1 or len(sides) <= 1:
+                for side in sides:
+                    add(writer, side, build(side))
+                return
+            with ThreadPoolExecutor(max_workers=min(jobs, len(sides)), thread_name_prefix="page-builder") as executor:
+                pending = deque()
+                for side in sides:
+                    pending.append((side, executor.submit(build, side)))
+                    if len(pending) >= jobs:
+                        side, future = pending.popleft()
+                        add(writer, side, future.result())
+                while len(pending) > 0:
+                    side, future = pending.popleft()
+                    add(writer, side, future.result())
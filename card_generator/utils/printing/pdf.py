@@ -0,0 +1,198 @@
+"""
+Streams full-page images into a multi-page PDF, so that print sheets can be handed over as a single file. Each page is
+written as soon as it is added and only its position in the file is kept, so a document holds one page in memory at a
+time however many pages it has.
+"""
+import os
+import struct
+
+from card_generator.utils.encoding import OutputProfile
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# PNG color types of the pages that can be embedded, mapped to their PDF color space and number of channels
+_PNG_COLOR_TYPES = {0: ("DeviceGray", 1), 2: ("DeviceRGB", 3)}
+
+#: PDF filter each image format is embedded with, the encoded image is embedded without being decoded.
+FILTERS = {"png": "FlateDecode", "jpeg": "DCTDecode"}
+
+
+def supports(profile: OutputProfile) -> bool:
+    """
+    Checks whether pages encoded with an output profile can be embedded in a PDF.
+    :param profile: the output profile.
+    :return: True if the profile's format can be embedded.
+    """
+    return profile.image_format.lower() in FILTERS
+
+
+def png_to_flate(encoded: bytes) -> tuple:
+    """
+    Extracts the compressed image data of a PNG. The data is a zlib stream of the PNG filtered rows, which a PDF
+    decodes with the FlateDecode filter and PNG predictors, so the page is embedded without compressing it again.
+    :param encoded: the PNG.
+    :return: a tuple of the width, height, PDF color space, number of channels and the compressed data.
+    :raises ValueError: if the PNG is not an 8-bit grayscale or RGB image, or is interlaced.
+    """
+    if not encoded.startswith(_PNG_SIGNATURE):
+        raise ValueError("Not a PNG")
+    position = len(_PNG_SIGNATURE)
+    header = None
+    data = list()
+    while position < len(encoded):
+        length, chunk_type = struct.unpack(">I4s", encoded[position:position + 8])
+        chunk = encoded[position + 8:position + 8 + length]
+        position += 12 + length
+        if chunk_type == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif chunk_type == b"IDAT":
+            data.append(chunk)
+        elif chunk_type == b"IEND":
+            break
+    if header is None:
+        raise ValueError("PNG has no header")
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if bit_depth != 8 or color_type not in _PNG_COLOR_TYPES or interlace != 0:
+        raise ValueError("Only 8-bit, non-interlaced grayscale and RGB PNGs can be embedded in a PDF")
+    return (width, height) + _PNG_COLOR_TYPES[color_type] + (b"".join(data),)
+
+
+class PdfWriter:
+    # object numbers of the document catalog and page tree, the pages are numbered after them
+    _CATALOG = 1
+    _PAGES = 2
+
+    def __init__(self, path: str, ppi: int):
+        """
+        Writes pages to a PDF as they are added. The pages are written to a temporary file next to the PDF, which only
+        replaces the PDF once the writer is closed, so a PDF is never left behind missing pages.
+
+        :param path: path to write the PDF to, the folder is created if it does not exist.
+        :param ppi: pixels per inch of the pages, which sets the size they are printed at.
+        """
+        folder = os.path.dirname(path)
+        if folder != "":
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self.ppi = ppi
+        self._temp_path = path + ".tmp"
+        self._file = open(self._temp_path, "wb")
+        # byte offset of each object, indexed by object number - 1
+        self._offsets = [0, 0]
+        self._pages = list()
+        # the binary comment marks the file as binary for tools that guess
+        self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write_object(self, number: int, entries: str, stream: bytes = None) -> None:
+        """
+        Writes a dictionary object.
+        :param number: number of the object.
+        :param entries: entries of the dictionary.
+        :param stream: data of the object if it is a stream, its length is added to the dictionary.
+        """
+        self._offsets[number - 1] = self._file.tell()
+        if stream is None:
+            self._file.write("{} 0 obj\n<< {} >>\nendobj\n".format(number, entries).encode("latin-1"))
+            return
+        self._file.write("{} 0 obj\n<< {} /Length {} >>\nstream\n".format(number, entries, len(stream))
+                         .encode("latin-1"))
+        self._file.write(stream)
+        self._file.write(b"\nendstream\nendobj\n")
+
+    def _new_object(self) -> int:
+        self._offsets.append(0)
+        return len(self._offsets)
+
+    def add_page(self, encoded: bytes, image_format: str) -> None:
+        """
+        Adds a page showing a single full-page image.
+        :param encoded: the page, encoded as a PNG or JPEG.
+        :param image_format: format of the encoded page, png or jpeg.
+        :raises ValueError: if the page cannot be embedded.
+        """
+        image_format = image_format.lower()
+        if image_format == "png":
+            width, height, color_space, channels, data = png_to_flate(encoded)
+            parameters = " /DecodeParms << /Predictor 15 /Colors {} /BitsPerComponent 8 /Columns {} >>".format(
+                channels, width)
+        elif image_format == "jpeg":
+            width, height, color_space, data = PdfWriter._jpeg_info(encoded) + (encoded,)
+            parameters = ""
+        else:
+            raise ValueError("{} pages cannot be embedded in a PDF, expected one of {}".format(
+                image_format, ", ".join(FILTERS)))
+        image = self._new_object()
+        self._write_object(image, "/Type /XObject /Subtype /Image /Width {} /Height {} /ColorSpace /{} "
+                                  "/BitsPerComponent 8 /Filter /{}{}".format(width, height, color_space,
+                                                                            FILTERS[image_format], parameters),
+                           data)
+        # size of the page in points
+        page_width, page_height = width * 72 / self.ppi, height * 72 / self.ppi
+        contents = self._new_object()
+        self._write_object(contents, "", "q {:.4f} 0 0 {:.4f} 0 0 cm /Page Do Q".format(
+            page_width, page_height).encode("latin-1"))
+        page = self._new_object()
+        self._write_object(page, "/Type /Page /Parent {} 0 R /MediaBox [0 0 {:.4f} {:.4f}] "
+                                 "/Resources << /XObject << /Page {} 0 R >> >> /Contents {} 0 R".format(
+                                     PdfWriter._PAGES, page_width, page_height, image, contents))
+        self._pages.append(page)
+
+    @staticmethod
+    def _jpeg_info(encoded: bytes) -> tuple:
+        """
+        Reads the size and color space of a JPEG from its start of frame marker.
+        :param encoded: the JPEG.
+        :return: a tuple of the width, height and PDF color space.
+        """
+        position = 2
+        while position < len(encoded):
+            marker, length = struct.unpack(">2sH", encoded[position:position + 4])
+            # baseline, extended and progressive start of frame markers
+            if marker in (b"\xff\xc0", b"\xff\xc1", b"\xff\xc2"):
+                height, width, channels = struct.unpack(">xHHB", encoded[position + 4:position + 10])
+                return width, height, "DeviceRGB" if channels == 3 else "DeviceGray"
+            position += 2 + length
+        raise ValueError("JPEG has no start of frame")
+
+    def close(self) -> None:
+        """
+        Writes the page tree and cross-reference table, completing the PDF.
+        """
+        if self._file.closed:
+            return
+        try:
+            self._finish()
+        except BaseException:
+            self.discard()
+            raise
+        os.replace(self._temp_path, self.path)
+
+    def discard(self) -> None:
+        """
+        Stops writing the PDF and deletes the pages written so far, leaving any existing PDF at path untouched.
+        """
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+    def _finish(self) -> None:
+        self._write_object(PdfWriter._CATALOG, "/Type /Catalog /Pages {} 0 R".format(PdfWriter._PAGES))
+        self._write_object(PdfWriter._PAGES, "/Type /Pages /Kids [{}] /Count {}".format(
+            " ".join("{} 0 R".format(page) for page in self._pages), len(self._pages)))
+        xref = self._file.tell()
+        self._file.write("xref\n0 {}\n0000000000 65535 f \n".format(len(self._offsets) + 1).encode("latin-1"))
+        for offset in self._offsets:
+            self._file.write("{:010d} 00000 n \n".format(offset).encode("latin-1"))
+        self._file.write("trailer\n<< /Size {} /Root {} 0 R >>\nstartxref\n{}\n%%EOF\n".format(
+            len(self._offsets) + 1, PdfWriter._CATALOG, xref).encode("latin-1"))
+        self._file.close()
+
+    def __enter__(self) -> 'PdfWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
@@ -0,0 +1,333 @@
+"""
+Timing of the stages of the card pipeline. The generator marks its stages with stage() and counts the work it does with
+count(), both of which cost next to nothing unless a recorder has been set to collect them.
+"""
+import contextlib
+import json
+import os
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+# recorder the stages are reported to, None while timing is disabled
+_recorder = None
+
+# card the current thread is working on
+_local = threading.local()
+
+_NOT_RECORDING = contextlib.nullcontext()
+
+
+class Recorder:
+    """
+    Receives the stages, cards and counters of the pipeline. The base recorder ignores all of them.
+    """
+
+    def record(self, name: str, start: float, end: float) -> None:
+        """
+        Records a single run of a stage.
+        :param name: name of the stage.
+        :param start: time the stage started, from time.perf_counter.
+        :param end: time the stage ended, from time.perf_counter.
+        """
+
+    def record_card(self, name: str, start: float, end: float) -> None:
+        """
+        Records the rendering of a card, which the stages run while it was rendered belong to.
+        :param name: name of the card, nation/unit.
+        :param start: time rendering started, from time.perf_counter.
+        :param end: time rendering ended, from time.perf_counter.
+        """
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        Adds to a counter.
+        :param name: name of the counter.
+        :param amount: amount to add.
+        """
+
+
+class StageTimes(Recorder):
+
+    def __init__(self):
+        """
+        Collects the time spent in each stage, keeping every sample so that repeated runs can be summarised.
+        """
+        self.samples = defaultdict(list)
+        self.counters = defaultdict(int)
+
+    def record(self, name: str, start: float, end: float) -> None:
+        self.samples[name].append(end - start)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    def clear(self) -> None:
+        self.samples.clear()
+        self.counters.clear()
+
+
+class CardProfile:
+    def __init__(self, name: str, seconds: float, stages: dict, counters: dict):
+        """
+        Where the time rendering a single card went.
+        :param name: name of the card, nation/unit.
+        :param seconds: time taken to render the card.
+        :param stages: total time spent in each stage of the card, in seconds. Nested stages are also included in the
+                       stage they are nested in. Includes cards encoded and written in the background.
+        :param counters: counters of the card.
+        """
+        self.name = name
+        self.seconds = seconds
+        self.stages = stages
+        self.counters = counters
+
+    def slowest_stages(self, n: int = 3) -> list:
+        """
+        :param n: number of stages to get.
+        :return: list of (stage, seconds) tuples of the slowest stages, slowest first.
+        """
+        return sorted(self.stages.items(), key=lambda stage: stage[1], reverse=True)[:n]
+
+    def __str__(self):
+        return "{:<50} {:>9.1f} ms  {}".format(self.name, 1000 * self.seconds, ", ".join(
+            "{} {:.1f} ms".format(name, 1000 * seconds) for name, seconds in self.slowest_stages()))
+
+
+class Trace(Recorder):
+
+    def __init__(self):
+        """
+        Records every stage as a Chrome trace event, so that a run can be inspected in chrome://tracing or Perfetto.
+        Stages are attributed to the card they were run for, including the stages run on other threads, such as
+        writing the card in the background.
+        """
+        self.events = list()
+        self.counters = defaultdict(int)
+        self._card_counters = defaultdict(lambda: defaultdict(int))
+        self._named_threads = set()
+        self._lock = threading.Lock()
+
+    def _add(self, event: dict) -> None:
+        event["pid"] = os.getpid()
+        event["tid"] = threading.get_ident()
+        with self._lock:
+            if event["tid"] not in self._named_threads:
+                self._named_threads.add(event["tid"])
+                self.events.append({"name": "thread_name", "ph": "M", "pid": event["pid"], "tid": event["tid"],
+                                    "args": {"name": threading.current_thread().name}})
+            self.events.append(event)
+
+    def record(self, name: str, start: float, end: float) -> None:
+        event = {"name": name, "cat": "stage", "ph": "X", "ts": start * 1e6, "dur": (end - start) * 1e6}
+        card = current_card()
+        if card is not None:
+            event["args"] = {"card": card}
+        self._add(event)
+
+    def record_card(self, name: str, start: float, end: float) -> None:
+        with self._lock:
+            counters = dict(self._card_counters.pop(name, {}))
+        self._add({"name": name, "cat": "card", "ph": "X", "ts": start * 1e6, "dur": (end - start) * 1e6,
+                   "args": counters})
+
+    def count(self, name: str, amount: int = 1) -> None:
+        card = current_card()
+        with self._lock:
+            self.counters[name] += amount
+            if card is not None:
+                self._card_counters[card][name] += amount
+
+    def drain(self) -> tuple:
+        """
+        Takes the events and counters recorded so far, leaving the trace empty.
+        :return: a tuple of the events and the counters, to be merged into another trace.
+        """
+        with self._lock:
+            events, self.events = self.events, list()
+            counters, self.counters = dict(self.counters), defaultdict(int)
+            self._named_threads.clear()
+        return events, counters
+
+    def merge(self, events: list, counters: dict) -> None:
+        """
+        Adds the events and counters of another trace, e.g. one recorded in a worker process.
+        :param events: events of the other trace.
+        :param counters: counters of the other trace.
+        """
+        with self._lock:
+            self.events.extend(events)
+            for name, amount in counters.items():
+                self.counters[name] += amount
+
+    def get_cards(self) -> list:
+        """
+        Gets the profile of every card in the trace.
+        :return: list of CardProfiles, in the order the cards finished rendering.
+        """
+        stages = defaultdict(lambda: defaultdict(float))
+        for event in self.events:
+            if event.get("cat") == "stage" and "args" in event:
+                stages[event["args"]["card"]][event["name"]] += event["dur"] / 1e6
+        return [CardProfile(event["name"], event["dur"] / 1e6, dict(stages[event["name"]]), event["args"])
+                for event in self.events if event.get("cat") == "card"]
+
+    def get_stages(self) -> dict:
+        """
+        :return: total time spent in each stage across the trace, in seconds.
+        """
+        stages = defaultdict(float)
+        for event in self.events:
+            if event.get("cat") == "stage":
+                stages[event["name"]] += event["dur"] / 1e6
+        return dict(stages)
+
+    def summary(self, top: int = 10) -> str:
+        """
+        Summarises the trace, listing the slowest cards along with the stages they spent the most time in.
+        :keyword top: number of cards to list, defaults to 10.
+        :return: the summary.
+        """
+        cards = self.get_cards()
+        lines = list()
+        if len(cards) > 0:
+            median = statistics.median(card.seconds for card in cards)
+            lines.append("Slowest {} of {} cards by render time (median {:.1f} ms). Their slowest stages include any "
+                         "encoding and writing done in the background:".format(min(top, len(cards)), len(cards),
+                                                                               1000 * median))
+            for card in sorted(cards, key=lambda card: card.seconds, reverse=True)[:top]:
+                lines.append("  {}".format(card))
+        else:
+            lines.append("Slowest stages:")
+            for name, seconds in sorted(self.get_stages().items(), key=lambda stage: stage[1], reverse=True)[:top]:
+                lines.append("  {:<50} {:>9.1f} ms".format(name, 1000 * seconds))
+        if len(self.counters) > 0:
+            lines.append("Counters: {}".format(", ".join("{}={}".format(name, amount)
+                                                         for name, amount in sorted(self.counters.items()))))
+        return "\n".join(lines)
+
+    def to_chrome_trace(self) -> dict:
+        return {"traceEvents": self.events, "displayTimeUnit": "ms", "otherData": {"counters": dict(self.counters)}}
+
+    def write(self, path: str) -> None:
+        """
+        Writes the trace in the Chrome trace event format.
+        :param path: path to write the trace to.
+        """
+        with open(path, "w") as trace_file:
+            json.dump(self.to_chrome_trace(), trace_file)
+
+
+class _Stage:
+    __slots__ = ("name", "recorder", "start")
+
+    def __init__(self, name: str, recorder: Recorder):
+        self.name = name
+        self.recorder = recorder
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.recorder.record(self.name, self.start, time.perf_counter())
+
+
+class _Card:
+    __slots__ = ("name", "recorder", "start", "previous")
+
+    def __init__(self, name: str, recorder: Recorder):
+        self.name = name
+        self.recorder = recorder
+
+    def __enter__(self):
+        self.previous = current_card()
+        _local.card = self.name
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.recorder is not None:
+            self.recorder.record_card(self.name, self.start, time.perf_counter())
+        _local.card = self.previous
+
+
+def set_recorder(recorder: Recorder):
+    """
+    Sets the recorder stages are reported to.
+    :param recorder: the recorder, or None to stop timing stages.
+    :return: the previous recorder.
+    """
+    global _recorder
+    previous, _recorder = _recorder, recorder
+    return previous
+
+
+def get_recorder():
+    return _recorder
+
+
+@contextlib.contextmanager
+def recording(recorder: Recorder):
+    """
+    Reports stages to a recorder for the duration of a with block, restoring the previous recorder afterwards.
+    :param recorder: the recorder.
+    :return: the recorder.
+    """
+    previous = set_recorder(recorder)
+    try:
+        yield recorder
+    finally:
+        set_recorder(previous)
+
+
+def stage(name: str):
+    """
+    Marks a stage of the pipeline, timing the with block it is used in if a recorder is set.
+    :param name: name of the stage, e.g. front.populate_header.
+    :return: a context manager.
+    """
+    if _recorder is None:
+        return _NOT_RECORDING
+    return _Stage(name, _recorder)
+
+
+def card(name: str):
+    """
+    Marks the rendering of a card, the stages and counters within the with block are attributed to the card.
+    :param name: name of the card, nation/unit.
+    :return: a context manager.
+    """
+    if _recorder is None:
+        return _NOT_RECORDING
+    return _Card(name, _recorder)
+
+
+def attribute_to(name: str):
+    """
+    Attributes the stages and counters within the with block to a card without timing the card, e.g. when a card is
+    written on another thread.
+    :param name: name of the card, None to leave the stages unattributed.
+    :return: a context manager.
+    """
+    if _recorder is None or name is None:
+        return _NOT_RECORDING
+    return _Card(name, None)
+
+
+def current_card():
+    """
+    :return: name of the card the current thread is working on, None if there is none.
+    """
+    return getattr(_local, "card", None)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """
+    Adds to a counter, if a recorder is set.
+    :param name: name of the counter, e.g. cache.fonts.hits.
+    :param amount: amount to add.
+    """
+    if _recorder is not None:
+        _recorder.count(name, amount)
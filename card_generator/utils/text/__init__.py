@@ -1,12 +1,128 @@
 """
 Text utilities
 """
+import weakref
+from collections import OrderedDict
+from typing import Callable, Any
+
 from PIL.ImageFont import FreeTypeFont
 from multipledispatch import dispatch
 
 from card_generator.utils import get_center_point, get_axis_center_point
 
 
+class GlyphMetrics:
+    """
+    Measurements of a single font at a single size. Advances of individual characters, kerned advances of character
+    pairs, and the extents of whole strings are each measured once and then reused. Only the most recently used strings
+    are kept, as card text rarely repeats outside of headings and stats.
+    """
+
+    #: number of strings whose length and size are kept.
+    MAX_STRINGS = 1024
+
+    def __init__(self, font: FreeTypeFont) -> None:
+        """
+        :param font: the font to measure.
+        """
+        # the metrics are held against their font, so they must not keep it alive
+        self._font = weakref.ref(font)
+        self._advances = dict()
+        self._pair_advances = dict()
+        self._lengths = OrderedDict()
+        self._sizes = OrderedDict()
+
+    @property
+    def font(self) -> FreeTypeFont:
+        """
+        The font being measured.
+        """
+        return self._font()
+
+    def _lookup(self, table: OrderedDict, text: str, measure: Callable[[str], Any]) -> Any:
+        """
+        Gets a measurement of a string from one of the string tables, measuring it if it is not held.
+        :param table: the table to look in.
+        :param text: text to measure.
+        :param measure: method of the font measuring the text.
+        :return: the measurement.
+        """
+        value = table.get(text)
+        if value is None:
+            value = table[text] = measure(text)
+            if len(table) > self.MAX_STRINGS:
+                table.popitem(last=False)
+        else:
+            table.move_to_end(text)
+        return value
+
+    def advance(self, character: str) -> float:
+        """
+        Gets the advance of a single character.
+        :param character: character to measure.
+        :return: the distance from the start of the character to the start of the next character, in pixels.
+        """
+        advance = self._advances.get(character)
+        if advance is None:
+            advance = self._advances[character] = self.font.getlength(character)
+        return advance
+
+    def pair_advance(self, a: str, b: str) -> float:
+        """
+        Gets the advance of a character when it is followed by another, including the kerning between the two.
+        :param a: the character to measure.
+        :param b: the character that follows it.
+        :return: the distance from the start of a to the start of b, in pixels.
+        """
+        pair = a + b
+        advance = self._pair_advances.get(pair)
+        if advance is None:
+            advance = self._pair_advances[pair] = self.font.getlength(pair) - self.advance(b)
+        return advance
+
+    def kerning(self, a: str, b: str) -> float:
+        """
+        Gets the kerning between two characters.
+        :param a: the first character.
+        :param b: the character that follows it.
+        :return: the adjustment applied to the advance of a when it is followed by b, in pixels.
+        """
+        return self.pair_advance(a, b) - self.advance(a)
+
+    def length(self, text: str) -> float:
+        """
+        Gets the advance of a string.
+        :param text: text to measure.
+        :return: the advance of the string, in pixels.
+        """
+        return self._lookup(self._lengths, text, self.font.getlength)
+
+    def size(self, text: str) -> tuple[int, int]:
+        """
+        Gets the extents of a string.
+        :param text: text to measure.
+        :return: the width and height of the string, as returned by FreeTypeFont.getsize.
+        """
+        return self._lookup(self._sizes, text, self.font.getsize)
+
+
+# metrics of each font, dropped along with their font
+_metrics = weakref.WeakKeyDictionary()
+
+
+def get_metrics(font: FreeTypeFont) -> GlyphMetrics:
+    """
+    Gets the metrics table of a font. Fonts loaded through the FONT_REGISTRY are shared, so their metrics are shared by
+    every user of the same font file at the same size.
+    :param font: the font.
+    :return: the metrics of the font.
+    """
+    metrics = _metrics.get(font)
+    if metrics is None:
+        metrics = _metrics[font] = GlyphMetrics(font)
+    return metrics
+
+
 def x_center_text(x1: int, x2: int, text: str, font: FreeTypeFont) -> int:
     """
     Gets the starting point that a block of text should begin at to be horizontally centered between two points.
@@ -17,7 +133,7 @@ def x_center_text(x1: int, x2: int, text: str, font: FreeTypeFont) -> int:
     :return: the starting point at which the text should begin to be centered.
     """
     x = get_axis_center_point(x1, x2)
-    w, h = font.getsize(text)
+    w, h = get_metrics(font).size(text)
     return int(x - (w / 2))
 
 
@@ -31,10 +147,84 @@ def y_center_text(y1: int, y2: int, text: str, font: FreeTypeFont) -> int:
     :return: the starting point at which the text should begin to be centered.
     """
     y = get_axis_center_point(y1, y2)
-    w, h = font.getsize(text)
+    w, h = get_metrics(font).size(text)
     return int(y - ((h * 1.25) / 2))
 
 
+class TextLayout:
+    """
+    Lines of text that have already been positioned, ready to be drawn.
+    """
+
+    def __init__(self) -> None:
+        self.lines = list()
+        self.end_y = 0
+
+    def add_line(self, xy: tuple, text: str, font: FreeTypeFont) -> None:
+        """
+        Adds a positioned line to the layout.
+        :param xy: coordinate to draw the line at.
+        :param text: text of the line.
+        :param font: font to draw the line with.
+        """
+        self.lines.append((xy, text, font))
+
+    def draw(self, draw, **kwargs) -> None:
+        """
+        Draws every line of the layout.
+        :param draw: ImageDraw to draw the lines with.
+        :param kwargs: additional arguments passed to ImageDraw.text, e.g. fill.
+        """
+        for xy, text, font in self.lines:
+            draw.text(xy, text, font=font, **kwargs)
+
+
+class FitResult:
+    def __init__(self, size: int, layout: Any, iterations: int) -> None:
+        """
+        Outcome of fitting text to a box.
+        :param size: the chosen font size.
+        :param layout: the layout produced while measuring the chosen size.
+        :param iterations: number of sizes that were measured.
+        """
+        self.size = size
+        self.layout = layout
+        self.iterations = iterations
+
+
+def fit_font_size(measure: Callable[[int], tuple[bool, Any]], min_size: int, max_size: int) -> FitResult:
+    """
+    Finds the largest font size that fits by bisecting between the minimum and maximum sizes. The maximum size is
+    measured first, as most text fits without being shrunk.
+
+    :param measure: callable taking a font size and returning a tuple of whether the text fits at that size and the
+                    layout produced while measuring it.
+    :param min_size: smallest size allowed, used if nothing fits.
+    :param max_size: largest size allowed.
+    :return: the chosen size along with the layout measured for it.
+    """
+    iterations = 1
+    fits, layout = measure(max_size)
+    if fits:
+        return FitResult(max_size, layout, iterations)
+    best = None
+    low, high = min_size, max_size - 1
+    while low <= high:
+        size = (low + high) // 2
+        iterations += 1
+        fits, layout = measure(size)
+        if fits:
+            best = FitResult(size, layout, iterations)
+            low = size + 1
+        else:
+            high = size - 1
+    if best is None:
+        # nothing fits, the bisection always ends by measuring the minimum size so its layout can be reused.
+        return FitResult(min_size, layout, iterations)
+    best.iterations = iterations
+    return best
+
+
 @dispatch(int, int, int, int, str, FreeTypeFont)
 def center_text(x1: int, y1: int, x2: int, y2: int, text: str, font: FreeTypeFont) -> tuple:
     """
@@ -47,7 +237,7 @@ def center_text(x1: int, y1: int, x2: int, y2: int, text: str, font: FreeTypeFon
     :param font:
     :return:
     """
-    w, h = font.getsize(text)
+    w, h = get_metrics(font).size(text)
     x, y = get_center_point(x1, y1, x2, y2)
     return (x - (w / 2)), (y - (h / 2))
 
@@ -61,7 +251,7 @@ def center_text(center_point: tuple, text: str, font: FreeTypeFont) -> tuple:
     :param font:
     :return:
     """
-    w, h = font.getsize(text)
+    w, h = get_metrics(font).size(text)
     return (center_point[0] - (w / 2)), (center_point[1] - (h / 2))
 
 
@@ -81,6 +271,9 @@ def draw_text_psd_style(draw, xy, text, font, tracking=0, leading=None, center_x
     the current type size. In a 6 point font, 1 em equals 6 points;
     in a 10 point font, 1 em equals 10 points. Tracking
     is strictly proportional to the current type size.
+
+    Without tracking each line is drawn with a single call, otherwise each character is drawn at its kerned advance
+    from the font's metrics table.
     """
 
     def stutter_chunk(lst, size, overlap=0, default=None):
@@ -98,9 +291,14 @@ def draw_text_psd_style(draw, xy, text, font, tracking=0, leading=None, center_x
     if center_x:  # add size adjustment to maintain horizontal centering
         x_offset = (tracking / 1000) * font_size * (len(text) - 1)
         x -= x_offset / 2
+    metrics = get_metrics(font)
     for line in lines:
+        if tracking == 0:
+            draw.text((x, y), line, font=font, **kwargs)
+            y += leading
+            continue
         for a, b in stutter_chunk(line, 2, 1, ' '):
-            w = font.getlength(a + b) - font.getlength(b)
+            w = metrics.pair_advance(a, b)
             draw.text((x, y), a, font=font, **kwargs)
             x += w + (tracking / 1000) * font_size
         y += leading
@@ -0,0 +1,36 @@
+import json
+import unittest
+
+from card_generator.benchmark import measure, compare, RESULTS_VERSION, DEFAULT_BASELINE
+
+
+class BenchmarkTestCases(unittest.TestCase):
+    def test_measure_discards_warmup(self):
+        calls = list()
+        result = measure("calls", lambda: calls.append(1), warmup=2, repeat=3)
+        self.assertEqual(5, len(calls))
+        self.assertEqual(3, len(result.samples))
+
+    def test_compare(self):
+        baseline = {"version": RESULTS_VERSION, "results": {"a": {"median": 1.0}, "b": {"median": 1.0},
+                                                            "removed": {"median": 1.0}}}
+        current = {"version": RESULTS_VERSION, "results": {"a": {"median": 1.5}, "b": {"median": 0.95},
+                                                           "added": {"median": 1.0}}}
+        comparisons = {comparison.name: comparison for comparison in compare(baseline, current, threshold=0.1)}
+        self.assertEqual(["a", "b"], list(comparisons))
+        self.assertTrue(comparisons["a"].regressed)
+        self.assertFalse(comparisons["b"].regressed or comparisons["b"].improved)
+
+    def test_compare_rejects_other_versions(self):
+        with self.assertRaises(ValueError):
+            compare({"version": RESULTS_VERSION + 1, "results": {}}, {"version": RESULTS_VERSION, "results": {}})
+
+    def test_default_baseline_is_comparable(self):
+        with open(DEFAULT_BASELINE, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+        self.assertEqual(RESULTS_VERSION, baseline["version"])
+        self.assertEqual(len(baseline["results"]), len(compare(baseline, baseline)))
+
+
+if __name__ == '__main__':
+    unittest.main()
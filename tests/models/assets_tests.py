@@ -0,0 +1,36 @@
+import unittest
+
+from card_generator.models.assets import LazyAsset, AssetRegistry, Icons
+
+
+class LazyAssetTestCases(unittest.TestCase):
+    def test_asset_is_loaded_once_on_first_access(self):
+        loads = list()
+
+        class Assets:
+            ICON = LazyAsset(lambda: loads.append(1) or "icon")
+
+        self.assertEqual(0, len(loads))
+        self.assertEqual("icon", Assets.ICON)
+        self.assertEqual("icon", Assets.ICON)
+        self.assertEqual(1, len(loads))
+        self.assertEqual("icon", Assets.__dict__["ICON"])
+
+    def test_registry_loads_each_asset_once(self):
+        loads = list()
+        registry = AssetRegistry({"a": lambda: loads.append("a") or "A", "b": lambda: loads.append("b") or "B"})
+        self.assertIn("a", registry)
+        self.assertEqual(["a", "b"], list(registry))
+        self.assertEqual("A", registry["a"])
+        self.assertEqual("A", registry["a"])
+        self.assertEqual(["a"], loads)
+        with self.assertRaises(KeyError):
+            registry["c"]
+
+    def test_icons_load(self):
+        self.assertEqual((30, 30), Icons.get_set_icon("War At Sea").size)
+        self.assertIsNone(Icons.get_rarity_icon("Legendary"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+
+from card_generator.models.assets import get_war_at_sea_json
+from card_generator.models.dataset import Dataset
+from card_generator.models.utils import load_json, ModelJsonEncoder
+
+
+class DatasetTestCases(unittest.TestCase):
+    def setUp(self):
+        with get_war_at_sea_json() as data_file:
+            self.data = json.load(data_file)
+
+    def test_matches_load_json(self):
+        expected = json.dumps(load_json(self.data), cls=ModelJsonEncoder)
+        self.assertEqual(expected, json.dumps(Dataset.load().get_nations(), cls=ModelJsonEncoder))
+
+    def test_lookup(self):
+        dataset = Dataset.load()
+        unit = dataset.get_unit("United States", "USS Missouri (BB 63)")
+        self.assertEqual("USS Missouri (BB 63)", unit.name)
+        self.assertIn(unit, dataset.get_nation("United States").get_units())
+        self.assertEqual(len(self.data), len(dataset.get_index()))
+        with self.assertRaises(ValueError):
+            dataset.get_nation("Atlantis")
+        with self.assertRaises(ValueError):
+            dataset.get_unit("United States", "USS Atlantis")
+
+    def test_plan(self):
+        dataset = Dataset.load()
+        work = dataset.plan(["Canada", "Australia", "Canada"])
+        self.assertEqual(["Canada"] * 5 + ["Australia"] * 5, [nation.name for nation, _ in work])
+        self.assertEqual([unit["name"] for unit in dataset.get_record("Canada")["units"]],
+                         [unit.name for _, unit in work[:5]])
+        self.assertEqual(["Canada", "Australia"], list(dataset._nations))
+        filtered = dataset.plan(["Canada", "Australia"], 'rarity == "Common"')
+        self.assertEqual([(nation, unit) for nation, unit in work if unit.rarity == "Common"], filtered)
+
+    def test_plan_rejects_unknown_nations_up_front(self):
+        dataset = Dataset.load()
+        with self.assertRaises(ValueError) as context:
+            dataset.plan(["Canada", "Atlantis", "Lemuria"])
+        self.assertIn("Atlantis", str(context.exception))
+        self.assertIn("Lemuria", str(context.exception))
+        self.assertEqual([], list(dataset._nations))
+
+    def test_compiled_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            compiled = Dataset.load(cache_dir)
+            path = os.path.join(cache_dir, Dataset.CACHE_FILE_NAME)
+            self.assertTrue(os.path.exists(path))
+            cached = Dataset.load(cache_dir)
+            self.assertEqual(compiled.get_nation_names(), cached.get_nation_names())
+            self.assertEqual(self.data, cached.get_records())
+
+    def test_stale_cache_is_compiled_again(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            Dataset._write_cache(cache_dir, os.path.join(cache_dir, Dataset.CACHE_FILE_NAME), "stale", self.data[:1])
+            self.assertEqual(self.data, Dataset.load(cache_dir).get_records())
+            self.assertEqual(len(self.data), len(Dataset.load(cache_dir)))
+
+
+if __name__ == '__main__':
+    unittest.main()
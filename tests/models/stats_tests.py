@@ -0,0 +1,56 @@
+import unittest
+
+from card_generator.models.dataset import Dataset
+from card_generator.models.stats import StatMatrix
+
+
+class StatMatrixTestCases(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.records = Dataset.load().get_records()
+        cls.stats = StatMatrix.from_records(cls.records)
+        cls.units = [(nation["name"], unit) for nation in cls.records for unit in nation["units"]]
+
+    def expected(self, predicate) -> list:
+        return [(nation, unit["name"]) for nation, unit in self.units if predicate(nation, unit)]
+
+    def test_matches_records(self):
+        self.assertEqual(len(self.units), len(self.stats))
+        self.assertEqual(self.expected(lambda nation, unit: unit["set"] == "Task Force" and unit["points"] < 20),
+                         self.stats.select('set == "Task Force" and points < 20'))
+        self.assertEqual(self.expected(lambda nation, unit: unit["rarity"] in ("Rare", "Uncommon") and
+                                       not nation == "Japan" and 10 < unit["points"] <= 30),
+                         self.stats.select('rarity in ["Rare", "Uncommon"] and not nation == "Japan" and '
+                                           '10 < points <= 30'))
+
+    def test_attack_ranges(self):
+        def torpedo(unit, attack_range):
+            value = unit["torpedo_attack"][attack_range] if len(unit["torpedo_attack"]) > 0 else "-"
+            return 0 if value == "-" else int(value)
+
+        self.assertEqual(self.expected(lambda nation, unit: torpedo(unit, 2) > 0 or torpedo(unit, 0) >= 9),
+                         self.stats.select("torpedo[2] > 0 or torpedo >= 9"))
+
+    def test_unknown_values_match_nothing(self):
+        self.assertEqual([], self.stats.select('set == "Set XII"'))
+        self.assertEqual(len(self.units), len(self.stats.select('set != "Set XII"')))
+
+    def test_invalid_queries(self):
+        for where in ['points < "ten"', 'set < "Task Force"', 'speed == 2', 'points', '__import__("os")',
+                      'points + 1 > 2', 'torpedo[4] > 0', 'points <', 'points in [10, "x"]', 'points in [armor]',
+                      'rarity in ["Rare", 1]']:
+            with self.assertRaises(ValueError, msg=where):
+                self.stats.select(where)
+
+    def test_dataset_query(self):
+        dataset = Dataset.load()
+        work = dataset.query('rarity == "Common"', ["Canada"])
+        self.assertTrue(len(work) > 0)
+        self.assertTrue(all(nation.name == "Canada" and unit.rarity == "Common" for nation, unit in work))
+        self.assertEqual(["Canada"], list(dataset._nations))
+        with self.assertRaises(ValueError):
+            dataset.query('rarity == "Rare"', ["Atlantis"])
+
+
+if __name__ == '__main__':
+    unittest.main()
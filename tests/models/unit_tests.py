@@ -0,0 +1,60 @@
+import json
+import pickle
+import unittest
+
+from card_generator.models.assets import get_war_at_sea_json
+from card_generator.models.unit import Unit
+from card_generator.models.utils import load_json, load_unit, ModelJsonEncoder
+
+
+class UnitTestCases(unittest.TestCase):
+    def setUp(self):
+        with get_war_at_sea_json() as data_file:
+            self.data = json.load(data_file)
+        self.nations = load_json(self.data)
+        self.blueprint_unit = next(unit for nation in self.nations for unit in nation.get_units()
+                                   if unit.blue_print_settings is not None)
+
+    def test_round_trips_through_json(self):
+        encoded = json.dumps(self.nations, cls=ModelJsonEncoder)
+        self.assertEqual(encoded, json.dumps(load_json(json.loads(encoded)), cls=ModelJsonEncoder))
+        for record, unit in zip(self.data[0]["units"], self.nations[0].get_units()):
+            record.pop("aircraft_gunnery_attack")
+            self.assertEqual(record, {name: value for name, value in json.loads(json.dumps(unit, cls=ModelJsonEncoder))
+                                      .items() if name != "aircraft_gunnery_attack"})
+
+    def test_attacks_are_precomputed(self):
+        unit = load_unit(self.data[0]["units"][0])
+        self.assertIs(unit.get_attacks(), unit.get_attacks())
+        number_of_attacks, attacks = unit.get_attacks()
+        self.assertEqual(4, number_of_attacks)
+        self.assertEqual(["main_gunnery", "anti-air", "asw", "torpedo"], [attack.name for attack in attacks])
+        self.assertEqual(("6", "5", "5", "-"), attacks[0].value)
+        self.assertEqual("2", unit.get_armor()["ARMOR"])
+
+    def test_loaded_units_are_frozen(self):
+        unit = self.nations[0].get_units()[0]
+        with self.assertRaises(AttributeError):
+            unit.with_name("Renamed")
+        with self.assertRaises(AttributeError):
+            unit.extra = True
+        with self.assertRaises(TypeError):
+            self.blueprint_unit.special_abilities["Extra"] = "ability"
+        with self.assertRaises(AttributeError):
+            self.blueprint_unit.blue_print_settings.max_width = 1
+        self.assertEqual("Building", Unit().with_name("Building").name)
+
+    def test_pickle(self):
+        for unit in (self.nations[0].get_units()[0], self.blueprint_unit):
+            copy = pickle.loads(pickle.dumps(unit))
+            self.assertTrue(copy.is_frozen())
+            self.assertEqual(unit.get_attacks(), copy.get_attacks())
+            self.assertEqual(json.dumps(unit, cls=ModelJsonEncoder), json.dumps(copy, cls=ModelJsonEncoder))
+            with self.assertRaises(TypeError):
+                copy.special_abilities["Extra"] = "ability"
+        with self.assertRaises(AttributeError):
+            copy.blue_print_settings.max_width = 1
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import io
+import json
+import tempfile
+import unittest
+
+from PIL import Image
+
+from card_generator import Generator
+from card_generator.models.assets import get_war_at_sea_json
+from card_generator.models.unit import Unit
+from card_generator.models.utils import load_json
+from card_generator.renderer import Renderer
+
+
+class RendererTestCases(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        data_file = get_war_at_sea_json()
+        deck = load_json(json.load(data_file))
+        data_file.close()
+        cls.nation = next(nation for nation in deck if nation.name == "Australia")
+        cls.unit = next(unit for unit in cls.nation.get_units() if unit.name == "HMAS Arunta")
+        cls.renderer = Renderer()
+
+    def test_matches_written_cards(self):
+        with tempfile.TemporaryDirectory() as output_folder:
+            generator = Generator(self.nation, self.unit)
+            generator.generate_front(output_folder=output_folder)
+            generator.generate_back(output_folder=output_folder)
+            front = Image.open(generator.get_card_path(output_folder))
+            back = Image.open(generator.get_card_path(output_folder, back=True))
+            self.assertEqual(front.tobytes(), self.renderer.render_front(self.nation, self.unit).tobytes())
+            self.assertEqual(back.tobytes(), self.renderer.render_back(self.nation, self.unit).tobytes())
+
+    def test_render_many_encodes(self):
+        cards = self.renderer.render_many([(self.nation, self.unit)], full=True, encode=True)
+        self.assertEqual(1, len(cards))
+        self.assertFalse(cards[0].failed)
+        front = Image.open(io.BytesIO(cards[0].front))
+        self.assertEqual("PNG", front.format)
+        self.assertEqual(self.renderer.render_front(self.nation, self.unit).tobytes(), front.tobytes())
+        self.assertIsNotNone(cards[0].back)
+
+    def test_render_many_captures_failures(self):
+        unit = Unit().with_name("Missing")
+        cards = self.renderer.render_many([(self.nation, unit), (self.nation, self.unit)])
+        self.assertTrue(cards[0].failed)
+        self.assertFalse(cards[1].failed)
+
+
+if __name__ == '__main__':
+    unittest.main()
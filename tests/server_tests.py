@@ -0,0 +1,99 @@
+import io
+import json
+import threading
+import unittest
+from http.client import HTTPConnection
+from urllib.parse import quote
+
+from PIL import Image
+
+from card_generator.models.assets import get_war_at_sea_json
+from card_generator.server import create_server, RenderCache
+
+
+class RenderCacheTestCases(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = RenderCache(max_size=10)
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        self.assertEqual(b"1234", cache.get("a"))
+        cache.put("c", b"1234")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(b"1234", cache.get("a"))
+        self.assertEqual(b"1234", cache.get("c"))
+        self.assertEqual(8, cache.stats()["size"])
+
+
+class CardServerTestCases(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = create_server(port=0)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def request(self, method, path, body=None, headers=None):
+        connection = HTTPConnection(*self.server.server_address[:2])
+        connection.request(method, path, body=body, headers=headers or dict())
+        response = connection.getresponse()
+        content = response.read()
+        connection.close()
+        return response, content
+
+    def test_serves_card(self):
+        response, content = self.request("GET", "/cards/Australia/{}/front.png".format(quote("HMAS Arunta")))
+        self.assertEqual(200, response.status)
+        self.assertEqual("image/png", response.getheader("Content-Type"))
+        self.assertEqual("PNG", Image.open(io.BytesIO(content)).format)
+        etag = response.getheader("ETag")
+        response, content = self.request("GET", "/cards/Australia/{}/front.png".format(quote("HMAS Arunta")),
+                                         headers={"If-None-Match": etag})
+        self.assertEqual(304, response.status)
+        self.assertEqual(b"", content)
+        response, _ = self.request("GET", "/cards/Australia/{}/back.png".format(quote("HMAS Arunta")))
+        self.assertEqual(200, response.status)
+        self.assertNotEqual(etag, response.getheader("ETag"))
+
+    def test_unknown_unit(self):
+        response, _ = self.request("GET", "/cards/Australia/Missing/front.png")
+        self.assertEqual(404, response.status)
+        response, _ = self.request("GET", "/cards/Australia")
+        self.assertEqual(404, response.status)
+
+    def test_render_posted_unit(self):
+        data_file = get_war_at_sea_json()
+        nation = next(nation for nation in json.load(data_file) if nation["name"] == "Australia")
+        data_file.close()
+        nation["units"] = nation["units"][:1]
+        served, _ = self.request("GET", "/cards/Australia/{}/front.png".format(quote(nation["units"][0]["name"])))
+        response, content = self.request("POST", "/render", json.dumps(nation))
+        self.assertEqual(200, response.status)
+        self.assertEqual(served.getheader("ETag"), response.getheader("ETag"))
+        self.assertEqual("PNG", Image.open(io.BytesIO(content)).format)
+        nation["units"][0]["points"] += 1
+        changed, _ = self.request("POST", "/render", json.dumps(nation))
+        self.assertNotEqual(response.getheader("ETag"), changed.getheader("ETag"))
+        response, _ = self.request("POST", "/render", "{\"name\": \"Australia\"}")
+        self.assertEqual(400, response.status)
+
+    def test_rejects_paths_in_posted_names(self):
+        data_file = get_war_at_sea_json()
+        nation = next(nation for nation in json.load(data_file) if nation["name"] == "Australia")
+        data_file.close()
+        nation["units"] = nation["units"][:1]
+        for field, value in [("name", "../../../../etc"), ("name", "/tmp")]:
+            posted = dict(nation, **{field: value})
+            response, content = self.request("POST", "/render", json.dumps(posted))
+            self.assertEqual(400, response.status, msg=value)
+        for value in ["../../nation-emblems/Australia-sm", "/etc/passwd"]:
+            nation["units"][0]["class"] = value
+            response, content = self.request("POST", "/render", json.dumps(nation))
+            self.assertEqual(400, response.status, msg=value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import io
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from card_generator.utils.encoding import PROFILES, EncodeStats, AsyncWriter, get_profile
+
+
+class OutputProfileTestCases(unittest.TestCase):
+    def setUp(self):
+        self.image = Image.new("RGBA", (64, 48), (200, 30, 30, 255))
+        self.image.paste((0, 0, 0, 0), (0, 0, 16, 16))
+
+    def test_png_matches_pillow_defaults(self):
+        expected = io.BytesIO()
+        self.image.save(expected, "png")
+        self.assertEqual(expected.getvalue(), PROFILES["png"].encode(self.image))
+
+    def test_lossless_profiles_round_trip(self):
+        for name in ["png", "fast-png", "small-png", "webp"]:
+            if not PROFILES[name].is_available():
+                continue
+            decoded = Image.open(io.BytesIO(PROFILES[name].encode(self.image))).convert("RGBA")
+            self.assertEqual(self.image.tobytes(), decoded.tobytes(), name)
+
+    def test_jpeg_is_flattened_onto_white(self):
+        decoded = Image.open(io.BytesIO(PROFILES["jpeg"].encode(self.image)))
+        self.assertEqual("RGB", decoded.mode)
+        self.assertTrue(all(channel > 240 for channel in decoded.getpixel((2, 2))))
+
+    def test_save_records_stats(self):
+        stats = EncodeStats()
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "nested", "card" + PROFILES["fast-png"].extension)
+            size = PROFILES["fast-png"].save(self.image, path, stats)
+            self.assertEqual(os.path.getsize(path), size)
+        self.assertEqual(1, stats.count)
+        self.assertEqual(size, stats.size)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            get_profile("gif")
+
+    def test_async_writer_writes_every_image(self):
+        stats = EncodeStats()
+        with tempfile.TemporaryDirectory() as folder:
+            paths = [os.path.join(folder, "nested", "{}.png".format(i)) for i in range(6)]
+            with AsyncWriter(queue_depth=2) as writer:
+                for path in paths:
+                    writer.submit(PROFILES["png"], self.image, path, stats)
+            for path in paths:
+                with open(path, "rb") as image_file:
+                    self.assertEqual(PROFILES["png"].encode(self.image), image_file.read())
+        self.assertEqual(6, stats.count)
+
+    def test_async_writer_reports_errors(self):
+        with tempfile.NamedTemporaryFile() as blocking_file:
+            with AsyncWriter() as writer:
+                future = writer.submit(PROFILES["png"], self.image, os.path.join(blocking_file.name, "card.png"))
+            self.assertIsInstance(future.exception(), OSError)
+
+
+if __name__ == '__main__':
+    unittest.main()
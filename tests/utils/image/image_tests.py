@@ -0,0 +1,90 @@
+import unittest
+
+import numpy
+from PIL import Image, ImageDraw
+
+from card_generator.models.assets import Fonts, Colors
+from card_generator.utils.image import screen_blend, alpha_composite_region
+from card_generator.utils.image.ImageTextWrap import ImageTextWrap
+
+try:
+    from blend_modes.blending_functions import screen
+except ImportError:
+    screen = None
+
+
+class ScreenBlendTestCases(unittest.TestCase):
+    def setUp(self):
+        rng = numpy.random.default_rng(0)
+        base = rng.integers(0, 256, (120, 80, 4), dtype=numpy.uint8)
+        base[:, :, 3] = rng.integers(200, 256, (120, 80), dtype=numpy.uint8)
+        self.base = Image.fromarray(base, "RGBA")
+        self.layer = Image.new("RGBA", self.base.size, (255, 255, 255, 0))
+        self.layer.paste(Image.fromarray(rng.integers(0, 256, (30, 40, 4), dtype=numpy.uint8), "RGBA"), (20, 50))
+
+    def test_empty_layer_leaves_base_untouched(self):
+        base = self.base.copy()
+        screen_blend(base, Image.new("RGBA", base.size, (255, 255, 255, 0)))
+        self.assertTrue((numpy.asarray(base) == numpy.asarray(self.base)).all())
+
+    def test_only_layer_bounding_box_changes(self):
+        blended = numpy.asarray(screen_blend(self.base.copy(), self.layer)).astype(int)
+        changed = (blended != numpy.asarray(self.base)).any(axis=2)
+        rows, columns = numpy.nonzero(changed)
+        self.assertGreaterEqual(rows.min(), 50)
+        self.assertLess(rows.max(), 80)
+        self.assertGreaterEqual(columns.min(), 20)
+        self.assertLess(columns.max(), 60)
+
+    def test_offset_layer_matches_full_layer(self):
+        rng = numpy.random.default_rng(1)
+        small = Image.fromarray(rng.integers(0, 256, (30, 40, 4), dtype=numpy.uint8), "RGBA")
+        full = Image.new("RGBA", self.base.size, (255, 255, 255, 0))
+        full.paste(small, (60, -10))
+        expected = numpy.asarray(screen_blend(self.base.copy(), full))
+        blended = numpy.asarray(screen_blend(self.base.copy(), small, offset=(60, -10)))
+        self.assertTrue((blended == expected).all())
+
+    @unittest.skipIf(screen is None, "blend_modes is not installed")
+    def test_matches_blend_modes(self):
+        expected = numpy.uint8(screen(numpy.array(self.base).astype(float),
+                                      numpy.array(self.layer).astype(float), 1.0)).astype(int)
+        exact = numpy.asarray(screen_blend(self.base.copy(), self.layer, dtype=numpy.float64)).astype(int)
+        self.assertTrue((exact == expected).all())
+        approximate = numpy.asarray(screen_blend(self.base.copy(), self.layer)).astype(int)
+        self.assertLessEqual(numpy.abs(approximate - expected).max(), 1)
+
+
+class AlphaCompositeRegionTestCases(unittest.TestCase):
+    def test_matches_full_composite(self):
+        rng = numpy.random.default_rng(2)
+        base = Image.fromarray(rng.integers(0, 256, (120, 80, 4), dtype=numpy.uint8), "RGBA")
+        overlay = Image.new("RGBA", base.size, (255, 255, 255, 0))
+        overlay.paste(Image.fromarray(rng.integers(0, 256, (25, 35, 4), dtype=numpy.uint8), "RGBA"), (10, 70))
+        expected = numpy.asarray(Image.alpha_composite(base, overlay))
+        composited = numpy.asarray(alpha_composite_region(base.copy(), overlay))
+        self.assertTrue((composited == expected).all())
+
+
+class ImageTextWrapTestCases(unittest.TestCase):
+    TEXT = "The quick brown fox jumps over the lazy dog. " * 12
+
+    def test_single_line_matches_plain_text(self):
+        wrapped = ImageTextWrap(Fonts.BACK_TEXT, Image.new("RGBA", (600, 100), (0, 0, 0, 0)))
+        expected = Image.new("RGBA", (600, 100), (0, 0, 0, 0))
+        ImageDraw.Draw(expected, "RGBA").text((10, 5), "short text", font=Fonts.BACK_TEXT, fill=Colors.WHITE)
+        result = wrapped.wrap_around("short text", start_coord=(10, 5))
+        self.assertEqual(expected.tobytes(), result.tobytes())
+
+    def test_text_wraps_around_contents(self):
+        image = Image.new("RGBA", (500, 400), (0, 0, 0, 0))
+        ImageDraw.Draw(image).rectangle((250, 0, 499, 150), fill=(255, 0, 0, 255))
+        result = numpy.asarray(ImageTextWrap(Fonts.BACK_TEXT, image).wrap_around(self.TEXT, start_coord=(10, 10)))
+        # the contents are never written over, text continues next to them once they end
+        self.assertTrue((result[0:151, 250:500] == (255, 0, 0, 255)).all())
+        self.assertTrue(result[10:150, 10:250, 3].any())
+        self.assertTrue(result[160:400, 250:500, 3].any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+
+import numpy
+from PIL import Image
+
+from card_generator.utils.image.ResizeCache import ResizeCache
+
+
+def encode(seed: int) -> bytes:
+    rng = numpy.random.default_rng(seed)
+    buffer = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, (40, 60, 4), dtype=numpy.uint8), "RGBA").save(buffer, "png")
+    return buffer.getvalue()
+
+
+def halve(size: tuple) -> list:
+    return [(size[0] // 2, size[1] // 2)]
+
+
+class ResizeCacheTestCases(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache = ResizeCache(self.cache_dir.name)
+        self.source = encode(0)
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def entry(self, source: bytes, sizes: list = None, resample: int = Image.Resampling.BICUBIC) -> str:
+        return os.path.join(self.cache_dir.name, ResizeCache._entry_name(hashlib.sha256(source).hexdigest(),
+                                                                         sizes or [(30, 20)], resample))
+
+    def test_hit_matches_resize(self):
+        expected = ResizeCache.resize(Image.open(io.BytesIO(self.source)), [(30, 20)]).tobytes()
+        self.assertEqual(expected, self.cache.get(self.source, halve).tobytes())
+        self.assertEqual({"hits": 0, "misses": 1, "evictions": 0}, self.cache.stats())
+        cached = self.cache.get(self.source, halve)
+        self.assertEqual(expected, cached.tobytes())
+        self.assertEqual("RGBA", cached.mode)
+        self.assertEqual({"hits": 1, "misses": 1, "evictions": 0}, self.cache.stats())
+
+    def test_key_changes_with_inputs(self):
+        self.cache.get(self.source, halve)
+        self.assertTrue(os.path.exists(self.entry(self.source)))
+        self.cache.get(encode(1), halve)
+        self.cache.get(self.source, lambda size: [(40, 30), (30, 20)])
+        self.cache.get(self.source, halve, Image.Resampling.LANCZOS)
+        self.assertEqual(0, self.cache.hits)
+        self.assertEqual(4, len(os.listdir(self.cache_dir.name)))
+        for entry in (self.entry(encode(1)), self.entry(self.source, [(40, 30), (30, 20)]),
+                      self.entry(self.source, resample=Image.Resampling.LANCZOS)):
+            self.assertTrue(os.path.exists(entry))
+
+    def test_least_recently_used_is_evicted(self):
+        sources = [encode(seed) for seed in range(3)]
+        self.cache.get(sources[0], halve)
+        self.cache.get(sources[1], halve)
+        # make the first entry the least recently written, then use it so the second one becomes least recently used
+        os.utime(self.entry(sources[0]), (100, 100))
+        os.utime(self.entry(sources[1]), (200, 200))
+        self.cache.get(sources[0], halve)
+        buffer = io.BytesIO()
+        ResizeCache.resize(Image.open(io.BytesIO(sources[2])), [(30, 20)]).save(buffer, "png")
+        # room for every entry but the least recently used one
+        sizes = [os.path.getsize(self.entry(source)) for source in sources[:2]] + [len(buffer.getvalue())]
+        self.cache.max_size = sum(sizes) - 1
+        self.cache.get(sources[2], halve)
+        self.assertEqual(1, self.cache.evictions)
+        self.assertEqual([True, False, True], [os.path.exists(self.entry(source)) for source in sources])
+
+    def test_corrupt_entry_is_resized_again(self):
+        expected = self.cache.get(self.source, halve).tobytes()
+        with open(self.entry(self.source), "rb") as entry_file:
+            entry = entry_file.read()
+        for corrupt in (b"not a png", entry[:len(entry) // 2]):
+            with open(self.entry(self.source), "wb") as entry_file:
+                entry_file.write(corrupt)
+            self.assertEqual(expected, self.cache.get(self.source, halve).tobytes())
+        self.assertEqual(3, self.cache.misses)
+        self.assertEqual(expected, self.cache.get(self.source, halve).tobytes())
+        self.assertEqual(1, self.cache.hits)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import copy
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from card_generator import cli, Generator
+from card_generator.models.dataset import Dataset
+from card_generator.utils import manifest as build_manifest
+from card_generator.utils import parallel
+from card_generator.utils.manifest import BuildManifest, get_card_assets, get_unit_records
+from card_generator.utils.printing import PrintFormatter
+
+
+class BuildManifestTestCases(unittest.TestCase):
+    def test_record_and_remove(self):
+        with tempfile.TemporaryDirectory() as output_folder:
+            outputs = [os.path.join(output_folder, name) for name in ("a.png", "b.png")]
+            for output in outputs:
+                open(output, "w").close()
+            manifest = BuildManifest(os.path.join(output_folder, BuildManifest.CARDS_FILE_NAME))
+            self.assertFalse(manifest.is_current("card", {"record": "1"}))
+            manifest.record("card", {"record": "1"}, outputs)
+            manifest.save()
+            manifest = BuildManifest.load(manifest.path)
+            self.assertTrue(manifest.is_current("card", {"record": "1"}))
+            self.assertFalse(manifest.is_current("card", {"record": "2"}))
+            self.assertFalse(manifest.is_current("card", {"record": "1"}, outputs + [outputs[0] + ".back"]))
+            # outputs that are no longer built are removed
+            manifest.record("card", {"record": "2"}, outputs[:1])
+            self.assertEqual([True, False], [os.path.exists(output) for output in outputs])
+            manifest.remove("card")
+            self.assertEqual([], manifest.keys())
+            self.assertFalse(os.path.exists(outputs[0]))
+
+    def test_unit_records(self):
+        dataset = Dataset.load()
+        records = get_unit_records([dataset.get_record("Canada")])
+        self.assertEqual(5, len(records))
+        self.assertEqual("HMCS Haida", records[("Canada", "HMCS Haida")]["name"])
+
+
+class IncrementalCardsTestCases(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = Dataset.load()
+        cls.work = cls.dataset.plan(["Canada"])
+        cls.data = [cls.dataset.get_record("Canada")]
+
+    def render(self, output_folder: str, work: list = None, data: list = None) -> list:
+        """
+        Builds the cards incrementally.
+        :return: names of the units that were rendered.
+        """
+        with mock.patch.object(parallel, "render_units", wraps=parallel.render_units) as render_units:
+            cli._render(work or self.work, data or self.data, output_folder, incremental=True)
+        return [unit.name for _, unit in render_units.call_args[0][0]]
+
+    def test_unchanged_build_is_skipped(self):
+        with tempfile.TemporaryDirectory() as output_folder:
+            self.assertEqual([unit.name for _, unit in self.work], self.render(output_folder))
+            self.assertEqual([], self.render(output_folder))
+
+    def test_changed_record_renders_its_card(self):
+        with tempfile.TemporaryDirectory() as output_folder:
+            self.render(output_folder)
+            data = copy.deepcopy(self.data)
+            data[0]["units"][1]["points"] += 1
+            self.assertEqual([data[0]["units"][1]["name"]], self.render(output_folder, data=data))
+
+    def test_changed_asset_renders_its_cards(self):
+        nation, unit = self.work[0]
+        silhouette = get_card_assets(nation, unit)[3]
+        hash_file = build_manifest.hash_file
+
+        def changed_hash(path) -> str:
+            return "changed" if str(path).replace(os.sep, "/").endswith(silhouette) else hash_file(path)
+
+        with tempfile.TemporaryDirectory() as output_folder:
+            self.render(output_folder)
+            expected = [unit.name for nation, unit in self.work if silhouette in get_card_assets(nation, unit)]
+            self.assertLess(len(expected), len(self.work))
+            with mock.patch.object(build_manifest, "hash_file", changed_hash):
+                self.assertEqual(expected, self.render(output_folder))
+
+    def test_removed_unit_is_deleted(self):
+        with tempfile.TemporaryDirectory() as output_folder:
+            self.render(output_folder)
+            nation, removed = self.work[-1]
+            card = Generator(nation, removed).get_card_path(output_folder)
+            self.assertTrue(os.path.exists(card))
+            self.assertEqual([], self.render(output_folder, work=self.work[:-1]))
+            self.assertFalse(os.path.exists(card))
+            manifest = BuildManifest.load(os.path.join(output_folder, BuildManifest.CARDS_FILE_NAME))
+            self.assertNotIn("Canada/{}".format(removed.name), manifest.keys())
+
+
+class IncrementalSheetsTestCases(unittest.TestCase):
+    def setUp(self):
+        self.card_folder = tempfile.TemporaryDirectory()
+        self.output_folder = tempfile.TemporaryDirectory()
+        self.manifest_folder = tempfile.TemporaryDirectory()
+        # a letter page holds 9 cards, so these fill two pages
+        for i in range(10):
+            Image.new("RGB", (75, 105), (i * 20, 0, 0)).save(
+                os.path.join(self.card_folder.name, "card-{}.png".format(i)))
+
+    def tearDown(self):
+        self.card_folder.cleanup()
+        self.output_folder.cleanup()
+        self.manifest_folder.cleanup()
+
+    def generate(self, pdf: bool = False, output_folder: str = None) -> bool:
+        """
+        Generates the sheets incrementally.
+        :return: True if the sheets were built.
+        """
+        with mock.patch.object(PrintFormatter, "generate_print_layout",
+                               wraps=PrintFormatter.generate_print_layout) as generate_print_layout:
+            cli.generate_print_sheet(self.card_folder.name, output_folder or self.output_folder.name, ppi=30,
+                                     incremental=True, pdf=pdf,
+                                     manifest=os.path.join(self.manifest_folder.name, BuildManifest.SHEETS_FILE_NAME))
+        return generate_print_layout.called
+
+    def sheets(self) -> list:
+        return sorted(os.listdir(self.output_folder.name))
+
+    def test_unchanged_sheets_are_skipped(self):
+        self.assertTrue(self.generate())
+        self.assertFalse(self.generate())
+        # the manifest is kept out of the sheets, which are shipped as they are
+        self.assertNotIn(BuildManifest.SHEETS_FILE_NAME, self.sheets())
+
+    def test_output_folders_are_recorded_separately(self):
+        self.generate()
+        with tempfile.TemporaryDirectory() as output_folder:
+            self.assertTrue(self.generate(output_folder=output_folder))
+            self.assertFalse(self.generate(output_folder=output_folder))
+        self.assertFalse(self.generate())
+
+    def test_fewer_sheets_removes_extra_pages(self):
+        self.generate()
+        self.assertEqual(["page-1-back.png", "page-1.png", "page-2-back.png", "page-2.png"], self.sheets())
+        os.remove(os.path.join(self.card_folder.name, "card-9.png"))
+        self.assertTrue(self.generate())
+        self.assertEqual(["page-1-back.png", "page-1.png"], self.sheets())
+
+    def test_switching_to_pdf_removes_pages(self):
+        self.generate()
+        self.assertTrue(self.generate(pdf=True))
+        self.assertEqual([os.path.basename(self.card_folder.name) + ".pdf"], self.sheets())
+
+
+if __name__ == '__main__':
+    unittest.main()
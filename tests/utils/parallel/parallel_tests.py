@@ -0,0 +1,32 @@
+import copy
+import os
+import tempfile
+import unittest
+
+from card_generator import Generator
+from card_generator.models.dataset import Dataset
+from card_generator.models.utils import load_unit
+from card_generator.utils.parallel import render_units
+
+
+class RenderUnitsTestCases(unittest.TestCase):
+    def test_failed_card_does_not_stop_the_others(self):
+        dataset = Dataset.load()
+        work = dataset.plan(["Canada"])[:4]
+        record = copy.deepcopy(dataset.get_record("Canada")["units"][1])
+        record["class"] = "Missing"
+        nation, unit = work[1]
+        work[1] = (nation, load_unit(record))
+        with tempfile.TemporaryDirectory() as output_folder:
+            results = render_units(work, output_folder=output_folder, jobs=2)
+            self.assertEqual(["Canada/{}".format(unit.name) for _, unit in work], [str(result) for result in results])
+            self.assertEqual([False, True, False, False], [result.failed for result in results])
+            self.assertIn("missing.png", results[1].error)
+            self.assertEqual([True, False, True, True],
+                             [os.path.exists(Generator(nation, unit).get_card_path(output_folder))
+                              for nation, unit in work])
+            self.assertEqual([1, 0, 1, 1], [result.encode_stats.count for result in results])
+
+
+if __name__ == '__main__':
+    unittest.main()
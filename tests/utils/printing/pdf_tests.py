@@ -0,0 +1,63 @@
+import io
+import os
+import tempfile
+import unittest
+import zlib
+
+from PIL import Image, PdfParser, UnidentifiedImageError
+
+from card_generator.utils.encoding import PROFILES
+from card_generator.utils.printing import PrintFormatter, PageFormat, CardFormat
+from card_generator.utils.printing.pdf import PdfWriter, png_to_flate, supports
+
+
+class PdfTestCases(unittest.TestCase):
+    def test_pages_are_streamed_in_order(self):
+        pages = [Image.new("RGB", (200, 100), color) for color in ((255, 0, 0), (0, 0, 255))]
+        with tempfile.TemporaryDirectory() as output_folder:
+            path = os.path.join(output_folder, "sheets", "cards.pdf")
+            with PdfWriter(path, 100) as writer:
+                writer.add_page(PROFILES["png"].encode(pages[0]), "png")
+                writer.add_page(PROFILES["jpeg"].encode(pages[1]), "jpeg")
+            parser = PdfParser.PdfParser(path)
+            try:
+                self.assertEqual(2, len(parser.pages))
+                images = list()
+                for reference in parser.pages:
+                    page = parser.read_indirect(reference)
+                    self.assertEqual([0, 0, 144, 72], page[b"MediaBox"])
+                    images.append(parser.read_indirect(page[b"Resources"][b"XObject"][b"Page"]))
+                self.assertEqual(b"FlateDecode", images[0].dictionary[b"Filter"])
+                # every row of the page is PNG filtered, prefixed with its filter type
+                self.assertEqual(100 * (1 + 200 * 3), len(zlib.decompress(images[0].buf)))
+                self.assertEqual(b"DCTDecode", images[1].dictionary[b"Filter"])
+                self.assertEqual((200, 100), Image.open(io.BytesIO(images[1].buf)).size)
+            finally:
+                parser.close()
+
+    def test_failed_page_leaves_previous_pdf(self):
+        with tempfile.TemporaryDirectory() as card_folder, tempfile.TemporaryDirectory() as output_folder:
+            # a letter page holds 9 cards, the corrupt card is on the second page
+            for i in range(10):
+                Image.new("RGB", (75, 105), (i * 20, 0, 0)).save(os.path.join(card_folder, "card-{}.png".format(i)))
+            with open(os.path.join(card_folder, "card-9.png"), "wb") as card_file:
+                card_file.write(b"not a card")
+            path = os.path.join(output_folder, "cards.pdf")
+            with open(path, "wb") as pdf_file:
+                pdf_file.write(b"previous")
+            with self.assertRaises(UnidentifiedImageError):
+                PrintFormatter.generate_print_layout(PageFormat.LETTER, CardFormat.STANDARD, card_folder,
+                                                     output_folder, ppi=30, pdf=path)
+            self.assertEqual(["cards.pdf"], os.listdir(output_folder))
+            with open(path, "rb") as pdf_file:
+                self.assertEqual(b"previous", pdf_file.read())
+
+    def test_unsupported_pages(self):
+        self.assertTrue(supports(PROFILES["small-png"]))
+        self.assertFalse(supports(PROFILES["webp"]))
+        with self.assertRaises(ValueError):
+            png_to_flate(PROFILES["png"].encode(Image.new("RGBA", (10, 10))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,5 +18,27 @@ class PrintTestCases(unittest.TestCase):
         ).get_back().show()
 
 
+class PlanLayoutTestCases(unittest.TestCase):
+    def test_backs_mirror_each_row(self):
+        cards = [Card("card-{}.png".format(i), i != 1, CardFormat.STANDARD, 100) for i in range(4)]
+        front, back = PrintFormatter.plan_layout(PageFormat.LETTER, CardFormat.STANDARD, cards, "out", ppi=100,
+                                                 spacing=0)
+        self.assertEqual(("out/page-1.png", False), (front.path, front.back))
+        self.assertEqual(("out/page-1-back.png", True), (back.path, back.back))
+        self.assertEqual(cards, [card for _, _, card in front.slots])
+        positions = [(x, y) for x, y, _ in front.slots]
+        self.assertEqual([(50, 25), (300, 25), (550, 25), (50, 375)], positions)
+        # the first row is reversed, card 1 has no back and the last row is padded with blanks on the left
+        self.assertEqual([((50, 25), cards[2]), ((550, 25), cards[0]), ((550, 375), cards[3])],
+                         [((x, y), card) for x, y, card in back.slots])
+
+    def test_pages(self):
+        cards = [Card("card-{}.png".format(i), True, CardFormat.STANDARD, 100) for i in range(10)]
+        sides = PrintFormatter.plan_layout(PageFormat.LETTER, CardFormat.STANDARD, cards, "out", ppi=100)
+        self.assertEqual(["out/page-1.png", "out/page-1-back.png", "out/page-2.png", "out/page-2-back.png"],
+                         [side.path for side in sides])
+        self.assertEqual([9, 9, 1, 1], [len(side.slots) for side in sides])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,61 @@
+import contextlib
+import threading
+import unittest
+
+from card_generator.utils.profiling import StageTimes, Trace, stage, card, count, attribute_to, recording, \
+    get_recorder, set_recorder
+
+
+class ProfilingTestCases(unittest.TestCase):
+    def test_stages_are_recorded(self):
+        times = StageTimes()
+        with recording(times):
+            for _ in range(3):
+                with stage("outer"):
+                    with stage("inner"):
+                        pass
+        self.assertEqual(3, len(times.samples["outer"]))
+        self.assertEqual(3, len(times.samples["inner"]))
+        self.assertIsNone(get_recorder())
+
+    def test_nothing_is_recorded_without_a_recorder(self):
+        self.assertIsNone(get_recorder())
+        self.assertIsInstance(stage("ignored"), contextlib.nullcontext)
+        times = StageTimes()
+        # a stage entered without a recorder is not recorded when it ends, even if one was set in the meantime
+        with stage("ignored"):
+            count("ignored")
+            previous = set_recorder(times)
+        set_recorder(previous)
+        self.assertEqual(0, len(times.samples))
+        self.assertEqual(0, len(times.counters))
+
+    def test_trace_attributes_stages_to_cards(self):
+        trace = Trace()
+        with recording(trace):
+            with card("Nation/Unit"):
+                with stage("render"):
+                    count("checks", 2)
+                background = threading.Thread(target=self._write_in_background, args=("Nation/Unit",))
+                background.start()
+                background.join()
+            with stage("unattributed"):
+                pass
+        cards = trace.get_cards()
+        self.assertEqual(["Nation/Unit"], [profile.name for profile in cards])
+        self.assertEqual({"render", "write"}, set(cards[0].stages))
+        self.assertEqual({"checks": 2}, cards[0].counters)
+        self.assertIn("unattributed", trace.get_stages())
+        self.assertIn("Nation/Unit", trace.summary())
+        events = trace.to_chrome_trace()["traceEvents"]
+        self.assertTrue(all(event["ph"] in ("X", "M") for event in events))
+
+    @staticmethod
+    def _write_in_background(name: str):
+        with attribute_to(name):
+            with stage("write"):
+                pass
+
+
+if __name__ == '__main__':
+    unittest.main()
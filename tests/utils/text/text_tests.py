@@ -0,0 +1,89 @@
+import gc
+import io
+import unittest
+import weakref
+
+from PIL import ImageFont
+
+from card_generator.models.assets import FONT_REGISTRY, Fonts, RESOURCES
+from card_generator.utils.text import fit_font_size, get_metrics, draw_text_psd_style, GlyphMetrics
+
+
+class FitFontSizeTestCases(unittest.TestCase):
+    def test_max_size_fits(self):
+        result = fit_font_size(lambda size: (True, size), 1, 25)
+        self.assertEqual(25, result.size)
+        self.assertEqual(25, result.layout)
+        self.assertEqual(1, result.iterations)
+
+    def test_matches_linear_search(self):
+        for limit in range(1, 61):
+            result = fit_font_size(lambda size: (size <= limit, size), 1, 60)
+            self.assertEqual(limit, result.size)
+            self.assertEqual(limit, result.layout)
+            self.assertLessEqual(result.iterations, 8)
+
+    def test_nothing_fits(self):
+        measured = list()
+
+        def measure(size):
+            measured.append(size)
+            return False, size
+
+        result = fit_font_size(measure, 1, 60)
+        self.assertEqual(1, result.size)
+        self.assertEqual(1, result.layout)
+        self.assertEqual(len(measured), result.iterations)
+
+
+class RecordingDraw:
+    def __init__(self):
+        self.calls = list()
+
+    def text(self, xy, text, **kwargs):
+        self.calls.append((xy, text))
+
+
+class GlyphMetricsTestCases(unittest.TestCase):
+    def setUp(self):
+        self.font = FONT_REGISTRY.get_font(Fonts.NORFOLK, 40)
+
+    def test_shared_per_font_and_size(self):
+        self.assertIs(get_metrics(self.font), get_metrics(FONT_REGISTRY.get_font(Fonts.NORFOLK, 40)))
+        self.assertIsNot(get_metrics(self.font), get_metrics(FONT_REGISTRY.get_font(Fonts.NORFOLK, 41)))
+
+    def test_matches_font(self):
+        metrics = get_metrics(self.font)
+        for a, b in zip("HMAS Arunta", "MAS Arunta "):
+            self.assertEqual(self.font.getlength(a + b) - self.font.getlength(b), metrics.pair_advance(a, b))
+            self.assertEqual(metrics.pair_advance(a, b) - metrics.advance(a), metrics.kerning(a, b))
+        self.assertEqual(self.font.getsize("HMAS Arunta"), metrics.size("HMAS Arunta"))
+
+    def test_strings_are_bounded(self):
+        metrics = GlyphMetrics(self.font)
+        for i in range(GlyphMetrics.MAX_STRINGS + 1):
+            metrics.size(str(i))
+        self.assertEqual(GlyphMetrics.MAX_STRINGS, len(metrics._sizes))
+        self.assertNotIn("0", metrics._sizes)
+        self.assertEqual(self.font.getsize("0"), metrics.size("0"))
+
+    def test_dropped_with_font(self):
+        font = ImageFont.truetype(io.BytesIO((RESOURCES / Fonts.NORFOLK).read_bytes()), 40)
+        metrics = weakref.ref(get_metrics(font))
+        del font
+        gc.collect()
+        self.assertIsNone(metrics())
+
+    def test_tracking_draws_each_character(self):
+        draw = RecordingDraw()
+        draw_text_psd_style(draw, (0, 0), "Arunta", self.font, tracking=-30, leading=0)
+        self.assertEqual(list("Arunta"), [text for _, text in draw.calls])
+
+    def test_no_tracking_draws_each_line_once(self):
+        draw = RecordingDraw()
+        draw_text_psd_style(draw, (5, 10), "HMAS\nArunta", self.font, tracking=0, leading=50)
+        self.assertEqual([((5, 10), "HMAS"), ((5, 60), "Arunta")], draw.calls)
+
+
+if __name__ == '__main__':
+    unittest.main()